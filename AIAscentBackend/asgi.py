@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'AIAscentBackend.settings')
 
 application = get_asgi_application()
+
+# Load heavy models once during app import so worker processes share memory via copy-on-write.
+from AIAscentBackend.warmup import warmup_models
+
+warmup_models()
@@ -187,4 +187,6 @@ DATABASES = {
         'PORT': os.environ.get('DB_PORT', '6543'),
         'PASSWORD': os.environ.get('DB_PASSWORD', 'AIAscent2025'),
     }
-}
\ No newline at end of file
+}
+# Serve the LLM-backed endpoints with async views (only useful under ASGI, see AIAscentBackend/asgi.py)
+ASYNC_AGENT_VIEWS = os.environ.get('ASYNC_AGENT_VIEWS', 'False').lower() == 'true'
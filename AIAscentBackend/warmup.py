@@ -0,0 +1,27 @@
+"""
+Model warmup shared by the WSGI and ASGI entry points.
+"""
+
+
+def warmup_models():
+	"""
+	Load heavy models once during app import so worker processes share memory via copy-on-write
+	(the servers run with --preload). A model that fails to load here is loaded on first use instead.
+	"""
+	try:
+		# Hugging Face text pipelines from safety module
+		from agents.agents.safety import (
+			get_hate_speech_classifier,
+			get_prompt_guarder_classifier,
+		)
+
+		# Importing the module loads the embeddings and sentiment analysis models
+		from db.models.embeddings import get_embedding_dimensions
+
+		# Initialize safety classifiers and the embeddings
+		get_hate_speech_classifier()
+		get_prompt_guarder_classifier()
+		get_embedding_dimensions()
+
+	except Exception as e:
+		print(f"Model warmup failed, models load on first use: {str(e)}")
@@ -0,0 +1,91 @@
+"""
+Shared cache keys for the agents.
+
+Keys look like `<namespace>:v<schema version>:<sha256 of the normalized arguments>`, so they are the
+same in every gunicorn worker and across restarts (unlike the built-in hash()), stay short no matter
+how long the user text is, and can be invalidated per namespace by bumping its version below.
+"""
+
+import hashlib
+import json
+import threading
+from django.core.cache import cache
+
+# Bump a namespace's version whenever the shape of its cached value changes
+CACHE_VERSIONS = {
+    "classify_feedback": 1,
+    "generate_insights": 1,
+    "coordinator_response": 1,
+    "onboard_agent": 1,
+    "onboard_personalized": 1,
+    "find_similar_job_titles": 1,
+    "find_similar_specializations": 1,
+    "find_jobs_with_relevant_tags": 1,
+    "get_job_details": 1,
+    "skill_agent": 1,
+    "skill_pipeline": 1,
+    "find_similar_skill_titles": 1,
+    "find_similar_skill_types": 1,
+    "find_skills_with_relevant_tags": 1,
+    "tavily_search": 1,
+    "agent_checkpoint": 2,
+}
+
+_CACHE_STATS = {}
+_CACHE_STATS_LOCK = threading.Lock()
+
+
+def normalize(value):
+    """
+    Collapses whitespace and case of every string in value (recursively for lists, tuples and dicts).
+    """
+    if isinstance(value, str):
+        return " ".join(value.split()).lower()
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): normalize(item) for key, item in value.items()}
+    return value
+
+
+def make_cache_key(namespace: str, *parts) -> str:
+    """
+    Builds a stable cache key for the given namespace and arguments.
+    """
+    payload = json.dumps(normalize(list(parts)), sort_keys=True, ensure_ascii=False, default=str)
+    digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    return f"{namespace}:v{CACHE_VERSIONS.get(namespace, 1)}:{digest}"
+
+
+def get_cached(cache_key: str):
+    """
+    cache.get() that also counts a hit or miss for the key's namespace.
+    """
+    value = cache.get(cache_key)
+    record_lookup(cache_key.split(":", 1)[0], bool(value))
+    return value
+
+
+def record_lookup(namespace: str, hit: bool):
+    """
+    Counts a hit or miss for a namespace (for caches that do not go through get_cached).
+    """
+    with _CACHE_STATS_LOCK:
+        stats = _CACHE_STATS.setdefault(namespace, {"hits": 0, "misses": 0})
+        stats["hits" if hit else "misses"] += 1
+
+
+def get_cache_stats() -> dict:
+    """
+    Hit / miss counters per namespace for this process.
+    """
+    with _CACHE_STATS_LOCK:
+        return {
+            namespace: {
+                **stats,
+                "hit_rate": round(stats["hits"] / (stats["hits"] + stats["misses"]), 4)
+                if stats["hits"] + stats["misses"]
+                else None,
+            }
+            for namespace, stats in sorted(_CACHE_STATS.items())
+        }
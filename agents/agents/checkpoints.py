@@ -0,0 +1,270 @@
+"""
+Per-run checkpoints of agent work, so a retried request does not redo finished LLM and tool calls.
+
+A view runs its agent through run_agent_with_retries(user, run_id, ...), which retries it inside
+agent_run() under the run id scoped to the requesting user (a run id sent by another user never
+resumes their run). The view returns the run id in the X-Agent-Run-Id header, so a client can send it
+as run_id to continue the run. While a run is active:
+- CheckpointedAgentExecutor stores each tool result under (run id, tool, input); a retried agent that
+  makes the same call gets the stored observation instead of running the tool (often a sub-agent) again;
+- checkpointed() stores a finished agent answer, so a retry that failed afterwards (for example while
+  saving it) does not run the agent again.
+
+Checkpoints live in the Django cache for AGENT_CHECKPOINT_SECONDS. The LLM calls made to produce each
+checkpoint are counted, and every reuse adds them to the saved LLM calls (see get_checkpoint_stats).
+"""
+
+import contextvars
+import os
+import threading
+import uuid
+from contextlib import contextmanager
+from django.core.cache import cache
+from langchain.agents import AgentExecutor
+from langchain_core.agents import AgentStep
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.tracers.context import register_configure_hook
+from agents.agents.cache_keys import make_cache_key
+from agents.agents.llm_scheduler import is_rate_limited
+
+AGENT_CHECKPOINT_SECONDS = int(os.getenv("AGENT_CHECKPOINT_SECONDS", "3600"))
+AGENT_RUN_ATTEMPTS = 3
+AGENT_RUN_ID_HEADER = "X-Agent-Run-Id"
+
+_RUN_ID = contextvars.ContextVar("agent_run_id", default=None)
+_LLM_CALLS = contextvars.ContextVar("agent_llm_calls", default=None)
+# Handler added to every LangChain run started while set (including nested sub-agent runs)
+_LLM_CALL_HANDLER = contextvars.ContextVar("agent_llm_call_handler", default=None)
+register_configure_hook(_LLM_CALL_HANDLER, inheritable=True)
+
+_CHECKPOINT_STATS = {"stored": 0, "tool_hits": 0, "output_hits": 0, "saved_llm_calls": 0}
+_CHECKPOINT_STATS_LOCK = threading.Lock()
+
+
+class LLMCallCount:
+    """
+    LLM calls made inside a block; nested counts also add to the enclosing ones.
+    """
+
+    def __init__(self, parent=None):
+        self.parent = parent
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def add(self):
+        count = self
+        while count is not None:
+            with count.lock:
+                count.value += 1
+            count = count.parent
+
+
+class LLMCallCounter(BaseCallbackHandler):
+    """
+    Adds every LLM call to the innermost count_llm_calls() block of the calling context.
+    """
+
+    run_inline = True
+
+    def _count(self):
+        count = _LLM_CALLS.get()
+        if count is not None:
+            count.add()
+
+    def on_llm_start(self, serialized, prompts, **kwargs):
+        self._count()
+
+    def on_chat_model_start(self, serialized, messages, **kwargs):
+        self._count()
+
+
+def new_run_id() -> str:
+    return uuid.uuid4().hex
+
+
+@contextmanager
+def agent_run(run_id: str):
+    """
+    Checkpoints agent work done inside the block under run_id. Use the same run_id for retries.
+    """
+    run_token = _RUN_ID.set(run_id)
+    handler_token = _LLM_CALL_HANDLER.set(LLMCallCounter())
+    try:
+        yield run_id
+    finally:
+        _LLM_CALL_HANDLER.reset(handler_token)
+        _RUN_ID.reset(run_token)
+
+
+def _user_run_id(user, run_id: str) -> str:
+    return f"{user.pk}:{run_id}"
+
+
+def run_agent_with_retries(user, run_id: str, call, attempts: int = AGENT_RUN_ATTEMPTS):
+    """
+    Calls call() until it succeeds (at most attempts times) inside the user's run, so retries resume
+    its checkpointed work. Rate limit errors are raised at once: the LLM scheduler already waited
+    them out and a retry would only queue again.
+    """
+    error = None
+    with agent_run(_user_run_id(user, run_id)):
+        for attempt in range(attempts):
+            try:
+                return call()
+            except Exception as e:
+                print(f"Error {e} at retry {attempt}")
+                if is_rate_limited(e):
+                    raise
+                error = e
+    raise Exception(error)
+
+
+async def arun_agent_with_retries(user, run_id: str, call, attempts: int = AGENT_RUN_ATTEMPTS):
+    """
+    Async version of run_agent_with_retries (call is a coroutine function).
+    """
+    error = None
+    with agent_run(_user_run_id(user, run_id)):
+        for attempt in range(attempts):
+            try:
+                return await call()
+            except Exception as e:
+                print(f"Error {e} at retry {attempt}")
+                if is_rate_limited(e):
+                    raise
+                error = e
+    raise Exception(error)
+
+
+@contextmanager
+def count_llm_calls():
+    count = LLMCallCount(parent=_LLM_CALLS.get())
+    token = _LLM_CALLS.set(count)
+    try:
+        yield count
+    finally:
+        _LLM_CALLS.reset(token)
+
+
+def _record(**counts):
+    with _CHECKPOINT_STATS_LOCK:
+        for name, amount in counts.items():
+            _CHECKPOINT_STATS[name] += amount
+
+
+def get_checkpoint_stats() -> dict:
+    with _CHECKPOINT_STATS_LOCK:
+        return dict(_CHECKPOINT_STATS)
+
+
+def _checkpoint_key(run_id: str, stage: str, parts) -> str:
+    return make_cache_key("agent_checkpoint", run_id, stage, *parts)
+
+
+def load_checkpoint(stage: str, *parts):
+    """
+    The checkpoint of the current run for stage and parts, or None.
+    """
+    run_id = _RUN_ID.get()
+    if not run_id:
+        return None
+    return cache.get(_checkpoint_key(run_id, stage, parts))
+
+
+def save_checkpoint(stage: str, *parts, value, llm_calls: int):
+    run_id = _RUN_ID.get()
+    if not run_id:
+        return
+    cache.set(_checkpoint_key(run_id, stage, parts), {"value": value, "llm_calls": llm_calls}, timeout=AGENT_CHECKPOINT_SECONDS)
+    _record(stored=1)
+
+
+def _reuse(checkpoint: dict, kind: str):
+    _record(**{kind: 1, "saved_llm_calls": checkpoint["llm_calls"]})
+    return checkpoint["value"]
+
+
+def checkpointed(stage: str, *parts, run):
+    """
+    Returns (value, resumed): the checkpointed value of stage for the current run if there is one,
+    otherwise run() is called and its (cache serializable) value is stored.
+    """
+    checkpoint = load_checkpoint(stage, *parts)
+    if checkpoint is not None:
+        return _reuse(checkpoint, "output_hits"), True
+
+    with count_llm_calls() as llm_calls:
+        value = run()
+    save_checkpoint(stage, *parts, value=value, llm_calls=llm_calls.value)
+    return value, False
+
+
+async def acheckpointed(stage: str, *parts, run):
+    """
+    Async version of checkpointed (run is a coroutine function).
+    """
+    checkpoint = await cache.aget(_checkpoint_key(_RUN_ID.get(), stage, parts)) if _RUN_ID.get() else None
+    if checkpoint is not None:
+        return _reuse(checkpoint, "output_hits"), True
+
+    with count_llm_calls() as llm_calls:
+        value = await run()
+    if _RUN_ID.get():
+        await cache.aset(
+            _checkpoint_key(_RUN_ID.get(), stage, parts),
+            {"value": value, "llm_calls": llm_calls.value},
+            timeout=AGENT_CHECKPOINT_SECONDS,
+        )
+        _record(stored=1)
+    return value, False
+
+
+def _tool_checkpoint_parts(agent_action) -> tuple:
+    return (agent_action.tool, agent_action.tool_input)
+
+
+def _should_store(step, name_to_tool_map) -> bool:
+    # Tools report failures as "Error ..." observations; those must run again on retry
+    observation = step.observation
+    return (
+        step.action.tool in name_to_tool_map
+        and isinstance(observation, str)
+        and not observation.lstrip().lower().startswith("error")
+    )
+
+
+class CheckpointedAgentExecutor(AgentExecutor):
+    """
+    AgentExecutor whose tool results are checkpointed for the current agent_run.
+    Only successful string observations are stored (failed calls and tools returning objects run again).
+    """
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        if not _RUN_ID.get():
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        checkpoint = load_checkpoint("tool", *_tool_checkpoint_parts(agent_action))
+        if checkpoint is not None:
+            return AgentStep(action=agent_action, observation=_reuse(checkpoint, "tool_hits"))
+
+        with count_llm_calls() as llm_calls:
+            step = super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        if _should_store(step, name_to_tool_map):
+            save_checkpoint("tool", *_tool_checkpoint_parts(agent_action), value=step.observation, llm_calls=llm_calls.value)
+        return step
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        if not _RUN_ID.get():
+            return await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        key = _checkpoint_key(_RUN_ID.get(), "tool", _tool_checkpoint_parts(agent_action))
+        checkpoint = await cache.aget(key)
+        if checkpoint is not None:
+            return AgentStep(action=agent_action, observation=_reuse(checkpoint, "tool_hits"))
+
+        with count_llm_calls() as llm_calls:
+            step = await super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+        if _should_store(step, name_to_tool_map):
+            await cache.aset(key, {"value": step.observation, "llm_calls": llm_calls.value}, timeout=AGENT_CHECKPOINT_SECONDS)
+            _record(stored=1)
+        return step
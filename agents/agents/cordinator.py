@@ -1,7 +1,6 @@
-import json
+import os
 import re
 from langchain.chat_models import init_chat_model
-from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.tools import tool
 from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
@@ -10,32 +9,57 @@ from agents.agents.skill import run_skill_agent
 from agents.agents.opportunity import find_mentors_for_improvements
 from agents.agents.feedback import summarise_feedback_points
 from db.models.user import APIUser
+from agents.agents.request_context import agent_user_context, get_agent_user
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
-from agents.agents.model_config import CORDINATOR_MODEL
+from agents.agents.cache_keys import get_cached, make_cache_key, normalize, record_lookup
+from db.models.semantic_cache import SemanticCacheEntry, profile_fingerprint
+from agents.agents.model_config import CORDINATOR_FALLBACK_MODELS, CORDINATOR_MODEL
+from agents.agents.http_clients import groq_client_kwargs
+from agents.agents.resilient_llm import resilient_llm
+from agents.agents.parallel_executor import ParallelToolAgentExecutor
+from agents.agents.checkpoints import acheckpointed, checkpointed
+from agents.agents.structured_output import (
+    StructuredAgentExecutor,
+    aagent_answer,
+    agent_answer,
+    create_structured_agent,
+    final_answer_tool,
+)
+from agents.agents.intent_router import aroute_coordinator_query, route_coordinator_query
+from typing import List
+from pydantic import BaseModel, Field
 
 CORDINATOR_LLM = None
+CORDINATOR_STREAMING_LLM = None
+# Coordinator executors by streaming mode, built once per process
+COORDINATOR_EXECUTORS = {}
+
+# Semantic response cache: a prior answer is reused when its query is at least this similar (cosine)
+COORDINATOR_SEMANTIC_CACHE_ENABLED = os.getenv("COORDINATOR_SEMANTIC_CACHE_ENABLED", "true").lower() == "true"
+COORDINATOR_SEMANTIC_CACHE_THRESHOLD = float(os.getenv("COORDINATOR_SEMANTIC_CACHE_THRESHOLD", "0.92"))
+COORDINATOR_SEMANTIC_CACHE_SECONDS = int(os.getenv("COORDINATOR_SEMANTIC_CACHE_SECONDS", "172800"))
+# Only reuse answers given while the user had their current job title
+COORDINATOR_SEMANTIC_CACHE_SAME_ROLE = os.getenv("COORDINATOR_SEMANTIC_CACHE_SAME_ROLE", "true").lower() == "true"
+
+# Tool calls the coordinator makes in one turn run concurrently, each bounded by the timeout
+COORDINATOR_PARALLEL_TOOLS = os.getenv("COORDINATOR_PARALLEL_TOOLS", "true").lower() == "true"
+COORDINATOR_MAX_PARALLEL_TOOLS = int(os.getenv("COORDINATOR_MAX_PARALLEL_TOOLS", "4"))
+COORDINATOR_TOOL_TIMEOUT_SECONDS = float(os.getenv("COORDINATOR_TOOL_TIMEOUT_SECONDS", "180"))
 
 CORDINATOR_PROMPT = """
-You are the central coordinator agent for AI Ascent (career development platform). Your job: route employee requests to the correct sub-agents, gather data via tools, synthesize personalized, actionable guidance, and return a single JSON-string response.
+You are the central coordinator agent for AI Ascent (career development platform). Your job: route employee requests to the correct sub-agents, gather data via tools, synthesize personalized, actionable guidance, and answer by calling `final_answer`.
 
 CONTEXT
 - AI Ascent analyzes employee profiles, feedback, and org data to create tailored development pathways.
 - You have no employee data until you call the appropriate tools.
 
 RESPONSE FORMAT
-- Return a JSON string (not a native object) exactly matching this structure:
-
-```
-{{
-  "message": "primary response content",
-  "action_items": ["Action 1", "Action 2"],
-  "resources": ["Resource 1", "Resource 2"]
-}}
-```
-
-- `message`: essential, complete answer.
-- `action_items`: array of clear next steps (or `[]`).
-- `resources`: array of courses/tools/URLs (or `[]`).
+- Finish by calling `final_answer` (on its own, after the other tools returned) with:
+  - `message`: essential, complete answer.
+  - `action_items`: array of clear next steps (or `[]`).
+  - `resources`: array of courses/tools/URLs (or `[]`).
+- Never write the answer as plain text or as a JSON string.
 
 TOOLS & USAGE LIMITS (call counts enforced)
 - `onboard_agent_tool` - call only once
@@ -54,6 +78,7 @@ CORE RULES
 - If a tool returns the requested information, present it - do not prompt the user for the same data.
 - If a tool errors, fix the input or use another tool.
 - Use as few tool calls/iterations as possible.
+- When several tools are needed and none needs another's output, call them together in the same turn (they run in parallel).
 - Only perform what the user asked; do not add unsolicited sections.
 
 Be concise, factual, and strictly follow the format and tool rules.
@@ -69,131 +94,177 @@ def get_cordinator_LLM():
     global CORDINATOR_LLM
     if not CORDINATOR_LLM:
         # CORDINATOR_LLM = init_chat_model(model=CORDINATOR_MODEL, temperature=0.0, reasoning_effort= "low")
-        CORDINATOR_LLM = ChatGroq(model=CORDINATOR_MODEL.split(':')[-1], reasoning_effort='low', temperature=0.0)
+        CORDINATOR_LLM = resilient_llm(
+            ChatGroq(model=CORDINATOR_MODEL.split(':')[-1], reasoning_effort='low', temperature=0.0, **groq_client_kwargs()),
+            CORDINATOR_MODEL,
+            CORDINATOR_FALLBACK_MODELS,
+            temperature=0.0,
+        )
 
     return CORDINATOR_LLM
 
 
-def get_coordinator_agent_executor(user_email: str):
+def get_cordinator_streaming_LLM():
     """
-    Initializes and returns a AgentExecutor for the coordinator.
+    Same model as get_cordinator_LLM, but streaming, so callbacks receive the answer token by token.
     """
 
-    @tool(name_or_callable="json")
-    def json_tool(tool_input: str = "") -> str:
-        """Guardrail: Call this tool for any json related functions need to be performed. You should never have to create a json object however. Give the json string directly in final message."""
-        return tool_input
-
-    # Create tools dynamically with email context
-    @tool
-    def onboard_agent_tool(query: str) -> str:
-        """Tool for getting personalized onboarding information and resources.
-
-        This tool retrieves job-specific onboarding details, checklists, resources, and career path information
-        based on the employee's job title and specialization from the database.
-
-        Use this tool when the user needs information about:
-        - Their specific job responsibilities and expectations
-        - Onboarding resources and checklists for their role
-        - Career development paths related to their position
-
-        Args:
-            query (str): Specific question about job role, onboarding needs, or career path.
-
-        Returns:
-            str: Structured information with onboarding checklists, resources, and explanations.
-        """
-        try:
-            user = APIUser.objects.get(email=user_email)
-            return run_onboard_agent(query, user.job_title, user.specialization)
-        except Exception as e:
-            return f"Error in onboarding agent: {str(e)}. Unable to process onboarding request."
-
-    @tool
-    def skill_agent_tool(query: str) -> str:
-        """Tool for personalized skill development recommendations.
-
-        This tool analyzes the employee's profile and provides tailored skill recommendations,
-        learning resources, and training materials based on their job role and career goals.
-
-        Use this tool when the user wants to:
-        - Learn which skills they should develop for career growth
-        - Find specific learning resources for skill improvement
-        - Understand skill gaps in their current profile
-        - Find areas where they can improve their capabilities
-
-        Args:
-            query (str): Question about skill development or learning needs.
-
-        Returns:
-            str: Personalized skill recommendations with descriptions, learning outcomes, and resources.
-        """
-        try:
-            return run_skill_agent(query, user_email)
-        except Exception as e:
-            return f"Error in skill agent: {str(e)}. Unable to process skill development request."
-
-    @tool
-    def opportunity_agent_tool() -> str:
-        """Tool for finding improvement areas and suitable mentors.
-
-        This tool automatically accesses the employee's feedback data, identifies specific improvement areas,
-        and matches them with mentors who excel in those areas within the organization.
-
-        IMPORTANT: This tool provides specific improvement areas directly from the user's feedback data.
-        Use this tool when the user asks where they can improve or what areas need development.
-
-        Use this tool when the user wants to:
-        - Find specific areas where they can improve their performance based on their feedbacks
-        - Identify mentors who can help them improve in specific areas
-
-        Returns:
-            str: List of improvement areas and potential mentors with their expertise and matching reasons.
-        """
-        try:
-            if not user_email:
-                return "User email required for mentor finding. Please provide user context."
-            mentors = find_mentors_for_improvements(user_email)
-            return str(mentors)
-        except Exception as e:
-            return f"Error in opportunity agent: {str(e)}. Unable to find mentors."
-
-    @tool
-    def summarise_feedback_tool(feedbacks: list) -> str:
-        """Tool for generating actionable insights and growth tips from feedback.
-
-        This tool analyzes feedback in depth and provides structured insights on strengths,
-        specific improvement suggestions, and practical growth tips the employee can implement.
-
-        Use this tool when:
-        - The user wants actionable advice based on their feedback
-        - The user needs specific strategies to leverage strengths or address weaknesses
-        - The user asks for practical ways to improve their performance
-
-        Args:
-            feedbacks (list): List of feedback statements as strings.
-
-        Returns:
-            str: Dictionary with 'strengths_insights', 'improvements_insights', and 'growth_tips'.
-        """
-        try:
-            if not isinstance(feedbacks, list) or not all(
-                isinstance(item, str) for item in feedbacks
-            ):
-                return "Error: 'feedbacks' must be a list of strings containing specific feedback statements."
-            insights = summarise_feedback_points(feedbacks)
-            return str(insights)
-        except Exception as e:
-            return f"Error in feedback summarization: {str(e)}. Unable to generate feedback insights."
-
-    llm = get_cordinator_LLM()
-    tools = [
-        json_tool,
-        onboard_agent_tool,
-        skill_agent_tool,
-        opportunity_agent_tool,
-        summarise_feedback_tool,
-    ]
+    global CORDINATOR_STREAMING_LLM
+    if not CORDINATOR_STREAMING_LLM:
+        CORDINATOR_STREAMING_LLM = get_cordinator_LLM().model_copy(update={"streaming": True})
+
+    return CORDINATOR_STREAMING_LLM
+
+
+# Coordinator tools. They act on behalf of the user of the current request (see agent_user_context)
+@tool(name_or_callable="json")
+def json_tool(tool_input: str = "") -> str:
+    """Guardrail: Call this tool for any json related functions need to be performed. You should never have to create a json object however. Give your answer through final_answer."""
+    return tool_input
+
+
+@tool
+def onboard_agent_tool(query: str) -> str:
+    """Tool for getting personalized onboarding information and resources.
+
+    This tool retrieves job-specific onboarding details, checklists, resources, and career path information
+    based on the employee's job title and specialization from the database.
+
+    Use this tool when the user needs information about:
+    - Their specific job responsibilities and expectations
+    - Onboarding resources and checklists for their role
+    - Career development paths related to their position
+
+    Args:
+        query (str): Specific question about job role, onboarding needs, or career path.
+
+    Returns:
+        str: Structured information with onboarding checklists, resources, and explanations.
+    """
+    try:
+        user = get_agent_user()
+        if user is None:
+            return "User context required for onboarding. Please provide user context."
+        return run_onboard_agent(query, user.job_title, user.specialization)
+    except Exception as e:
+        return f"Error in onboarding agent: {str(e)}. Unable to process onboarding request."
+
+
+@tool
+def skill_agent_tool(query: str) -> str:
+    """Tool for personalized skill development recommendations.
+
+    This tool analyzes the employee's profile and provides tailored skill recommendations,
+    learning resources, and training materials based on their job role and career goals.
+
+    Use this tool when the user wants to:
+    - Learn which skills they should develop for career growth
+    - Find specific learning resources for skill improvement
+    - Understand skill gaps in their current profile
+    - Find areas where they can improve their capabilities
+
+    Args:
+        query (str): Question about skill development or learning needs.
+
+    Returns:
+        str: Personalized skill recommendations with descriptions, learning outcomes, and resources.
+    """
+    try:
+        user = get_agent_user()
+        if user is None:
+            return run_skill_agent(query)
+        return run_skill_agent(query, user.email, user=user)
+    except Exception as e:
+        return f"Error in skill agent: {str(e)}. Unable to process skill development request."
+
+
+@tool
+def opportunity_agent_tool() -> str:
+    """Tool for finding improvement areas and suitable mentors.
+
+    This tool automatically accesses the employee's feedback data, identifies specific improvement areas,
+    and matches them with mentors who excel in those areas within the organization.
+
+    IMPORTANT: This tool provides specific improvement areas directly from the user's feedback data.
+    Use this tool when the user asks where they can improve or what areas need development.
+
+    Use this tool when the user wants to:
+    - Find specific areas where they can improve their performance based on their feedbacks
+    - Identify mentors who can help them improve in specific areas
+
+    Returns:
+        str: List of improvement areas and potential mentors with their expertise and matching reasons.
+    """
+    try:
+        user = get_agent_user()
+        if user is None:
+            return "User email required for mentor finding. Please provide user context."
+        mentors = find_mentors_for_improvements(user.email, current_user=user)
+        return str(mentors)
+    except Exception as e:
+        return f"Error in opportunity agent: {str(e)}. Unable to find mentors."
+
+
+@tool
+def summarise_feedback_tool(feedbacks: list) -> str:
+    """Tool for generating actionable insights and growth tips from feedback.
+
+    This tool analyzes feedback in depth and provides structured insights on strengths,
+    specific improvement suggestions, and practical growth tips the employee can implement.
+
+    Use this tool when:
+    - The user wants actionable advice based on their feedback
+    - The user needs specific strategies to leverage strengths or address weaknesses
+    - The user asks for practical ways to improve their performance
+
+    Args:
+        feedbacks (list): List of feedback statements as strings.
+
+    Returns:
+        str: Dictionary with 'strengths_insights', 'improvements_insights', and 'growth_tips'.
+    """
+    try:
+        if not isinstance(feedbacks, list) or not all(
+            isinstance(item, str) for item in feedbacks
+        ):
+            return "Error: 'feedbacks' must be a list of strings containing specific feedback statements."
+        insights = summarise_feedback_points(feedbacks)
+        return str(insights)
+    except Exception as e:
+        return f"Error in feedback summarization: {str(e)}. Unable to generate feedback insights."
+
+
+COORDINATOR_TOOLS = [
+    json_tool,
+    onboard_agent_tool,
+    skill_agent_tool,
+    opportunity_agent_tool,
+    summarise_feedback_tool,
+]
+
+class CoordinatorResponse(BaseModel):
+    message: str = Field(description="Primary response content: the essential, complete answer")
+    action_items: List[str] = Field(default_factory=list, description="Clear next steps (may be empty)")
+    resources: List[str] = Field(default_factory=list, description="Courses, tools, URLs or mentor emails (may be empty)")
+
+
+COORDINATOR_FINAL_ANSWER = final_answer_tool(
+    CoordinatorResponse,
+    "Give the final response to the employee. Call this last, on its own, once the other tools returned.",
+)
+
+# Used when the agent stopped (max iterations) before calling final_answer
+COORDINATOR_COMPILE_PROMPT = "You are the AI Ascent coordinator. Answer the employee's request from the information the tools returned: a complete message, clear next steps as action items, and courses/tools/URLs or mentor emails as resources. Do not invent data."
+
+
+def build_coordinator_agent_executor(streaming: bool = False):
+    """
+    Builds a new AgentExecutor for the coordinator.
+    With streaming the coordinator LLM streams its tokens to the run's callbacks.
+    """
+
+    llm = get_cordinator_streaming_LLM() if streaming else get_cordinator_LLM()
+    tools = COORDINATOR_TOOLS + [COORDINATOR_FINAL_ANSWER]
     prompt = ChatPromptTemplate.from_messages(
         [
             ("system", CORDINATOR_PROMPT),
@@ -201,13 +272,88 @@ def get_coordinator_agent_executor(user_email: str):
             ("placeholder", "{agent_scratchpad}"),
         ]
     )
-    agent = create_tool_calling_agent(llm, tools, prompt)
-    executor = AgentExecutor(agent=agent, tools=tools, verbose=True, max_iterations=8)
+    agent = create_structured_agent(llm, tools, prompt)
+    if not COORDINATOR_PARALLEL_TOOLS:
+        return StructuredAgentExecutor(agent=agent, tools=tools, verbose=True, max_iterations=8, return_intermediate_steps=True)
+
+    executor = ParallelToolAgentExecutor(
+        agent=agent,
+        tools=tools,
+        verbose=True,
+        max_iterations=8,
+        return_intermediate_steps=True,
+        max_parallel_tools=COORDINATOR_MAX_PARALLEL_TOOLS,
+        tool_timeout_seconds=COORDINATOR_TOOL_TIMEOUT_SECONDS,
+    )
 
     return executor
 
 
-def invoke_coordinator(user_input: str, user_email: str) -> str:
+def get_coordinator_agent_executor(streaming: bool = False):
+    """
+    This returns the coordinator AgentExecutor if initialized, otherwise builds and returns that.
+    The executor holds no user state, so one per process (and streaming mode) serves every request;
+    run it inside agent_user_context.
+    """
+
+    if streaming not in COORDINATOR_EXECUTORS:
+        COORDINATOR_EXECUTORS[streaming] = build_coordinator_agent_executor(streaming)
+
+    return COORDINATOR_EXECUTORS[streaming]
+
+
+def store_semantic_response(user, user_input: str, query_vector, response: dict, fingerprint: str):
+    """
+    Saves a coordinator answer to the semantic cache. Failures only cost the cache entry.
+    """
+    if query_vector is None:
+        return
+    try:
+        SemanticCacheEntry.store(
+            user, "coordinator", user_input, query_vector, response, fingerprint, COORDINATOR_SEMANTIC_CACHE_SECONDS
+        )
+    except Exception as e:
+        print(f"Could not store semantic cache entry for {user.email}: {str(e)}")
+
+
+class CoordinatorCacheLookup:
+    """
+    Result of looking up a coordinator query in the exact and semantic caches, with what is
+    needed to store the answer afterwards.
+    """
+
+    def __init__(self, user_input: str, user_email: str):
+        self.user_input = user_input
+        self.user = APIUser.objects.get(email=user_email)
+        self.fingerprint = profile_fingerprint(self.user)
+        self.cache_key = make_cache_key("coordinator_response", user_email, self.fingerprint, user_input)
+        self.query_vector = None
+        self.response = get_cached(self.cache_key)
+        if self.response:
+            return
+
+        # Paraphrases of an earlier question of the same user (with an unchanged profile) reuse its answer
+        if COORDINATOR_SEMANTIC_CACHE_ENABLED:
+            self.query_vector = SemanticCacheEntry.query_column().embed_query(normalize(user_input))
+            entry = SemanticCacheEntry.lookup(
+                self.user,
+                "coordinator",
+                self.query_vector,
+                COORDINATOR_SEMANTIC_CACHE_THRESHOLD,
+                self.fingerprint,
+                same_role=COORDINATOR_SEMANTIC_CACHE_SAME_ROLE,
+            )
+            record_lookup("coordinator_semantic", entry is not None)
+            if entry is not None:
+                cache.set(self.cache_key, entry.response, timeout=172800)
+                self.response = entry.response
+
+    def remember(self, response: dict):
+        cache.set(self.cache_key, response, timeout=172800)  # Cache for 2 days
+        store_semantic_response(self.user, self.user_input, self.query_vector, response, self.fingerprint)
+
+
+def invoke_coordinator(user_input: str, user_email: str, callbacks: list = None) -> dict:
     """
     Invokes the coordinator agent with user input and optional user email.
 
@@ -217,51 +363,55 @@ def invoke_coordinator(user_input: str, user_email: str) -> str:
     Args:
         user_input (str): The user's query or request.
         user_email (str): User's email for personalized features like mentor finding.
+        callbacks (list): Optional callback handlers for the agent run (tool events, streamed tokens).
 
     Returns:
-        str: The composed response from the coordinator agent in JSON format.
+        dict: The composed response from the coordinator agent (message, action_items, resources).
     """
-    cache_key = f"coordinator_response_{user_email}_{user_input}"
-    cached_response = cache.get(cache_key)
-    if cached_response:
-        return cached_response
+    lookup = CoordinatorCacheLookup(user_input, user_email)
+    if lookup.response:
+        return lookup.response
 
-    executor = get_coordinator_agent_executor(user_email)
-    result = executor.invoke({"input": user_input})
+    # Single-intent questions go straight to their sub-agent
+    routed = route_coordinator_query(user_input, lookup.user)
+    if routed:
+        lookup.remember(routed)
+        return routed
 
-    # Extract the JSON output from the text response
-    output_text: str = result["output"]
+    executor = get_coordinator_agent_executor(streaming=bool(callbacks))
+    def run():
+        result = executor.invoke({"input": user_input}, config={"callbacks": callbacks} if callbacks else None)
+        return agent_answer(result, CoordinatorResponse, get_cordinator_LLM(), COORDINATOR_COMPILE_PROMPT)
 
-    try:
-        json_str = output_text[output_text.find("{") : output_text.rfind("}") + 1]
-        json_obj = json.loads(json_str)
-        cache.set(cache_key, json_obj, timeout=172800)  # Cache for 2 days
-        return json_obj
-    except json.JSONDecodeError:
-        # If JSON is malformed, ask the LLM to fix it
-        fix_prompt = ChatPromptTemplate.from_messages(
-            [
-                (
-                    "system",
-                    """You are a JSON repair specialist. The following JSON string is malformed. 
-            Fix it to create valid JSON that follows this schema:
-            {{
-                "message": "string with main content",
-                "action_items": ["string item 1", "string item 2", ...],
-                "resources": ["string resource 1", "string resource 2", ...]
-            }}
-            
-            Return ONLY the fixed JSON with no additional text or explanations.""",
-                ),
-                ("human", json_str),
-            ]
-        )
+    with agent_user_context(user_email, lookup.user):
+        # A retry of the same run (agent_run) reuses the finished answer
+        response, _ = checkpointed("coordinator_output", user_email, user_input, run=run)
+
+    lookup.remember(response)
+    return response
+
+
+async def ainvoke_coordinator(user_input: str, user_email: str, callbacks: list = None) -> dict:
+    """
+    Async version of invoke_coordinator. The agent run and LLM calls are awaited; cache lookups
+    (ORM + embedding model) run in a worker thread.
+    """
+    lookup = await sync_to_async(CoordinatorCacheLookup)(user_input, user_email)
+    if lookup.response:
+        return lookup.response
+
+    routed = await aroute_coordinator_query(user_input, lookup.user)
+    if routed:
+        await sync_to_async(lookup.remember)(routed)
+        return routed
+
+    executor = get_coordinator_agent_executor(streaming=bool(callbacks))
+    async def run():
+        result = await executor.ainvoke({"input": user_input}, config={"callbacks": callbacks} if callbacks else None)
+        return await aagent_answer(result, CoordinatorResponse, get_cordinator_LLM(), COORDINATOR_COMPILE_PROMPT)
 
-        fix_chain = fix_prompt | get_cordinator_LLM()
-        fixed_result = fix_chain.invoke({"json_str": json_str})
-        fixed_json = fixed_result.content
+    with agent_user_context(user_email, lookup.user):
+        response, _ = await acheckpointed("coordinator_output", user_email, user_input, run=run)
 
-        fixed_json_str = fixed_json[fixed_json.find("{") : fixed_json.rfind("}") + 1]
-        final_json = json.loads(fixed_json_str)
-        cache.set(cache_key, final_json, timeout=172800)
-        return final_json
+    await sync_to_async(lookup.remember)(response)
+    return response
@@ -0,0 +1,195 @@
+"""
+Streaming runs of the coordinator agent.
+
+The agent runs in a background thread with a callback handler that turns LangChain callbacks into
+events on a queue, which the caller reads while the run is still going:
+- tool_start / tool_end / tool_error: a coordinator tool (sub-agent) started or finished
+- subagent_progress: a tool used inside a sub-agent started or finished
+- token: a piece of the coordinator's answer, as streamed by the coordinator LLM (the JSON arguments
+  of its final_answer call)
+- final: the parsed JSON answer (same as invoke_coordinator returns)
+- error: the run failed
+"""
+
+import asyncio
+import queue
+import threading
+from django.db import connections
+from langchain_core.callbacks import BaseCallbackHandler
+from agents.agents.cordinator import ainvoke_coordinator, invoke_coordinator
+from agents.agents.structured_output import FINAL_ANSWER_TOOL
+
+# Longest tool input / output sent in an event
+STREAM_PREVIEW_CHARS = 500
+
+
+class CoordinatorStreamHandler(BaseCallbackHandler):
+    """
+    Forwards the coordinator run's callbacks as (event, data) tuples to emit.
+    Runs are placed in the run tree by their parent_run_id, so tools and LLM calls nested
+    inside a sub-agent are reported as that sub-agent's progress.
+    """
+
+    # Called in the thread that produced the callback (keeps token order in async runs)
+    run_inline = True
+
+    def __init__(self, emit):
+        self.emit = emit
+        self.parents = {}
+        self.tool_names = {}
+        # (LLM run, tool call index) of final_answer calls being streamed
+        self.answer_calls = set()
+        self.lock = threading.Lock()
+
+    def _remember(self, run_id, parent_run_id):
+        with self.lock:
+            self.parents[run_id] = parent_run_id
+
+    def _tool_ancestors(self, run_id) -> list:
+        """
+        Tool runs above run_id, innermost first.
+        """
+        ancestors = []
+        with self.lock:
+            while run_id is not None:
+                if run_id in self.tool_names:
+                    ancestors.append(self.tool_names[run_id])
+                run_id = self.parents.get(run_id)
+        return ancestors
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, **kwargs):
+        self._remember(run_id, parent_run_id)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, **kwargs):
+        self._remember(run_id, parent_run_id)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, parent_run_id=None, **kwargs):
+        self._remember(run_id, parent_run_id)
+
+    def _answer_arguments(self, run_id, chunk) -> list:
+        """
+        Argument pieces of final_answer calls in a streamed chunk (the tool name only comes with a call's first piece).
+        """
+        pieces = []
+        for call in getattr(getattr(chunk, "message", None), "tool_call_chunks", None) or []:
+            key = (run_id, call.get("index"))
+            with self.lock:
+                if call.get("name") == FINAL_ANSWER_TOOL:
+                    self.answer_calls.add(key)
+                if key in self.answer_calls and call.get("args"):
+                    pieces.append(call["args"])
+        return pieces
+
+    def on_llm_new_token(self, token, *, run_id, parent_run_id=None, chunk=None, **kwargs):
+        # Only the coordinator's own LLM calls are streamed, not the sub-agents'
+        if self._tool_ancestors(run_id):
+            return
+        if token:
+            self.emit("token", {"text": token})
+        for text in self._answer_arguments(run_id, chunk):
+            self.emit("token", {"text": text})
+
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, **kwargs):
+        self._remember(run_id, parent_run_id)
+        name = (serialized or {}).get("name") or kwargs.get("name") or "tool"
+        ancestors = self._tool_ancestors(parent_run_id)
+        with self.lock:
+            self.tool_names[run_id] = name
+
+        if ancestors:
+            self.emit("subagent_progress", {"agent": ancestors[-1], "tool": name, "status": "start"})
+        elif name != FINAL_ANSWER_TOOL:
+            # The answer itself was already streamed as tokens and is sent as the final event
+            self.emit("tool_start", {"tool": name, "input": str(input_str)[:STREAM_PREVIEW_CHARS]})
+
+    def on_tool_end(self, output, *, run_id, parent_run_id=None, **kwargs):
+        ancestors = self._tool_ancestors(run_id)
+        if len(ancestors) > 1:
+            self.emit("subagent_progress", {"agent": ancestors[-1], "tool": ancestors[0], "status": "end"})
+        elif ancestors and ancestors[0] != FINAL_ANSWER_TOOL:
+            output = getattr(output, "content", output)
+            self.emit("tool_end", {"tool": ancestors[0], "output": str(output)[:STREAM_PREVIEW_CHARS]})
+
+    def on_tool_error(self, error, *, run_id, parent_run_id=None, **kwargs):
+        ancestors = self._tool_ancestors(run_id)
+        if len(ancestors) > 1:
+            self.emit("subagent_progress", {"agent": ancestors[-1], "tool": ancestors[0], "status": "error"})
+        elif ancestors:
+            self.emit("tool_error", {"tool": ancestors[0], "error": str(error)[:STREAM_PREVIEW_CHARS]})
+
+
+def stream_coordinator(user_input: str, user_email: str, heartbeat_seconds: float = 15.0):
+    """
+    Runs the coordinator in a background thread and yields (event, data) tuples as they happen.
+    Yields ("heartbeat", None) when nothing happened for heartbeat_seconds, so proxies keep the
+    connection open. The last event is always "final" or "error".
+    """
+    events = queue.Queue()
+    done = object()
+
+    def emit(event, data):
+        events.put((event, data))
+
+    def run():
+        try:
+            response = invoke_coordinator(user_input, user_email, callbacks=[CoordinatorStreamHandler(emit)])
+            emit("final", response)
+        except Exception as e:
+            print(f"Streaming coordinator run failed for {user_email}: {str(e)}")
+            emit("error", {"error": f"Failed to process query: {str(e)}"})
+        finally:
+            # The thread's connections are not managed by the request cycle
+            connections.close_all()
+            events.put(done)
+
+    threading.Thread(target=run, daemon=True).start()
+
+    while True:
+        try:
+            item = events.get(timeout=heartbeat_seconds)
+        except queue.Empty:
+            yield "heartbeat", None
+            continue
+        if item is done:
+            return
+        yield item
+
+
+async def astream_coordinator(user_input: str, user_email: str, heartbeat_seconds: float = 15.0):
+    """
+    Async version of stream_coordinator: the coordinator runs as a task on the event loop
+    (ainvoke_coordinator) and events are yielded as (event, data) tuples. The run is cancelled
+    if the consumer stops early (client disconnected).
+    """
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+    done = object()
+
+    def emit(event, data):
+        # Callbacks of sync tools fire in worker threads
+        loop.call_soon_threadsafe(events.put_nowait, (event, data))
+
+    async def run():
+        try:
+            response = await ainvoke_coordinator(user_input, user_email, callbacks=[CoordinatorStreamHandler(emit)])
+            emit("final", response)
+        except Exception as e:
+            print(f"Streaming coordinator run failed for {user_email}: {str(e)}")
+            emit("error", {"error": f"Failed to process query: {str(e)}"})
+        finally:
+            loop.call_soon_threadsafe(events.put_nowait, done)
+
+    task = asyncio.create_task(run())
+    try:
+        while True:
+            try:
+                item = await asyncio.wait_for(events.get(), timeout=heartbeat_seconds)
+            except asyncio.TimeoutError:
+                yield "heartbeat", None
+                continue
+            if item is done:
+                return
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
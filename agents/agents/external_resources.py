@@ -0,0 +1,74 @@
+"""
+Persistent store in front of the external (Tavily) search.
+
+Every search is stored with its query embedding and results (ExternalSearch / ExternalResource), so a
+near-duplicate query is answered from the table instead of the API. Resources returned at least
+EXTERNAL_RESOURCE_PROMOTE_AFTER times are promoted into SkillCatalog, after which the catalog
+searches find them without any external call.
+"""
+
+import os
+from typing import Dict, List
+from django.db.models import F
+from django.utils import timezone
+from agents.agents.cache_keys import normalize, record_lookup
+from agents.agents.tavily import tavily_search_results
+from db.models.external_resource import ExternalResource, ExternalSearch
+
+EXTERNAL_SEARCH_STORE_ENABLED = os.getenv("EXTERNAL_SEARCH_STORE_ENABLED", "true").lower() == "true"
+# A stored search answers a new query when their cosine similarity is at least this
+EXTERNAL_SEARCH_SIMILARITY = float(os.getenv("EXTERNAL_SEARCH_SIMILARITY", "0.9"))
+# Older searches are repeated, so results do not go stale
+EXTERNAL_SEARCH_MAX_AGE_DAYS = int(os.getenv("EXTERNAL_SEARCH_MAX_AGE_DAYS", "30"))
+EXTERNAL_RESOURCE_PROMOTION = os.getenv("EXTERNAL_RESOURCE_PROMOTION", "true").lower() == "true"
+EXTERNAL_RESOURCE_PROMOTE_AFTER = int(os.getenv("EXTERNAL_RESOURCE_PROMOTE_AFTER", "3"))
+# Catalog tags of a promoted resource: keywords of its title and content
+EXTERNAL_RESOURCE_MAX_TAGS = 5
+
+
+def record_returned(results: List[Dict]):
+    """
+    Counts the results as returned once more and promotes the resources that are returned often enough.
+    """
+    urls = [result["url"] for result in results if result.get("url")]
+    if not urls:
+        return
+    ExternalResource.objects.filter(url__in=urls).update(times_returned=F("times_returned") + 1, last_returned_at=timezone.now())
+
+    if not EXTERNAL_RESOURCE_PROMOTION:
+        return
+    promotable = ExternalResource.objects.filter(
+        url__in=urls, promoted_skill__isnull=True, times_returned__gte=EXTERNAL_RESOURCE_PROMOTE_AFTER
+    )
+    for resource in promotable:
+        try:
+            resource.promote(EXTERNAL_RESOURCE_MAX_TAGS)
+        except Exception as e:
+            print(f"Could not promote {resource.url} into the skill catalog: {str(e)}")
+
+
+def search_web(query: str, max_results: int = 2, search_depth: str = "basic") -> List[Dict]:
+    """
+    tavily_search_results() that answers near-duplicate queries from the stored searches and stores
+    every new search.
+    """
+    if not EXTERNAL_SEARCH_STORE_ENABLED:
+        return tavily_search_results(query, max_results=max_results, search_depth=search_depth)
+
+    query_vector = ExternalSearch.query_column().embed_query(normalize(query))
+    search = ExternalSearch.lookup(
+        query_vector, EXTERNAL_SEARCH_SIMILARITY, max_results, search_depth, EXTERNAL_SEARCH_MAX_AGE_DAYS
+    )
+    record_lookup("external_search", search is not None)
+    if search is not None:
+        results = search.results(max_results)
+    else:
+        results = tavily_search_results(query, max_results=max_results, search_depth=search_depth)
+        try:
+            ExternalSearch.store(query, query_vector, results, max_results, search_depth)
+        except Exception as e:
+            print(f"Could not store the external search for '{query}': {str(e)}")
+            return results
+
+    record_returned(results)
+    return results
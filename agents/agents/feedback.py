@@ -1,17 +1,29 @@
-import json
+import os
+import numpy as np
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableLambda
 from pydantic import BaseModel, Field
-from db.models.embeddings import sentiment_analysis
-from agents.agents.safety import filter_feedback_for_bias
+from agents.agents.feedback_classifier import classify_texts
+from django.utils import timezone
 from django.core.cache import cache
-from agents.agents.model_config import FEEDBACK_MODEL
+from agents.agents.cache_keys import get_cached, make_cache_key
+from agents.agents.model_config import FEEDBACK_FALLBACK_MODELS, FEEDBACK_MODEL
+from agents.agents.http_clients import llm_client_kwargs
+from agents.agents.resilient_llm import resilient_llm
 from db.models.kpi import KPI
+from db.models.feedback import Feedback
+from db.models.user import APIUser
+from db.models.vector_column import VectorColumn
 
 FEEDBACK_LLM = None
 INSIGHTS_LLM = None
 
+# Insights at least this similar (cosine) are treated as near-duplicates and merged
+INSIGHTS_SIMILARITY_THRESHOLD = float(os.getenv("INSIGHTS_SIMILARITY_THRESHOLD", "0.85"))
+# Upper bound on strengths / improvements kept per user; closest clusters are merged beyond it
+INSIGHTS_MAX_PER_USER = int(os.getenv("INSIGHTS_MAX_PER_USER", "15"))
+
 INSIGHTS_PROMPT = "Based on the following rough raw strengths and improvements, generate actionable insights for\
     strengths, improvements, and growth tips. Fill the structured fields accordingly."
 
@@ -25,31 +37,31 @@ def get_feedback_llm():
 
     global FEEDBACK_LLM
     if not FEEDBACK_LLM:
-        FEEDBACK_LLM = init_chat_model(model=FEEDBACK_MODEL, temperature=0.0)
+        FEEDBACK_LLM = resilient_llm(
+            init_chat_model(model=FEEDBACK_MODEL, temperature=0.0, **llm_client_kwargs(FEEDBACK_MODEL)),
+            FEEDBACK_MODEL,
+            FEEDBACK_FALLBACK_MODELS,
+            temperature=0.0,
+        )
 
     return FEEDBACK_LLM
 
 
 def classify_feedback(feedbacks: list, save_kpi: bool = False):
-    cache_key = f"classify_feedback_{hash(tuple(feedbacks))}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("classify_feedback", list(feedbacks))
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
-    classified_feedbacks = filter_feedback_for_bias(feedbacks)
+    verdicts = classify_texts(list(feedbacks))
     if save_kpi:
-        kpi = KPI.create_or_get_current_month()
-        kpi.flagged_feedbacks_count += len(classified_feedbacks["flagged_feedback"])
-        kpi.save()
+        KPI.increment(flagged_feedbacks_count=sum(flagged for flagged, _ in verdicts))
 
-    cleaned_feedbacks = classified_feedbacks["safe_feedback"]
     classified = {"strengths": [], "improvements": []}
-
-    for text in cleaned_feedbacks:
-        result = sentiment_analysis(text)
-        data = result[0]
-
-        if data["label"] == "positive":
+    for text, (flagged, sentiment) in zip(feedbacks, verdicts):
+        if flagged:
+            continue
+        if sentiment == "positive":
             classified["strengths"].append(text)
         else:
             classified["improvements"].append(text)
@@ -58,6 +70,34 @@ def classify_feedback(feedbacks: list, save_kpi: bool = False):
     return classified
 
 
+def classify_user_feedback(user, save_kpi: bool = False, ids: list = None) -> dict:
+    """
+    Classifies the user's not yet classified Feedback rows (bias filter + sentiment) and stores the
+    verdict on each row, so every item goes through the models once. Returns the strengths /
+    improvements of the user's feedback (only of the given feedback ids if any) from the stored verdicts.
+    """
+    pending = list(Feedback.objects.filter(user=user, classified_at__isnull=True).order_by("id").values_list("id", "text"))
+    if pending:
+        verdicts = {}
+        for (feedback_id, _), verdict in zip(pending, classify_texts([text for _, text in pending])):
+            verdicts.setdefault(verdict, []).append(feedback_id)
+
+        # Only rows still unclassified are updated, so concurrent runs neither overwrite each other nor double count
+        classified_at = timezone.now()
+        newly_flagged = 0
+        for (flagged, sentiment), feedback_ids in verdicts.items():
+            updated = Feedback.objects.filter(id__in=feedback_ids, classified_at__isnull=True).update(
+                is_flagged=flagged, sentiment=sentiment, classified_at=classified_at
+            )
+            if flagged:
+                newly_flagged += updated
+
+        if save_kpi and newly_flagged:
+            KPI.increment(flagged_feedbacks_count=newly_flagged)
+
+    return Feedback.classified(user, ids=ids)
+
+
 class FeedbackInsights(BaseModel):
     strengths_insights: list[str] = Field(
         description="Actionable insights based on strengths"
@@ -81,8 +121,8 @@ def get_structured_insights_llm():
 
 
 def generate_insights(classified: dict) -> dict:
-    cache_key = f"generate_insights_{hash(json.dumps(classified, sort_keys=True))}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("generate_insights", classified)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -101,3 +141,70 @@ def generate_insights(classified: dict) -> dict:
 def summarise_feedback_points(feedbacks: list):
     pipe = RunnableLambda(classify_feedback) | RunnableLambda(generate_insights)
     return pipe.invoke(feedbacks)
+
+
+def consolidate_insights(
+    insights: list,
+    threshold: float = INSIGHTS_SIMILARITY_THRESHOLD,
+    cap: int = INSIGHTS_MAX_PER_USER,
+) -> list:
+    """
+    Clusters insights by embedding similarity and keeps one canonical insight per cluster
+    (the member closest to the cluster centroid). Clusters are built greedily against their
+    centroids, then the two closest clusters are merged until at most `cap` remain.
+
+    Args:
+        insights: strengths or improvements of a user, oldest first
+        threshold: cosine similarity above which two insights count as near-duplicates
+        cap: maximum number of insights to keep
+
+    Returns:
+        The canonical insights, in the order their clusters first appeared.
+    """
+    seen = set()
+    texts = []
+    for text in insights:
+        key = " ".join(text.split()).lower() if isinstance(text, str) else None
+        if key and key not in seen:
+            seen.add(key)
+            texts.append(text)
+    if len(texts) <= 1:
+        return texts
+
+    # Same model as the strengths vectors that mentor matching compares improvements against
+    vectors = np.array(VectorColumn.for_field(APIUser, "strengths_vector").embed_documents(texts), dtype=np.float32)
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    vectors = vectors / np.where(norms == 0, 1, norms)
+
+    clusters = []  # list of dict: {centroid: np.array, members: list of indexes}
+    for idx, vec in enumerate(vectors):
+        sims = [float(np.dot(vec, cl["centroid"]) / (np.linalg.norm(cl["centroid"]) or 1)) for cl in clusters]
+        best = int(np.argmax(sims)) if sims else -1
+        if best >= 0 and sims[best] >= threshold:
+            cl = clusters[best]
+            cl["members"].append(idx)
+            cl["centroid"] = vectors[cl["members"]].mean(axis=0)
+        else:
+            clusters.append({"centroid": vec.copy(), "members": [idx]})
+
+    while len(clusters) > max(cap, 1):
+        best_pair, best_sim = None, -2.0
+        for i in range(len(clusters)):
+            for j in range(i + 1, len(clusters)):
+                a, b = clusters[i]["centroid"], clusters[j]["centroid"]
+                sim = float(np.dot(a, b) / ((np.linalg.norm(a) * np.linalg.norm(b)) or 1))
+                if sim > best_sim:
+                    best_pair, best_sim = (i, j), sim
+        i, j = best_pair
+        clusters[i]["members"].extend(clusters[j]["members"])
+        clusters[i]["centroid"] = vectors[clusters[i]["members"]].mean(axis=0)
+        del clusters[j]
+
+    clusters.sort(key=lambda cl: min(cl["members"]))
+    canonical = []
+    for cl in clusters:
+        members = cl["members"]
+        best_member = max(members, key=lambda m: float(np.dot(vectors[m], cl["centroid"])))
+        canonical.append(texts[best_member])
+    return canonical
+
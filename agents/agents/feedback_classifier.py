@@ -0,0 +1,110 @@
+"""
+Batched bias + sentiment classification of feedback texts.
+
+Both classifiers run over the whole list in batches instead of one forward pass per text:
+- batched mode: the hate speech pipeline runs over all texts, then the sentiment pipeline over the ones that passed
+- fused mode: both models are RoBERTa-base fine-tunes sharing one BPE vocabulary, so the texts are tokenized once,
+  sorted by length into buckets (less padding) and every bucket goes through both models
+"""
+
+import os
+import torch
+from agents.agents.safety import get_hate_speech_classifier
+from db.models.embeddings import sentiment_analysis
+
+FEEDBACK_CLASSIFIER_BATCH_SIZE = int(os.getenv("FEEDBACK_CLASSIFIER_BATCH_SIZE", "32"))
+FEEDBACK_CLASSIFIER_FUSED = os.getenv("FEEDBACK_CLASSIFIER_FUSED", "false").lower() == "true"
+FEEDBACK_CLASSIFIER_MAX_LENGTH = 512
+
+SHARED_TOKENIZER = None
+
+
+def get_shared_tokenizer():
+    """
+    Returns the tokenizer of the hate speech model if the sentiment model uses the exact same vocabulary
+    (checked once), otherwise None and the fused mode falls back to batched mode.
+    """
+    global SHARED_TOKENIZER
+    if SHARED_TOKENIZER is None:
+        hate_tokenizer = get_hate_speech_classifier().tokenizer
+        if hate_tokenizer.get_vocab() == sentiment_analysis.tokenizer.get_vocab():
+            SHARED_TOKENIZER = hate_tokenizer
+        else:
+            print("Feedback classifiers do not share a vocabulary, fused mode falls back to batched mode")
+            SHARED_TOKENIZER = False
+    return SHARED_TOKENIZER or None
+
+
+def classify_texts_batched(texts: list, batch_size: int = FEEDBACK_CLASSIFIER_BATCH_SIZE) -> list:
+    """
+    Returns (is_flagged, sentiment) per text, running each pipeline once over the whole list.
+    Flagged texts are not sent to the sentiment model (their sentiment is None).
+    """
+    if not texts:
+        return []
+
+    hate_results = get_hate_speech_classifier()(texts, batch_size=batch_size, truncation=True)
+    flags = [result["label"] == "hate" for result in hate_results]
+
+    safe_indexes = [idx for idx, flagged in enumerate(flags) if not flagged]
+    sentiments = [None] * len(texts)
+    if safe_indexes:
+        sentiment_results = sentiment_analysis([texts[idx] for idx in safe_indexes], batch_size=batch_size, truncation=True)
+        for idx, result in zip(safe_indexes, sentiment_results):
+            sentiments[idx] = result["label"]
+
+    return list(zip(flags, sentiments))
+
+
+def classify_texts_fused(texts: list, batch_size: int = FEEDBACK_CLASSIFIER_BATCH_SIZE) -> list:
+    """
+    Same result as classify_texts_batched, but the texts are tokenized once and both models run over the
+    same length-sorted buckets.
+    """
+    if not texts:
+        return []
+
+    tokenizer = get_shared_tokenizer()
+    if tokenizer is None:
+        return classify_texts_batched(texts, batch_size)
+
+    hate_model = get_hate_speech_classifier().model
+    sentiment_model = sentiment_analysis.model
+    hate_labels = hate_model.config.id2label
+    sentiment_labels = sentiment_model.config.id2label
+
+    input_ids = tokenizer(texts, truncation=True, max_length=FEEDBACK_CLASSIFIER_MAX_LENGTH)["input_ids"]
+    order = sorted(range(len(texts)), key=lambda idx: len(input_ids[idx]))
+    verdicts = [None] * len(texts)
+
+    with torch.inference_mode():
+        for start in range(0, len(order), batch_size):
+            bucket = order[start : start + batch_size]
+            batch = tokenizer.pad({"input_ids": [input_ids[idx] for idx in bucket]}, return_tensors="pt")
+
+            hate_logits = hate_model(**batch.to(hate_model.device)).logits
+            flags = [hate_labels[label_id] == "hate" for label_id in hate_logits.argmax(dim=-1).tolist()]
+
+            sentiments = [None] * len(bucket)
+            safe_rows = [row for row, flagged in enumerate(flags) if not flagged]
+            if safe_rows:
+                rows = torch.tensor(safe_rows)
+                sentiment_batch = {key: value[rows] for key, value in batch.items()}
+                sentiment_batch = {key: value.to(sentiment_model.device) for key, value in sentiment_batch.items()}
+                sentiment_logits = sentiment_model(**sentiment_batch).logits
+                for row, label_id in zip(safe_rows, sentiment_logits.argmax(dim=-1).tolist()):
+                    sentiments[row] = sentiment_labels[label_id]
+
+            for row, idx in enumerate(bucket):
+                verdicts[idx] = (flags[row], sentiments[row])
+
+    return verdicts
+
+
+def classify_texts(texts: list, batch_size: int = FEEDBACK_CLASSIFIER_BATCH_SIZE, fused: bool = FEEDBACK_CLASSIFIER_FUSED) -> list:
+    """
+    Returns (is_flagged, sentiment) per feedback text, in input order.
+    """
+    if fused:
+        return classify_texts_fused(texts, batch_size)
+    return classify_texts_batched(texts, batch_size)
@@ -0,0 +1,192 @@
+"""
+Process-wide HTTP clients for the LLM provider and web search.
+
+Every LLM and search client of a worker shares one keep-alive pool per host instead of each SDK
+opening its own connections, so calls from all agents and threads reuse warm (TLS) connections.
+Pools are sized for the worker's concurrency, use HTTP/2 when the h2 package is installed, and
+each host has its own timeouts. Connection reuse is counted per host (see get_http_stats). Chat
+requests to the LLM provider are scheduled against its rate limits (see llm_scheduler).
+"""
+
+import os
+import threading
+import httpx
+from agents.agents.llm_scheduler import LLM_SCHEDULER_ENABLED, AsyncSchedulingTransport, SchedulingTransport
+
+# Concurrent requests a worker serves (gunicorn --threads) ...
+HTTP_WORKER_THREADS = int(os.getenv("HTTP_WORKER_THREADS", "2"))
+# ... times the outbound calls one request can have in flight (parallel tools, concurrent mentor selection)
+HTTP_CALLS_PER_REQUEST = int(os.getenv("HTTP_CALLS_PER_REQUEST", "4"))
+HTTP_POOL_SIZE = int(os.getenv("HTTP_POOL_SIZE", str(HTTP_WORKER_THREADS * HTTP_CALLS_PER_REQUEST)))
+HTTP_KEEPALIVE_SECONDS = float(os.getenv("HTTP_KEEPALIVE_SECONDS", "60"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "true").lower() == "true"
+
+GROQ_HOST = "api.groq.com"
+TAVILY_HOST = "api.tavily.com"
+
+# Per host timeouts (seconds); LLM responses can take long to generate, searches should not
+HTTP_TIMEOUTS = {
+    GROQ_HOST: httpx.Timeout(
+        connect=float(os.getenv("GROQ_CONNECT_TIMEOUT_SECONDS", "5")),
+        read=float(os.getenv("GROQ_READ_TIMEOUT_SECONDS", "120")),
+        write=30.0,
+        pool=30.0,
+    ),
+    TAVILY_HOST: httpx.Timeout(
+        connect=float(os.getenv("TAVILY_CONNECT_TIMEOUT_SECONDS", "5")),
+        read=float(os.getenv("TAVILY_READ_TIMEOUT_SECONDS", "20")),
+        write=10.0,
+        pool=30.0,
+    ),
+}
+DEFAULT_HTTP_TIMEOUT = httpx.Timeout(30.0, connect=5.0)
+
+_HTTP_CLIENTS = {}
+_HTTP_CLIENTS_PID = None
+_HTTP_CLIENTS_LOCK = threading.Lock()
+
+_HTTP_STATS = {}
+_HTTP_STATS_LOCK = threading.Lock()
+
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def _count(host: str, **counts):
+    with _HTTP_STATS_LOCK:
+        stats = _HTTP_STATS.setdefault(
+            host, {"requests": 0, "new_connections": 0, "tls_handshakes": 0, "http2_responses": 0}
+        )
+        for name, amount in counts.items():
+            stats[name] += amount
+
+
+def _trace_event(host: str, event_name: str):
+    # httpcore only connects (and shakes hands) when no pooled connection can be reused
+    if event_name.endswith("connect_tcp.complete"):
+        _count(host, new_connections=1)
+    elif event_name.endswith("start_tls.complete"):
+        _count(host, tls_handshakes=1)
+
+
+def _sync_hooks(host: str) -> dict:
+    def trace(event_name, info):
+        _trace_event(host, event_name)
+
+    def on_request(request):
+        _count(host, requests=1)
+        request.extensions["trace"] = trace
+
+    def on_response(response):
+        if response.http_version == "HTTP/2":
+            _count(host, http2_responses=1)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def _async_hooks(host: str) -> dict:
+    async def trace(event_name, info):
+        _trace_event(host, event_name)
+
+    async def on_request(request):
+        _count(host, requests=1)
+        request.extensions["trace"] = trace
+
+    async def on_response(response):
+        if response.http_version == "HTTP/2":
+            _count(host, http2_responses=1)
+
+    return {"request": [on_request], "response": [on_response]}
+
+
+def _transport(host: str, is_async: bool):
+    options = {
+        "http2": _http2_available(),
+        "limits": httpx.Limits(
+            max_connections=HTTP_POOL_SIZE,
+            max_keepalive_connections=HTTP_POOL_SIZE,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS,
+        ),
+    }
+    if is_async:
+        transport = httpx.AsyncHTTPTransport(**options)
+        return AsyncSchedulingTransport(transport) if host == GROQ_HOST and LLM_SCHEDULER_ENABLED else transport
+    transport = httpx.HTTPTransport(**options)
+    return SchedulingTransport(transport) if host == GROQ_HOST and LLM_SCHEDULER_ENABLED else transport
+
+
+def _get_client(host: str, is_async: bool):
+    global _HTTP_CLIENTS_PID
+    with _HTTP_CLIENTS_LOCK:
+        # Connections must not be shared with a forked process (gunicorn --preload)
+        if _HTTP_CLIENTS_PID != os.getpid():
+            _HTTP_CLIENTS.clear()
+            _HTTP_CLIENTS_PID = os.getpid()
+
+        key = (host, is_async)
+        if key not in _HTTP_CLIENTS:
+            if is_async:
+                _HTTP_CLIENTS[key] = httpx.AsyncClient(
+                    transport=_transport(host, is_async), timeout=get_http_timeout(host), event_hooks=_async_hooks(host)
+                )
+            else:
+                _HTTP_CLIENTS[key] = httpx.Client(
+                    transport=_transport(host, is_async), timeout=get_http_timeout(host), event_hooks=_sync_hooks(host)
+                )
+        return _HTTP_CLIENTS[key]
+
+
+def get_http_timeout(host: str) -> httpx.Timeout:
+    return HTTP_TIMEOUTS.get(host, DEFAULT_HTTP_TIMEOUT)
+
+
+def get_http_client(host: str) -> httpx.Client:
+    """
+    The shared client for calls to host from any thread of this process.
+    """
+    return _get_client(host, is_async=False)
+
+
+def get_async_http_client(host: str) -> httpx.AsyncClient:
+    """
+    The shared async client for calls to host (used from the worker's event loop under ASGI).
+    """
+    return _get_client(host, is_async=True)
+
+
+def groq_client_kwargs() -> dict:
+    """
+    Keyword arguments for ChatGroq / init_chat_model("groq:...") so the model uses the shared pools.
+    """
+    return {
+        "http_client": get_http_client(GROQ_HOST),
+        "http_async_client": get_async_http_client(GROQ_HOST),
+        "timeout": get_http_timeout(GROQ_HOST),
+    }
+
+
+def llm_client_kwargs(model: str) -> dict:
+    """
+    groq_client_kwargs() for "groq:..." models given to init_chat_model, nothing for other providers.
+    """
+    return groq_client_kwargs() if model.startswith("groq:") else {}
+
+
+def get_http_stats() -> dict:
+    """
+    Requests, new connections and TLS handshakes per host in this process. reuse_rate is the share of
+    requests that were sent over an already open connection.
+    """
+    with _HTTP_STATS_LOCK:
+        stats = {host: dict(counts) for host, counts in _HTTP_STATS.items()}
+    for counts in stats.values():
+        requests = counts["requests"]
+        counts["reuse_rate"] = round(max(requests - counts["new_connections"], 0) / requests, 4) if requests else None
+    return {"pool_size": HTTP_POOL_SIZE, "http2": _http2_available(), "hosts": stats}
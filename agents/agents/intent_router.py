@@ -0,0 +1,255 @@
+"""
+Local intent router in front of the coordinator agent.
+
+Most coordinator questions need exactly one sub-agent. The query embedding is compared with the
+centroids of labeled example queries per intent; when one intent clearly wins, its sub-agent is called
+directly and the result is shaped into the coordinator's response format, which saves the coordinator
+LLM's routing and restating round trips. Everything else goes to the full agent.
+"""
+
+import os
+import threading
+import numpy as np
+from asgiref.sync import sync_to_async
+from db.models.embeddings import get_embeddings
+from agents.agents.onboard_plans import aonboard_plan_for, onboard_plan_for
+from agents.agents.skill import arun_skill_agent, run_skill_agent
+from agents.agents.opportunity import afind_mentors_for_improvements, find_mentors_for_improvements
+from agents.agents.feedback import classify_user_feedback, generate_insights
+
+INTENT_ROUTER_ENABLED = os.getenv("INTENT_ROUTER_ENABLED", "true").lower() == "true"
+# Cosine similarity the best intent's centroid must reach ...
+INTENT_ROUTER_THRESHOLD = float(os.getenv("INTENT_ROUTER_THRESHOLD", "0.55"))
+# ... and by how much it must beat the second best (otherwise the query may need several sub-agents)
+INTENT_ROUTER_MARGIN = float(os.getenv("INTENT_ROUTER_MARGIN", "0.08"))
+
+INTENT_EXEMPLARS = {
+    "onboarding": [
+        "What are my responsibilities in my role?",
+        "Show me my onboarding checklist",
+        "What should I do in my first weeks on the job?",
+        "What is expected of me as a new hire in this position?",
+        "Which onboarding resources are there for my job?",
+        "Explain my job role and its expectations",
+        "How do I get started in my new position?",
+        "What does the career path for my position look like?",
+    ],
+    "skills": [
+        "Which skills should I learn next?",
+        "Recommend courses to improve my skills",
+        "What should I study to grow in my career?",
+        "Suggest learning resources for my role",
+        "What skills am I missing for a promotion?",
+        "Find tutorials to get better at my job",
+        "Which technologies should I learn this year?",
+        "How can I upskill for my position?",
+    ],
+    "mentors": [
+        "Find me a mentor",
+        "Who can help me improve my weaknesses?",
+        "Which colleagues could mentor me?",
+        "Suggest mentors for my improvement areas",
+        "Who in the company is good at the things I struggle with?",
+        "Connect me with someone who can coach me",
+        "I need a mentor to help me grow",
+        "Who should I ask for help with my development areas?",
+    ],
+    "feedback": [
+        "Summarize my feedback",
+        "What do my colleagues say about me?",
+        "What are my strengths and weaknesses according to my feedback?",
+        "Give me insights from the feedback I received",
+        "How am I doing based on my reviews?",
+        "What does my feedback say I should improve?",
+        "Analyze the feedback I got",
+        "Give me growth tips based on my feedback",
+    ],
+}
+
+INTENT_CENTROIDS = None
+
+_ROUTER_STATS = {"routed": {intent: 0 for intent in INTENT_EXEMPLARS}, "fallback": 0, "failed": 0}
+_ROUTER_STATS_LOCK = threading.Lock()
+
+
+def get_intent_centroids():
+    """
+    This returns the (intents, normalized centroid matrix) if initialized, otherwise embeds the exemplars and returns that.
+    """
+    global INTENT_CENTROIDS
+    if INTENT_CENTROIDS is None:
+        embeddings = get_embeddings()
+        intents = list(INTENT_EXEMPLARS)
+        centroids = []
+        for intent in intents:
+            vectors = _unit(np.array(embeddings.embed_documents(INTENT_EXEMPLARS[intent]), dtype=np.float32))
+            centroids.append(vectors.mean(axis=0))
+        INTENT_CENTROIDS = (intents, _unit(np.array(centroids)))
+    return INTENT_CENTROIDS
+
+
+def _unit(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def classify_intent(query: str):
+    """
+    Returns the intent the query clearly belongs to, or None if no intent is confident enough or the
+    best two are too close.
+    """
+    intents, centroids = get_intent_centroids()
+    query_vector = _unit(np.array(get_embeddings().embed_query(query), dtype=np.float32))
+    scores = centroids @ query_vector
+    order = np.argsort(scores)[::-1]
+    best, second = scores[order[0]], scores[order[1]]
+    if best < INTENT_ROUTER_THRESHOLD or best - second < INTENT_ROUTER_MARGIN:
+        return None
+    return intents[order[0]]
+
+
+def _record(intent: str = None, failed: bool = False):
+    with _ROUTER_STATS_LOCK:
+        if failed:
+            _ROUTER_STATS["failed"] += 1
+        elif intent:
+            _ROUTER_STATS["routed"][intent] += 1
+        else:
+            _ROUTER_STATS["fallback"] += 1
+
+
+def get_router_stats() -> dict:
+    """
+    Fast path counters of this process. Failed fast paths were answered by the full agent.
+    """
+    with _ROUTER_STATS_LOCK:
+        routed = dict(_ROUTER_STATS["routed"])
+        fallback = _ROUTER_STATS["fallback"]
+        failed = _ROUTER_STATS["failed"]
+    total = sum(routed.values()) + fallback
+    return {
+        "routed": routed,
+        "fallback": fallback,
+        "failed": failed,
+        "hit_rate": round((sum(routed.values()) - failed) / total, 4) if total else None,
+    }
+
+
+def _as_text(item) -> str:
+    if isinstance(item, dict):
+        title = item.get("title") or item.get("name") or ""
+        url = item.get("url") or item.get("link") or ""
+        return f"{title}: {url}" if title and url else str(title or url or item)
+    return str(item)
+
+
+def shape_response(intent: str, result) -> dict:
+    """
+    Turns a sub-agent's result into the coordinator response format (message, action_items, resources).
+    """
+    if intent == "onboarding":
+        return {
+            "message": result.get("explanation", ""),
+            "action_items": [_as_text(item) for item in result.get("checklist") or []],
+            "resources": [_as_text(item) for item in result.get("resources") or []],
+        }
+
+    if intent == "skills":
+        skills = result.get("skills") or []
+        return {
+            "message": result.get("explanation", ""),
+            "action_items": [f"Learn {skill.get('title')}: {skill.get('description', '')}".strip() for skill in skills],
+            "resources": [_as_text(resource) for skill in skills for resource in skill.get("resources") or []],
+        }
+
+    if intent == "mentors":
+        if not result:
+            return {
+                "message": "There are no improvement areas in your feedback yet, so there is nothing to match mentors to.",
+                "action_items": [],
+                "resources": [],
+            }
+        action_items = []
+        for mentor in result:
+            if mentor.get("email"):
+                action_items.append(f"Reach out to {mentor['email']} ({mentor.get('job_title')}) for help with: {mentor.get('can_help_with')}. {mentor.get('llm_reason', '')}".strip())
+            else:
+                action_items.append(f"No strong mentor found yet for: {mentor.get('can_help_with')}")
+        return {
+            "message": "These colleagues are strong in the areas your feedback says you can improve.",
+            "action_items": action_items,
+            "resources": [mentor["email"] for mentor in result if mentor.get("email")],
+        }
+
+    # feedback
+    strengths = result.get("strengths_insights") or []
+    improvements = result.get("improvements_insights") or []
+    message = "Strengths: " + ("; ".join(strengths) or "none yet") + ". Areas to improve: " + ("; ".join(improvements) or "none yet") + "."
+    return {
+        "message": message,
+        "action_items": result.get("growth_tips") or [],
+        "resources": [],
+    }
+
+
+def run_intent(intent: str, query: str, user):
+    if intent == "onboarding":
+        # The role's precomputed plan, as /api/onboard/get/ serves it (the agent without a job title)
+        return onboard_plan_for(user.job_title, user.specialization, query, user.onboard_supp_hr_query)
+    if intent == "skills":
+        return run_skill_agent(query, user.email, user=user)
+    if intent == "mentors":
+        return find_mentors_for_improvements(user.email, current_user=user)
+    # Same as summarise_feedback_points over the user's feedback, reusing the stored classifications
+    return generate_insights(classify_user_feedback(user))
+
+
+async def arun_intent(intent: str, query: str, user):
+    if intent == "onboarding":
+        return await aonboard_plan_for(user.job_title, user.specialization, query, user.onboard_supp_hr_query)
+    if intent == "skills":
+        return await arun_skill_agent(query, user.email, user=user)
+    if intent == "mentors":
+        return await afind_mentors_for_improvements(user.email, current_user=user)
+    return await sync_to_async(lambda: generate_insights(classify_user_feedback(user)))()
+
+
+def route_coordinator_query(query: str, user):
+    """
+    Answers the query with a single sub-agent if its intent is clear, otherwise returns None
+    (the caller runs the full coordinator agent).
+    """
+    if not INTENT_ROUTER_ENABLED:
+        return None
+
+    intent = classify_intent(query)
+    _record(intent)
+    if intent is None:
+        return None
+
+    try:
+        return shape_response(intent, run_intent(intent, query, user))
+    except Exception as e:
+        print(f"Intent fast path ({intent}) failed, falling back to the coordinator: {str(e)}")
+        _record(failed=True)
+        return None
+
+
+async def aroute_coordinator_query(query: str, user):
+    """
+    Async version of route_coordinator_query.
+    """
+    if not INTENT_ROUTER_ENABLED:
+        return None
+
+    intent = await sync_to_async(classify_intent, thread_sensitive=False)(query)
+    _record(intent)
+    if intent is None:
+        return None
+
+    try:
+        return shape_response(intent, await arun_intent(intent, query, user))
+    except Exception as e:
+        print(f"Intent fast path ({intent}) failed, falling back to the coordinator: {str(e)}")
+        _record(failed=True)
+        return None
@@ -0,0 +1,503 @@
+"""
+Client-side scheduler for the LLM provider's rate limits.
+
+Every Groq chat request goes through a transport of the shared HTTP pool (see http_clients) that
+takes it from a per model queue: a request is sent once the model's request and token buckets
+(this process's share of LLM_RATE_LIMITS, see model_config, and the account's remaining tokens
+reported by the provider's x-ratelimit headers) have room for it, interactive requests ahead of
+background ones (jobs). A request that cannot be sent before its priority's deadline fails at once
+with a 429 instead of piling onto the provider, and a 429 from the provider pauses the whole model
+for its retry-after before the request is retried. Responses the scheduler gives up on carry
+x-should-retry: false, so the SDK does not retry them on top. The time a call spent queued is
+recorded on its LLMCallClock, so latency budgets (resilient_llm) only count the time after sending.
+"""
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+import httpx
+from agents.agents.model_config import rate_limits_for
+
+LLM_SCHEDULER_ENABLED = os.getenv("LLM_SCHEDULER_ENABLED", "true").lower() == "true"
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+# Lower rank is served first
+PRIORITY_RANKS = {INTERACTIVE: 0, BACKGROUND: 1}
+
+# Longest a request waits for its turn (queue plus 429 pauses) before it fails
+LLM_QUEUE_DEADLINES = {
+    INTERACTIVE: float(os.getenv("LLM_QUEUE_DEADLINE_INTERACTIVE_SECONDS", "30")),
+    BACKGROUND: float(os.getenv("LLM_QUEUE_DEADLINE_BACKGROUND_SECONDS", "300")),
+}
+# Provider 429s a request is retried after
+LLM_SCHEDULER_MAX_RETRIES = int(os.getenv("LLM_SCHEDULER_MAX_RETRIES", "3"))
+# First pause after a 429 without retry-after, doubled per retry
+LLM_SCHEDULER_BACKOFF_SECONDS = float(os.getenv("LLM_SCHEDULER_BACKOFF_SECONDS", "2"))
+# Completion tokens reserved for a request that sets no max_tokens
+LLM_SCHEDULER_COMPLETION_TOKENS = int(os.getenv("LLM_SCHEDULER_COMPLETION_TOKENS", "512"))
+
+# How often a request behind others in the queue checks for its turn
+_POLL_SECONDS = 0.05
+_CHARS_PER_TOKEN = 4
+
+_LLM_PRIORITY = contextvars.ContextVar("llm_priority", default=INTERACTIVE)
+_LLM_CALL_CLOCK = contextvars.ContextVar("llm_call_clock", default=None)
+
+_QUEUES = {}
+_LOCK = threading.Lock()
+_SEQUENCE = itertools.count()
+
+
+@contextmanager
+def llm_priority(priority: str):
+    """
+    Schedules the LLM calls of the enclosed code (and of the threads and tasks it starts) with this priority.
+    """
+    token = _LLM_PRIORITY.set(priority if priority in PRIORITY_RANKS else INTERACTIVE)
+    try:
+        yield
+    finally:
+        _LLM_PRIORITY.reset(token)
+
+
+class LLMCallClock:
+    """
+    Time of one LLM call with the time its requests spent queued in the scheduler taken out, so the
+    latency of a call is measured from the moment its request was sent.
+    """
+
+    def __init__(self):
+        self.started = None
+        self.waited = 0.0
+        self.waiting_since = None
+
+    def start(self):
+        self.started = time.monotonic()
+
+    @property
+    def queued(self) -> bool:
+        return self.waiting_since is not None
+
+    def wait_started(self):
+        self.waiting_since = time.monotonic()
+
+    def wait_ended(self):
+        if self.waiting_since is not None:
+            self.waited += time.monotonic() - self.waiting_since
+            self.waiting_since = None
+
+    def service_seconds(self) -> float:
+        """
+        Seconds since the call started, not counting the time spent queued (0 before it started).
+        """
+        if self.started is None:
+            return 0.0
+        now = time.monotonic()
+        queued = now - self.waiting_since if self.waiting_since is not None else 0.0
+        return max(now - self.started - self.waited - queued, 0.0)
+
+
+@contextmanager
+def llm_call_clock(clock: LLMCallClock):
+    """
+    Records the queue waits of the LLM requests made by the enclosed code on clock.
+    """
+    token = _LLM_CALL_CLOCK.set(clock)
+    try:
+        yield clock
+    finally:
+        _LLM_CALL_CLOCK.reset(token)
+
+
+@contextmanager
+def _waiting_in_queue():
+    clock = _LLM_CALL_CLOCK.get()
+    if clock is not None:
+        clock.wait_started()
+    try:
+        yield
+    finally:
+        if clock is not None:
+            clock.wait_ended()
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """
+    True for an LLM call that failed with a 429 (from the provider or the scheduler); retrying it
+    right away only queues it again.
+    """
+    return getattr(error, "status_code", None) == 429
+
+
+class _Bucket:
+    """
+    Token bucket holding up to a minute's limit, refilled continuously.
+    """
+
+    def __init__(self, per_minute: int):
+        self.capacity = float(per_minute)
+        self.level = float(per_minute)
+        self.updated = time.monotonic()
+
+    def refill(self, now: float):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.capacity / 60)
+        self.updated = now
+
+    def wait_for(self, amount: float) -> float:
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) * 60 / self.capacity
+
+    def resize(self, per_minute: int):
+        self.level = min(self.level, float(per_minute))
+        self.capacity = float(per_minute)
+
+
+class _ModelQueue:
+    def __init__(self, model: str):
+        limits = rate_limits_for(model)
+        self.requests = _Bucket(limits["rpm"]) if limits["rpm"] else None
+        self.tokens = _Bucket(limits["tpm"]) if limits["tpm"] else None
+        self.tokens_configured = self.tokens is not None
+        self.waiting = []
+        self.paused_until = 0.0
+        self.waits = deque(maxlen=500)
+        self.stats = {
+            "scheduled": 0,
+            "max_queue_depth": 0,
+            "provider_429s": 0,
+            "retries": 0,
+            "deadline_exceeded": 0,
+            "waited_seconds": {priority: 0.0 for priority in PRIORITY_RANKS},
+            "scheduled_by_priority": {priority: 0 for priority in PRIORITY_RANKS},
+        }
+
+    def buckets(self):
+        return [bucket for bucket in (self.requests, self.tokens) if bucket is not None]
+
+    def wait_for(self, cost: int, now: float) -> float:
+        for bucket in self.buckets():
+            bucket.refill(now)
+        waits = [self.paused_until - now]
+        if self.requests is not None:
+            waits.append(self.requests.wait_for(1))
+        if self.tokens is not None:
+            waits.append(self.tokens.wait_for(cost))
+        return max(waits)
+
+    def take(self, cost: int):
+        if self.requests is not None:
+            self.requests.level -= 1
+        if self.tokens is not None:
+            self.tokens.level -= min(cost, self.tokens.capacity)
+
+
+def _get_queue(model: str) -> _ModelQueue:
+    # Called with _LOCK held
+    if model not in _QUEUES:
+        _QUEUES[model] = _ModelQueue(model)
+    return _QUEUES[model]
+
+
+class _Reservation:
+    """
+    A request's place in its model's queue.
+    """
+
+    def __init__(self, model: str, cost: int, priority: str, deadline: float):
+        self.model = model
+        self.cost = cost
+        self.priority = priority
+        self.deadline = deadline
+        self.enqueued = time.monotonic()
+        self.ticket = (PRIORITY_RANKS[priority], next(_SEQUENCE))
+        self.queued = True
+        with _LOCK:
+            self.queue = _get_queue(model)
+            heapq.heappush(self.queue.waiting, self.ticket)
+            self.queue.stats["max_queue_depth"] = max(self.queue.stats["max_queue_depth"], len(self.queue.waiting))
+
+    def poll(self):
+        """
+        0 once the request may be sent, otherwise the seconds to wait before polling again; None when
+        its turn cannot come before the deadline (the request then leaves the queue).
+        """
+        with _LOCK:
+            now = time.monotonic()
+            is_next = self.queue.waiting[0] == self.ticket
+            wait = self.queue.wait_for(self.cost, now) if is_next else _POLL_SECONDS
+            if is_next and wait <= 0:
+                heapq.heappop(self.queue.waiting)
+                self.queued = False
+                self.queue.take(self.cost)
+                self._record_wait(now - self.enqueued)
+                return 0
+            if now >= self.deadline or (is_next and now + wait > self.deadline):
+                self._leave()
+                self.queue.stats["deadline_exceeded"] += 1
+                return None
+            return min(wait, self.deadline - now)
+
+    def cancel(self):
+        """
+        Takes the request out of the queue if it is still waiting (it was cancelled or raised), so the
+        requests behind it are not blocked by its ticket. No-op once it was granted or timed out.
+        """
+        with _LOCK:
+            if self.queued:
+                self._leave()
+
+    def _leave(self):
+        # Called with _LOCK held
+        self.queue.waiting.remove(self.ticket)
+        heapq.heapify(self.queue.waiting)
+        self.queued = False
+
+    def _record_wait(self, waited: float):
+        stats = self.queue.stats
+        stats["scheduled"] += 1
+        stats["scheduled_by_priority"][self.priority] += 1
+        stats["waited_seconds"][self.priority] += waited
+        self.queue.waits.append(waited)
+
+
+def _wait_for_turn(reservation: _Reservation) -> bool:
+    """
+    Blocks until the request may be sent (True) or its deadline passed (False).
+    """
+    try:
+        with _waiting_in_queue():
+            wait = reservation.poll()
+            while wait:
+                time.sleep(wait)
+                wait = reservation.poll()
+        return wait is not None
+    finally:
+        reservation.cancel()
+
+
+async def _await_turn(reservation: _Reservation) -> bool:
+    """
+    Async version of _wait_for_turn; a cancelled task leaves the queue.
+    """
+    try:
+        with _waiting_in_queue():
+            wait = reservation.poll()
+            while wait:
+                await asyncio.sleep(wait)
+                wait = reservation.poll()
+        return wait is not None
+    finally:
+        reservation.cancel()
+
+
+def _request_model(request: httpx.Request):
+    """
+    (model, estimated tokens) of a chat completion request, None for any other request.
+    """
+    if request.method != "POST" or not request.url.path.endswith("/chat/completions"):
+        return None, 0
+    try:
+        body = json.loads(request.content)
+    except Exception:
+        return None, 0
+    completion_tokens = body.get("max_completion_tokens") or body.get("max_tokens") or LLM_SCHEDULER_COMPLETION_TOKENS
+    return body.get("model"), len(request.content) // _CHARS_PER_TOKEN + completion_tokens
+
+
+def _parse_duration(value: str):
+    # Groq reset headers look like "7.66s", "2m59.56s" or "120ms"
+    parts = re.findall(r"(\d+(?:\.\d+)?)(ms|h|m|s)", value or "")
+    if not parts:
+        return None
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(amount) * units[unit] for amount, unit in parts)
+
+
+def _retry_after(response: httpx.Response, attempt: int) -> float:
+    """
+    Seconds to pause a model after a 429: retry-after (seconds or date), the provider's reset
+    headers, or an exponential backoff with jitter.
+    """
+    value = response.headers.get("retry-after")
+    if value:
+        try:
+            return max(float(value), 0.0)
+        except ValueError:
+            try:
+                return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+            except (TypeError, ValueError):
+                pass
+    resets = [
+        _parse_duration(response.headers.get(header))
+        for header in ("x-ratelimit-reset-tokens", "x-ratelimit-reset-requests")
+    ]
+    resets = [reset for reset in resets if reset is not None]
+    if resets:
+        return min(resets)
+    return LLM_SCHEDULER_BACKOFF_SECONDS * (2 ** attempt) * random.uniform(1.0, 1.5)
+
+
+def _should_retry(reservation: _Reservation, response: httpx.Response, attempt: int) -> bool:
+    """
+    Updates the model's buckets from the response headers. On a 429 the model is paused for the
+    retry-after; returns True if the request should be queued again.
+
+    The remaining tokens are the whole account's (every process and worker), so clamping the bucket
+    to them keeps the processes together within the limit. A model without a configured token limit
+    gets its bucket from the headers.
+    """
+    with _LOCK:
+        queue = reservation.queue
+        limit = response.headers.get("x-ratelimit-limit-tokens")
+        remaining = response.headers.get("x-ratelimit-remaining-tokens")
+        if limit and limit.isdigit() and int(limit) > 0:
+            if queue.tokens is None:
+                queue.tokens = _Bucket(int(limit))
+            else:
+                # A configured share only shrinks to the account's limit
+                queue.tokens.resize(min(queue.tokens.capacity, int(limit)) if queue.tokens_configured else int(limit))
+
+        if queue.tokens is not None and remaining and remaining.isdigit():
+            queue.tokens.level = min(queue.tokens.level, float(remaining))
+
+        if response.status_code != 429:
+            return False
+        queue.stats["provider_429s"] += 1
+        pause = _retry_after(response, attempt)
+        queue.paused_until = max(queue.paused_until, time.monotonic() + pause)
+        if attempt < LLM_SCHEDULER_MAX_RETRIES and time.monotonic() + pause < reservation.deadline:
+            queue.stats["retries"] += 1
+            return True
+
+    response.headers["x-should-retry"] = "false"
+    return False
+
+
+def _deadline_response(request: httpx.Request, reservation: _Reservation) -> httpx.Response:
+    with _LOCK:
+        retry_after = max(reservation.queue.paused_until - time.monotonic(), 1.0)
+    return httpx.Response(
+        429,
+        headers={"retry-after": str(int(retry_after + 0.999)), "x-should-retry": "false"},
+        json={
+            "error": {
+                "message": f"Rate limit: {reservation.model} request could not be scheduled within the {reservation.priority} deadline",
+                "type": "rate_limit_exceeded",
+                "code": "client_queue_timeout",
+            }
+        },
+        request=request,
+    )
+
+
+class SchedulingTransport(httpx.BaseTransport):
+    """
+    Sends chat completion requests through the scheduler, everything else straight to the wrapped transport.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport):
+        self._transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        model, cost = _request_model(request)
+        if model is None:
+            return self._transport.handle_request(request)
+
+        priority = _LLM_PRIORITY.get()
+        deadline = time.monotonic() + LLM_QUEUE_DEADLINES[priority]
+        for attempt in itertools.count():
+            reservation = _Reservation(model, cost, priority, deadline)
+            if not _wait_for_turn(reservation):
+                return _deadline_response(request, reservation)
+
+            response = self._transport.handle_request(request)
+            if not _should_retry(reservation, response, attempt):
+                return response
+            response.close()
+
+    def close(self):
+        self._transport.close()
+
+
+class AsyncSchedulingTransport(httpx.AsyncBaseTransport):
+    """
+    Async version of SchedulingTransport; waiting for a turn does not block the event loop.
+    """
+
+    def __init__(self, transport: httpx.AsyncBaseTransport):
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        model, cost = _request_model(request)
+        if model is None:
+            return await self._transport.handle_async_request(request)
+
+        priority = _LLM_PRIORITY.get()
+        deadline = time.monotonic() + LLM_QUEUE_DEADLINES[priority]
+        for attempt in itertools.count():
+            reservation = _Reservation(model, cost, priority, deadline)
+            if not await _await_turn(reservation):
+                return _deadline_response(request, reservation)
+
+            response = await self._transport.handle_async_request(request)
+            if not _should_retry(reservation, response, attempt):
+                return response
+            await response.aclose()
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+
+def _percentile(values, fraction: float):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+def get_scheduler_stats() -> dict:
+    """
+    Per model in this process: current and peak queue depth, requests scheduled, wait times (ms),
+    provider 429s, retries, requests that missed their deadline and the remaining 429 pause.
+    """
+    models = {}
+    with _LOCK:
+        now = time.monotonic()
+        for model, queue in _QUEUES.items():
+            stats = queue.stats
+            scheduled = stats["scheduled"]
+            waits = list(queue.waits)
+            models[model] = {
+                "limits": {
+                    "rpm": int(queue.requests.capacity) if queue.requests else 0,
+                    "tpm": int(queue.tokens.capacity) if queue.tokens else 0,
+                },
+                "queue_depth": len(queue.waiting),
+                "max_queue_depth": stats["max_queue_depth"],
+                "scheduled": scheduled,
+                "avg_wait_ms": round(sum(stats["waited_seconds"].values()) * 1000 / scheduled, 1) if scheduled else None,
+                "p95_wait_ms": round(_percentile(waits, 0.95) * 1000, 1) if waits else None,
+                "by_priority": {
+                    priority: {
+                        "scheduled": count,
+                        "avg_wait_ms": round(stats["waited_seconds"][priority] * 1000 / count, 1) if count else None,
+                    }
+                    for priority, count in stats["scheduled_by_priority"].items()
+                },
+                "provider_429s": stats["provider_429s"],
+                "retries": stats["retries"],
+                "deadline_exceeded": stats["deadline_exceeded"],
+                "paused_seconds": round(max(queue.paused_until - now, 0.0), 2),
+            }
+    return {"enabled": LLM_SCHEDULER_ENABLED, "deadlines": LLM_QUEUE_DEADLINES, "models": models}
@@ -9,17 +9,65 @@ import os
 load_dotenv()
 
 
+def _model_list(value: str) -> list:
+    return [model.strip() for model in value.split(",") if model.strip()]
+
+
 # Coordinator agent model
 CORDINATOR_MODEL: str = os.getenv("CORDINATOR_MODEL", "groq:openai/gpt-oss-20b")
 
+# Models tried in order when an agent's model fails, is slow or has an open circuit breaker
+# (comma separated, see agents.agents.resilient_llm); empty disables fallbacks for the agent
+CORDINATOR_FALLBACK_MODELS: list = _model_list(os.getenv("CORDINATOR_FALLBACK_MODELS", "groq:meta-llama/llama-4-scout-17b-16e-instruct"))
+
 # Feedback agent model
 FEEDBACK_MODEL: str = os.getenv("FEEDBACK_MODEL", "groq:meta-llama/llama-4-scout-17b-16e-instruct")
+FEEDBACK_FALLBACK_MODELS: list = _model_list(os.getenv("FEEDBACK_FALLBACK_MODELS", "groq:llama-3.1-8b-instant"))
 
 # Opportunity (mentorship) agent model
 OPPORTUNITY_MODEL: str = os.getenv("OPPORTUNITY_MODEL", "groq:meta-llama/llama-4-scout-17b-16e-instruct")
+OPPORTUNITY_FALLBACK_MODELS: list = _model_list(os.getenv("OPPORTUNITY_FALLBACK_MODELS", "groq:llama-3.1-8b-instant"))
 
 # Onboard agent model
 ONBOARD_MODEL: str = os.getenv("ONBOARD_MODEL", "groq:openai/gpt-oss-20b")
+ONBOARD_FALLBACK_MODELS: list = _model_list(os.getenv("ONBOARD_FALLBACK_MODELS", "groq:meta-llama/llama-4-scout-17b-16e-instruct"))
 
 # Skill agent model
 SKILL_MODEL: str = os.getenv("SKILL_MODEL", "groq:openai/gpt-oss-20b")
+SKILL_FALLBACK_MODELS: list = _model_list(os.getenv("SKILL_FALLBACK_MODELS", "groq:meta-llama/llama-4-scout-17b-16e-instruct"))
+
+
+# Provider rate limits per model, enforced client side by agents.agents.llm_scheduler: requests and
+# tokens per minute of the account (0 = unlimited), e.g.
+# LLM_RATE_LIMITS="openai/gpt-oss-20b=1000:250000,meta-llama/llama-4-scout-17b-16e-instruct=1000:300000".
+# Nothing is limited up front unless configured: the token bucket of every model is otherwise sized
+# from the provider's x-ratelimit-limit-tokens / x-ratelimit-remaining-tokens response headers.
+LLM_DEFAULT_RPM: int = int(os.getenv("LLM_DEFAULT_RPM", "0"))
+LLM_DEFAULT_TPM: int = int(os.getenv("LLM_DEFAULT_TPM", "0"))
+
+# Processes sharing the account's limits (web workers plus job worker processes); each one schedules
+# its share of the configured limits
+LLM_SCHEDULER_PROCESSES: int = max(int(os.getenv("LLM_SCHEDULER_PROCESSES", os.getenv("WEB_CONCURRENCY", "1"))), 1)
+
+
+def _parse_rate_limits(value: str) -> dict:
+    limits = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        model, _, rpm_tpm = item.strip().rpartition("=")
+        rpm, _, tpm = rpm_tpm.partition(":")
+        limits[model.split("groq:")[-1]] = {"rpm": int(rpm or 0), "tpm": int(tpm or 0)}
+    return limits
+
+
+MODEL_RATE_LIMITS: dict = _parse_rate_limits(os.getenv("LLM_RATE_LIMITS", ""))
+
+
+def rate_limits_for(model: str) -> dict:
+    """
+    {"rpm": ..., "tpm": ...} this process may use of a model given with or without its "groq:" prefix:
+    the account's limits divided by LLM_SCHEDULER_PROCESSES (0 = unlimited).
+    """
+    limits = MODEL_RATE_LIMITS.get(model.split("groq:")[-1], {"rpm": LLM_DEFAULT_RPM, "tpm": LLM_DEFAULT_TPM})
+    return {key: max(limit // LLM_SCHEDULER_PROCESSES, 1) if limit else 0 for key, limit in limits.items()}
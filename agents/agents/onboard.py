@@ -1,14 +1,25 @@
 from langchain.chat_models import init_chat_model
 from langchain.tools import tool
-from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.prompts import ChatPromptTemplate
 from langchain_groq import ChatGroq
 from db.models.onboard import OnboardCatalog
-from db.models.embeddings import embeddings
-from pgvector.django import CosineDistance
-import json
+from db.models.vector_column import VectorColumn
+from asgiref.sync import sync_to_async
 from django.core.cache import cache
-from agents.agents.model_config import ONBOARD_MODEL
+from agents.agents.cache_keys import get_cached, make_cache_key
+from agents.agents.model_config import ONBOARD_FALLBACK_MODELS, ONBOARD_MODEL
+from agents.agents.http_clients import groq_client_kwargs
+from agents.agents.resilient_llm import resilient_llm
+from agents.agents.checkpoints import acheckpointed, checkpointed
+from agents.agents.structured_output import (
+    StructuredAgentExecutor,
+    aagent_answer,
+    agent_answer,
+    create_structured_agent,
+    final_answer_tool,
+)
+from typing import List
+from pydantic import BaseModel, Field
 
 ONBOARD_LLM = None
 ONBOARD_AGENT = None
@@ -19,7 +30,7 @@ to explore relevant job information based on the query. Do not jump straight to
 If you find promising matches from the searches, then use get_job_details\
 (repeatedly if multiple similar job titles and/or specialization and/or tags) to retrieve full details for similar jobs.\
 From the gathered information and various similar jobs and/or specialization and/or tags,\
-you can create invent details from the gathered info. Compile the information into the compulsory json string (not actual json object but json string) format with keys:\
+you can create invent details from the gathered info. Finish by calling final_answer with\
 'checklist' (array), 'resources' (array), and 'explanation' (string).\
 Use only the tools provided."
 
@@ -34,7 +45,11 @@ def create_onboard_llm():
     global ONBOARD_LLM
     if not ONBOARD_LLM:
         # ONBOARD_LLM = init_chat_model(ONBOARD_MODEL, reasoning_effort= "low")
-        ONBOARD_LLM = ChatGroq(model=ONBOARD_MODEL.split(':')[-1], reasoning_effort='low')
+        ONBOARD_LLM = resilient_llm(
+            ChatGroq(model=ONBOARD_MODEL.split(':')[-1], reasoning_effort='low', **groq_client_kwargs()),
+            ONBOARD_MODEL,
+            ONBOARD_FALLBACK_MODELS,
+        )
 
     return ONBOARD_LLM
 
@@ -44,10 +59,11 @@ def vector_fuzzy_search(query: str, vector_field: str, threshold: float = 0.8) -
     Uniform helper for fuzzy vector search.
     Computes embedding for query and finds top 3 similar items using cosine similarity.
     """
-    query_vector = embeddings.embed_query(query)
+    column = VectorColumn.for_field(OnboardCatalog, vector_field)
+    query_vector = column.embed_query(query)
     similar_items = (
         OnboardCatalog.objects.annotate(
-            distance=CosineDistance(vector_field, query_vector)
+            distance=column.distance(query_vector)
         )
         .filter(distance__lt=threshold)
         .order_by("distance")[:3]
@@ -66,8 +82,8 @@ def find_similar_job_titles(job_title: str) -> str:
     """
     Find similar job titles using vector fuzzy search.
     """
-    cache_key = f"find_similar_job_titles_{job_title}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("find_similar_job_titles", job_title)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -87,8 +103,8 @@ def find_similar_specializations(specialization: str) -> str:
     """
     Find similar specializations using vector fuzzy search.
     """
-    cache_key = f"find_similar_specializations_{specialization}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("find_similar_specializations", specialization)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -108,8 +124,8 @@ def find_jobs_with_relevant_tags(tags: str) -> str:
     """
     Find jobs with relevant tags using vector fuzzy search. The tags will be split on commas and used.
     """
-    cache_key = f"find_jobs_with_relevant_tags_{tags}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("find_jobs_with_relevant_tags", tags)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -132,8 +148,8 @@ def get_job_details(job_title: str) -> str:
     Input: A string representing the job title to search for (e.g., 'Software Engineer').
     Output: A formatted string with details of the top matching job.
     """
-    cache_key = f"get_job_details_{job_title}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("get_job_details", job_title)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -195,6 +211,16 @@ def get_job_details_title_spec(job_title: str, specialization: str = "N/A") -> s
         return None
 
 
+class OnboardResponse(BaseModel):
+    checklist: List[str] = Field(default_factory=list, description="Onboarding tasks for the role")
+    resources: List[str] = Field(default_factory=list, description="Onboarding resources (titles or URLs)")
+    explanation: str = Field(default="", description="Explanation of the role and its onboarding")
+
+
+# Used when the agent stopped (max iterations) before calling final_answer
+ONBOARD_COMPILE_PROMPT = "You are an onboarding assistant. Compile the gathered job information into an onboarding plan: a checklist, resources and an explanation of the role."
+
+
 def create_onboard_agent():
     """
     This returns the onboard agent if initialized, otherwise initializes and returns that.
@@ -207,7 +233,8 @@ def create_onboard_agent():
             find_similar_specializations,
             find_jobs_with_relevant_tags,
             get_job_details,
-            json_tool
+            json_tool,
+            final_answer_tool(OnboardResponse, "Give the onboarding plan. Call this last, on its own."),
         ]
         prompt = ChatPromptTemplate.from_messages(
             [
@@ -219,20 +246,29 @@ def create_onboard_agent():
                 ("placeholder", "{agent_scratchpad}"),
             ]
         )
-        agent = create_tool_calling_agent(llm, tools, prompt)
-        ONBOARD_AGENT = AgentExecutor(
+        agent = create_structured_agent(llm, tools, prompt)
+        ONBOARD_AGENT = StructuredAgentExecutor(
             agent=agent,
             tools=tools,
             verbose=True,
             handle_parsing_errors=True,
             return_intermediate_steps=True,
-            early_stopping_method="generate",
+            early_stopping_method="force",
             max_iterations=8
         )
 
     return ONBOARD_AGENT
 
 
+def _onboard_agent_query(query: str, job_title: str, specialization: str) -> str:
+    if specialization:
+        base_query = f"{job_title} - {specialization}"
+    else:
+        base_query = job_title
+
+    return f"{base_query}. Extra user query: {query}".strip()
+
+
 def run_onboard_agent(
     query: str = None, job_title: str = None, specialization: str = None
 ):
@@ -240,8 +276,8 @@ def run_onboard_agent(
     Runs the onboard agent with the given query and returns the JSON response. If no query is given, returns the best matching job
     if the similarity is greater than 0.95.
     """
-    cache_key = f"onboard_agent_{job_title}_{specialization}_{query}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("onboard_agent", job_title, specialization, query)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -256,19 +292,44 @@ def run_onboard_agent(
         else:
             pass  # No good similar job
 
-    if specialization:
-        base_query = f"{job_title} - {specialization}"
-    else:
-        base_query = job_title
+    agent = create_onboard_agent()
+
+    def run():
+        result = agent.invoke({"input": _onboard_agent_query(query, job_title, specialization)})
+        return agent_answer(result, OnboardResponse, create_onboard_llm(), ONBOARD_COMPILE_PROMPT)
 
-    full_query = f"{base_query}. Extra user query: {query}".strip()
+    final_result, _ = checkpointed("onboard_output", cache_key, run=run)
+    cache.set(cache_key, final_result, timeout=172800)
+    return final_result
+
+
+async def arun_onboard_agent(
+    query: str = None, job_title: str = None, specialization: str = None
+):
+    """
+    Async version of run_onboard_agent. The agent run is awaited (its sync tools run in worker
+    threads), so the event loop serves other requests while the LLM is working.
+    """
+    cache_key = make_cache_key("onboard_agent", job_title, specialization, query)
+    cached_result = await sync_to_async(get_cached)(cache_key)
+    if cached_result:
+        return cached_result
+
+    if not query:
+        if not job_title:
+            raise Exception("Job title is required if no additional query is given!")
+
+        job_details = await sync_to_async(get_job_details_title_spec)(job_title, specialization)
+        if job_details:
+            await cache.aset(cache_key, job_details, timeout=172800)
+            return job_details
 
     agent = create_onboard_agent()
-    result = agent.invoke({"input": full_query})
 
-    data: str = result.get("output", "{}")
-    data = data[data.find("{") : data.rfind("}") + 1]
+    async def run():
+        result = await agent.ainvoke({"input": _onboard_agent_query(query, job_title, specialization)})
+        return await aagent_answer(result, OnboardResponse, create_onboard_llm(), ONBOARD_COMPILE_PROMPT)
 
-    final_result = json.loads(data)
-    cache.set(cache_key, final_result, timeout=172800)
+    final_result, _ = await acheckpointed("onboard_output", cache_key, run=run)
+    await cache.aset(cache_key, final_result, timeout=172800)
     return final_result
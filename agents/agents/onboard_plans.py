@@ -0,0 +1,264 @@
+"""
+Precomputed onboarding plans per role.
+
+Everyone with the same job title and specialization used to get their own onboard agent run (vector
+searches plus several LLM iterations) for the same plan. The base plan of every role found in
+APIUser and OnboardCatalog is now generated ahead of time (`manage.py precompute_onboard_plans`, or
+one precompute_onboard_plan job per role, queued for the roles whose catalog items a change touched
+or whose plan is older than ONBOARD_PLAN_MAX_AGE_DAYS) and served as is; only a request with an
+additional prompt or HR notes costs one LLM call to personalize the plan. Employees without a job
+title have no role and get a full onboard agent run, as before.
+"""
+
+import hashlib
+import json
+import os
+from datetime import timedelta
+from asgiref.sync import sync_to_async
+from django.core.cache import cache
+from django.utils import timezone
+from agents.agents.cache_keys import get_cached, make_cache_key
+from agents.agents.onboard import (
+    ONBOARD_COMPILE_PROMPT,
+    OnboardResponse,
+    arun_onboard_agent,
+    create_onboard_agent,
+    create_onboard_llm,
+    run_onboard_agent,
+    vector_fuzzy_search,
+)
+from agents.agents.structured_output import agent_answer
+from agents.jobs import enqueue_coalesced
+from db.models.onboard import OnboardCatalog, OnboardPlan
+from db.models.user import APIUser
+
+# Catalog changes within this many seconds are picked up by one refresh of the plans
+ONBOARD_PLAN_REFRESH_DELAY_SECONDS = int(os.getenv("ONBOARD_PLAN_REFRESH_DELAY_SECONDS", "60"))
+# Plans are regenerated after this many days even if their catalog items did not change
+ONBOARD_PLAN_MAX_AGE_DAYS = int(os.getenv("ONBOARD_PLAN_MAX_AGE_DAYS", "7"))
+
+BASE_PLAN_QUERY = "Create the standard onboarding plan for this role: the checklist every new hire should complete, the resources they need and an explanation of the role."
+
+PERSONALIZE_PROMPT = (
+    "You are an onboarding assistant. Adapt the base onboarding plan of the employee's role to their request "
+    "and the HR department's notes: keep the relevant checklist items and resources, add or reorder what the "
+    "request needs and explain the plan for this employee. Do not invent resources that are not in the plan "
+    "unless the request asks for them."
+)
+
+
+def role_fingerprint(job_title: str, specialization: str = None) -> str:
+    """
+    Digest of the catalog items the onboard agent finds for the role: the items with its job title and
+    the items its title and specialization searches return (vector_fuzzy_search, as the agent's tools).
+    A plan generated from other items is regenerated; edits to items the role never finds leave it as is.
+    """
+    ids = set(OnboardCatalog.objects.filter(title__iexact=job_title).values_list("id", flat=True))
+    ids.update(item.id for item in vector_fuzzy_search(job_title, "title_vector"))
+    if specialization:
+        ids.update(item.id for item in vector_fuzzy_search(specialization, "specialization_vector"))
+    rows = (
+        OnboardCatalog.objects.filter(id__in=ids)
+        .order_by("id")
+        .values_list("id", "title", "specialization", "tags", "checklist", "resources")
+    )
+    return hashlib.sha256(json.dumps(list(rows), default=str).encode("utf-8")).hexdigest()
+
+
+def distinct_roles() -> list:
+    """
+    (job title, specialization) of every role of an employee or in the catalog.
+    """
+    roles = set()
+    for job_title, specialization in APIUser.objects.exclude(job_title__isnull=True).exclude(job_title="").values_list("job_title", "specialization").distinct():
+        roles.add((job_title, specialization or ""))
+    for job_title, specialization in OnboardCatalog.objects.values_list("title", "specialization").distinct():
+        roles.add((job_title, specialization or ""))
+    return sorted(roles)
+
+
+def _role(job_title: str, specialization: str = None) -> str:
+    return f"{job_title} - {specialization}" if specialization else job_title
+
+
+def generate_onboard_plan(job_title: str, specialization: str = None, fingerprint: str = None) -> OnboardPlan:
+    """
+    Runs the onboard agent for the role's base plan and stores it.
+    """
+    if not job_title:
+        raise ValueError("An onboarding plan needs a job title")
+    result = create_onboard_agent().invoke({"input": f"{_role(job_title, specialization)}. {BASE_PLAN_QUERY}"})
+    plan = agent_answer(result, OnboardResponse, create_onboard_llm(), ONBOARD_COMPILE_PROMPT)
+    onboard_plan, _ = OnboardPlan.objects.update_or_create(
+        job_title=job_title,
+        specialization=specialization or "",
+        defaults={"plan": plan, "catalog_fingerprint": fingerprint or role_fingerprint(job_title, specialization)},
+    )
+    return onboard_plan
+
+
+def _is_expired(onboard_plan: OnboardPlan) -> bool:
+    return onboard_plan.generated_at < timezone.now() - timedelta(days=ONBOARD_PLAN_MAX_AGE_DAYS)
+
+
+def is_plan_current(job_title: str, specialization: str = None, fingerprint: str = None) -> bool:
+    """
+    True if the role has a plan generated from its current catalog items within ONBOARD_PLAN_MAX_AGE_DAYS.
+    """
+    onboard_plan = OnboardPlan.for_role(job_title, specialization)
+    if onboard_plan is None or _is_expired(onboard_plan):
+        return False
+    return onboard_plan.catalog_fingerprint == (fingerprint or role_fingerprint(job_title, specialization))
+
+
+def refresh_onboard_plan(job_title: str, specialization: str = None, force: bool = False) -> bool:
+    """
+    Generates the role's plan unless it is current (always with force). Returns True if a plan was
+    generated.
+    """
+    fingerprint = role_fingerprint(job_title, specialization)
+    if not force and is_plan_current(job_title, specialization, fingerprint):
+        return False
+    generate_onboard_plan(job_title, specialization, fingerprint)
+    return True
+
+
+def generate_onboard_plans(force: bool = False, log=print) -> dict:
+    """
+    Refreshes the plans of all roles in this process (see refresh_onboard_plan). A failed role is
+    logged and skipped.
+    """
+    counts = {"generated": 0, "up_to_date": 0, "failed": 0}
+    for job_title, specialization in distinct_roles():
+        try:
+            if refresh_onboard_plan(job_title, specialization, force):
+                counts["generated"] += 1
+                log(f"{_role(job_title, specialization)}: generated")
+            else:
+                counts["up_to_date"] += 1
+        except Exception as e:
+            counts["failed"] += 1
+            log(f"{_role(job_title, specialization)}: failed ({str(e)})")
+    return counts
+
+
+def queue_onboard_plan(job_title: str, specialization: str = None, force: bool = False, window_seconds: int = 0):
+    """
+    Queues the refresh of one role's plan; requests for the same role within window_seconds share a job.
+    """
+    return enqueue_coalesced(
+        "precompute_onboard_plan",
+        f"precompute_onboard_plan:{job_title}:{specialization or ''}",
+        {"job_title": job_title, "specialization": specialization or "", "force": force},
+        window_seconds=window_seconds,
+    )
+
+
+def queue_outdated_onboard_plans(force: bool = False) -> dict:
+    """
+    Queues a precompute_onboard_plan job for every role whose plan is not current (every role with
+    force) and drops the plans of roles that no longer exist. Only compares fingerprints, no LLM calls.
+    """
+    roles = distinct_roles()
+    queued = 0
+    for job_title, specialization in roles:
+        if force or not is_plan_current(job_title, specialization):
+            queue_onboard_plan(job_title, specialization, force=force)
+            queued += 1
+    existing = set(roles)
+    orphans = [
+        plan.id for plan in OnboardPlan.objects.only("id", "job_title", "specialization")
+        if (plan.job_title, plan.specialization) not in existing
+    ]
+    removed, _ = OnboardPlan.objects.filter(id__in=orphans).delete()
+    return {"roles": len(roles), "queued": queued, "removed": removed}
+
+
+def schedule_onboard_plan_refresh():
+    """
+    Queues the check of every role's plan after a catalog change (changes close together share a job),
+    which queues the regeneration of the roles whose catalog items changed.
+    """
+    try:
+        enqueue_coalesced(
+            "precompute_onboard_plans",
+            "precompute_onboard_plans",
+            window_seconds=ONBOARD_PLAN_REFRESH_DELAY_SECONDS,
+        )
+    except Exception as e:
+        print(f"Could not queue the onboarding plan refresh: {str(e)}")
+
+
+def base_onboard_plan(job_title: str, specialization: str = None) -> dict:
+    """
+    The role's precomputed plan; a role without one gets it generated now (and stored for the next
+    hire). An expired plan is still served while its regeneration is queued.
+    """
+    onboard_plan = OnboardPlan.for_role(job_title, specialization)
+    if onboard_plan is None:
+        return generate_onboard_plan(job_title, specialization).plan
+    if _is_expired(onboard_plan):
+        try:
+            queue_onboard_plan(job_title, specialization)
+        except Exception as e:
+            print(f"Could not queue the onboarding plan refresh of {_role(job_title, specialization)}: {str(e)}")
+    return onboard_plan.plan
+
+
+def _personalize_messages(plan: dict, job_title: str, specialization: str, request: str) -> list:
+    return [
+        {"role": "system", "content": PERSONALIZE_PROMPT},
+        {"role": "user", "content": f"Role: {_role(job_title, specialization)}\n\nBase plan:\n{json.dumps(plan)}\n\nEmployee request and HR notes: {request}"},
+    ]
+
+
+def personalize_onboard_plan(plan: dict, job_title: str, specialization: str, request: str) -> dict:
+    """
+    Adapts a base plan to the request with one structured output LLM call (cached).
+    """
+    cache_key = make_cache_key("onboard_personalized", job_title, specialization, plan, request)
+    cached_result = get_cached(cache_key)
+    if cached_result:
+        return cached_result
+
+    llm = create_onboard_llm().with_structured_output(OnboardResponse)
+    result = llm.invoke(_personalize_messages(plan, job_title, specialization, request)).model_dump()
+    cache.set(cache_key, result, timeout=172800)
+    return result
+
+
+def onboard_plan_for(job_title: str, specialization: str = None, additional_prompt: str = "", hr_query: str = None) -> dict:
+    """
+    The onboarding plan of an employee: the role's base plan as is, or personalized when there is an
+    additional prompt or an HR query. Without a job title there is no role plan and the onboard agent
+    answers the request.
+    """
+    request = f"{additional_prompt} | Supplementary (kinda important) HR dept query: {hr_query}"
+    if not job_title:
+        return run_onboard_agent(request, job_title, specialization)
+    plan = base_onboard_plan(job_title, specialization)
+    if not additional_prompt and not hr_query:
+        return plan
+    return personalize_onboard_plan(plan, job_title, specialization, request)
+
+
+async def aonboard_plan_for(job_title: str, specialization: str = None, additional_prompt: str = "", hr_query: str = None) -> dict:
+    """
+    Async version of onboard_plan_for. The personalization call is awaited.
+    """
+    request = f"{additional_prompt} | Supplementary (kinda important) HR dept query: {hr_query}"
+    if not job_title:
+        return await arun_onboard_agent(request, job_title, specialization)
+    plan = await sync_to_async(base_onboard_plan)(job_title, specialization)
+    if not additional_prompt and not hr_query:
+        return plan
+
+    cache_key = make_cache_key("onboard_personalized", job_title, specialization, plan, request)
+    cached_result = await sync_to_async(get_cached)(cache_key)
+    if cached_result:
+        return cached_result
+
+    llm = create_onboard_llm().with_structured_output(OnboardResponse)
+    result = (await llm.ainvoke(_personalize_messages(plan, job_title, specialization, request))).model_dump()
+    await cache.aset(cache_key, result, timeout=172800)
+    return result
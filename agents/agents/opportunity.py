@@ -11,24 +11,39 @@ Use the above skill profile (from the user and feedback cuz why not) and vector
 Model to store open roles in the company with the skills for it and other stuff needed.
 """
 
-from typing import List, Dict, Optional, Union
+import os
+from typing import List, Dict, Optional, Tuple, Union
+from asgiref.sync import sync_to_async
 from django.db.models import Q
-from pgvector.django import CosineDistance
 from db.models.user import APIUser
-from db.models.embeddings import embeddings
+from db.models.vector_column import VectorColumn
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import SystemMessage, HumanMessage
 from pydantic import BaseModel, Field
-from agents.agents.safety import check_prompt_safety
-from agents.agents.model_config import OPPORTUNITY_MODEL
+from agents.agents.safety import check_prompts_safety
+from agents.agents.model_config import OPPORTUNITY_FALLBACK_MODELS, OPPORTUNITY_MODEL
+from agents.agents.http_clients import llm_client_kwargs
+from agents.agents.resilient_llm import resilient_llm
+from agents.agents.llm_scheduler import is_rate_limited
 
 _OPPORTUNITY_LLM = None
 
+# batched: one LLM call selects the mentors for all improvements; concurrent: one call per improvement
+MENTOR_SELECTION_MODE = os.getenv("MENTOR_SELECTION_MODE", "batched").lower()
+# Larger batched prompts fall back to concurrent calls
+MENTOR_SELECTION_BATCH_MAX_CHARS = int(os.getenv("MENTOR_SELECTION_BATCH_MAX_CHARS", "12000"))
+MENTOR_SELECTION_CONCURRENCY = int(os.getenv("MENTOR_SELECTION_CONCURRENCY", "4"))
+
 
 def get_opportunity_llm():
     global _OPPORTUNITY_LLM
     if not _OPPORTUNITY_LLM:
-        _OPPORTUNITY_LLM = init_chat_model(model=OPPORTUNITY_MODEL, temperature=0.05)
+        _OPPORTUNITY_LLM = resilient_llm(
+            init_chat_model(model=OPPORTUNITY_MODEL, temperature=0.05, **llm_client_kwargs(OPPORTUNITY_MODEL)),
+            OPPORTUNITY_MODEL,
+            OPPORTUNITY_FALLBACK_MODELS,
+            temperature=0.05,
+        )
     return _OPPORTUNITY_LLM
 
 
@@ -45,14 +60,15 @@ class MentorSelection(BaseModel):
     )
 
 
-def _pick_best_mentor_with_llm(
-    *,
-    improvements: List[str],
-    candidates: List[Dict],
-) -> Optional[MentorSelection]:
-    if not candidates:
-        return None
+MENTOR_SELECTOR_PROMPT = (
+    "You are a careful mentor selector. From the shortlist, pick ONE mentor only if their strengths strongly, directly and specifically address the user's improvements. "
+    "Return the zero-based index as best_candidate_index. If none is a decent fit, set no_good_mentor=True and leave best_candidate_index null. "
+    "Be strict and aim for quality over quantity. Address the final candidate as 'Mentor' and do not mention the candidate index in the reason field."
+    "Remember to provide the output as a json."
+)
 
+
+def _mentor_selection_content(improvements: List[str], candidates: List[Dict]) -> str:
     cand_lines = []
     for idx, c in enumerate(candidates):
         strengths = c.get('strengths') or []
@@ -62,47 +78,20 @@ def _pick_best_mentor_with_llm(
             f"[{idx}] job: {c.get('job_title')} | spec: {c.get('specialization')} | strengths: {strengths_snip} | sim: {round(sim, 3) if sim is not None else 'NA'}"
         )
     improvements_str = "; ".join([i for i in improvements if i])
-    content = (
+    return (
         f"Improvements: {improvements_str}\n"
         f"Candidates:\n" + "\n".join(cand_lines)
     )
 
-    if not check_prompt_safety(content):
-        return None
-
-    llm = get_opportunity_llm().with_structured_output(MentorSelection)
-    sys = SystemMessage(
-        content=(
-            "You are a careful mentor selector. From the shortlist, pick ONE mentor only if their strengths strongly, directly and specifically address the user's improvements. "
-            "Return the zero-based index as best_candidate_index. If none is a decent fit, set no_good_mentor=True and leave best_candidate_index null. "
-            "Be strict and aim for quality over quantity. Address the final candidate as 'Mentor' and do not mention the candidate index in the reason field."
-            "Remember to provide the output as a json."
-        )
-    )
-
-    result = None
 
-    for retry_idx in range(3):
-        try:
-            result = llm.invoke([sys, HumanMessage(content=content)])
-            break
-        except Exception as e:
-            print(f"Error occurred (retry idx: {retry_idx}) while trying to get mentors: {e}")
-    else:
-        return {
-            'best_candidate_index': None,
-            'no_good_mentor': True,
-            'reason': 'Some internal server error'
-        } 
-
-    
-    if result.best_candidate_index:
+def _normalize_selection(result: MentorSelection) -> MentorSelection:
+    if isinstance(result.best_candidate_index, str):
         if result.best_candidate_index.isdigit():
             result.best_candidate_index = int(result.best_candidate_index)
         else:
             result.best_candidate_index = None
     
-    if result.no_good_mentor:
+    if isinstance(result.no_good_mentor, str):
         if result.no_good_mentor == 'false':
             result.no_good_mentor = False
         else:
@@ -111,91 +100,329 @@ def _pick_best_mentor_with_llm(
     return result
 
 
-def find_mentors_for_improvements(user_email: str, top_k: int = 3) -> List[Dict]:
+MENTOR_SELECTION_FAILED = {
+    'best_candidate_index': None,
+    'no_good_mentor': True,
+    'reason': 'Some internal server error'
+}
+
+
+MENTOR_BATCH_SELECTOR_PROMPT = (
+    "You are a careful mentor selector. For EACH numbered improvement you get its own shortlist of candidates. "
+    "For each improvement, pick ONE mentor from its shortlist only if their strengths strongly, directly and specifically address that improvement. "
+    "Return one selection per improvement with its improvement_index, and the zero-based index within that improvement's shortlist as best_candidate_index. "
+    "If none is a decent fit, set no_good_mentor=True and leave best_candidate_index null. "
+    "Be strict and aim for quality over quantity. Address the final candidate as 'Mentor' and do not mention any index in the reason field."
+    "Remember to provide the output as a json."
+)
+
+
+class ImprovementMentorSelection(MentorSelection):
+    improvement_index: Union[str, int, None] = Field(
+        default=None, description="Zero-based index of the improvement this selection is for"
+    )
+
+
+class MentorSelections(BaseModel):
+    selections: List[ImprovementMentorSelection] = Field(
+        default_factory=list, description="One selection per improvement"
+    )
+
+
+def _batch_selection_content(contents: List[str]) -> str:
+    return "\n\n".join(f"### Improvement [{idx}]\n{content}" for idx, content in enumerate(contents))
+
+
+def _batch_selections(result: MentorSelections, count: int) -> Dict[int, MentorSelection]:
+    """
+    Selections of a batched answer by improvement position. Selections without a usable
+    improvement_index are matched by order only if the answer has exactly one per improvement.
+    """
+    selections = {}
+    items = result.selections if result else []
+    for position, item in enumerate(items):
+        idx = item.improvement_index
+        if isinstance(idx, str):
+            idx = int(idx) if idx.isdigit() else None
+        if idx is None and len(items) == count:
+            idx = position
+        if isinstance(idx, int) and 0 <= idx < count and idx not in selections:
+            selections[idx] = _normalize_selection(
+                MentorSelection(
+                    best_candidate_index=item.best_candidate_index,
+                    reason=item.reason,
+                    no_good_mentor=item.no_good_mentor,
+                )
+            )
+    return selections
+
+
+def _selection_contents(items: List[Tuple[Optional[str], List[Dict]]]) -> Dict[int, str]:
+    """
+    Shortlist prompts by item position, for the items that have candidates.
+    """
+    return {
+        idx: _mentor_selection_content([imp_text] if imp_text else [], candidates)
+        for idx, (imp_text, candidates) in enumerate(items)
+        if candidates
+    }
+
+
+def _selection_plan(contents: Dict[int, str], safe: List[bool]):
+    """
+    Positions of the items that go to the LLM (those that passed the prompt guard), and whether they
+    fit in one batched call.
+    """
+    pending = [idx for idx, is_safe in zip(contents, safe) if is_safe]
+    batched = (
+        MENTOR_SELECTION_MODE == "batched"
+        and len(pending) > 1
+        and sum(len(contents[idx]) for idx in pending) <= MENTOR_SELECTION_BATCH_MAX_CHARS
+    )
+    return pending, batched
+
+
+def _selection_messages(content: str):
+    return [SystemMessage(content=MENTOR_SELECTOR_PROMPT), HumanMessage(content=content)]
+
+
+def _batch_messages(contents: List[str]):
+    return [SystemMessage(content=MENTOR_BATCH_SELECTOR_PROMPT), HumanMessage(content=_batch_selection_content(contents))]
+
+
+def _select_batched(contents: List[str]) -> Dict[int, MentorSelection]:
+    """
+    One structured-output call for all improvements. Returns the selections it produced.
+    """
+    llm = get_opportunity_llm().with_structured_output(MentorSelections)
+    for retry_idx in range(3):
+        try:
+            return _batch_selections(llm.invoke(_batch_messages(contents)), len(contents))
+        except Exception as e:
+            print(f"Error occurred (retry idx: {retry_idx}) while trying to get mentors in one batch: {e}")
+            if is_rate_limited(e):
+                break
+    return {}
+
+
+def _select_concurrently(contents: List[str]) -> List[MentorSelection]:
+    """
+    One structured-output call per improvement, at most MENTOR_SELECTION_CONCURRENCY at a time.
+    Failed calls are retried (3 attempts in total), unless a call was rate limited.
+    """
+    llm = get_opportunity_llm().with_structured_output(MentorSelection)
+    selections = [MentorSelection(**MENTOR_SELECTION_FAILED) for _ in contents]
+    todo = list(range(len(contents)))
+    for retry_idx in range(3):
+        results = llm.batch(
+            [_selection_messages(contents[idx]) for idx in todo],
+            config={"max_concurrency": MENTOR_SELECTION_CONCURRENCY},
+            return_exceptions=True,
+        )
+        failed = []
+        for idx, result in zip(todo, results):
+            if isinstance(result, Exception) or result is None:
+                print(f"Error occurred (retry idx: {retry_idx}) while trying to get mentors: {result}")
+                failed.append(idx)
+            else:
+                selections[idx] = _normalize_selection(result)
+        todo = failed
+        if not todo or any(isinstance(result, Exception) and is_rate_limited(result) for result in results):
+            break
+    return selections
+
+
+def _pick_best_mentors_with_llm(items: List[Tuple[Optional[str], List[Dict]]]) -> List[Optional[MentorSelection]]:
+    """
+    Picks the best mentor for every (improvement, candidates) item. Shortlists go through the prompt guard
+    in one pass, then to the LLM in one batched call (MENTOR_SELECTION_MODE=batched, if the prompt is not
+    too large) or in concurrent calls. Items without candidates or flagged by the guard get None.
+    """
+    contents = _selection_contents(items)
+    pending, batched = _selection_plan(contents, check_prompts_safety(list(contents.values())))
+
+    selections: List[Optional[MentorSelection]] = [None] * len(items)
+    if batched:
+        for position, selection in _select_batched([contents[idx] for idx in pending]).items():
+            selections[pending[position]] = selection
+        pending = [idx for idx in pending if selections[idx] is None]
+
+    if pending:
+        for idx, selection in zip(pending, _select_concurrently([contents[idx] for idx in pending])):
+            selections[idx] = selection
+    return selections
+
+
+async def _aselect_batched(contents: List[str]) -> Dict[int, MentorSelection]:
+    llm = get_opportunity_llm().with_structured_output(MentorSelections)
+    for retry_idx in range(3):
+        try:
+            return _batch_selections(await llm.ainvoke(_batch_messages(contents)), len(contents))
+        except Exception as e:
+            print(f"Error occurred (retry idx: {retry_idx}) while trying to get mentors in one batch: {e}")
+            if is_rate_limited(e):
+                break
+    return {}
+
+
+async def _aselect_concurrently(contents: List[str]) -> List[MentorSelection]:
+    llm = get_opportunity_llm().with_structured_output(MentorSelection)
+    selections = [MentorSelection(**MENTOR_SELECTION_FAILED) for _ in contents]
+    todo = list(range(len(contents)))
+    for retry_idx in range(3):
+        results = await llm.abatch(
+            [_selection_messages(contents[idx]) for idx in todo],
+            config={"max_concurrency": MENTOR_SELECTION_CONCURRENCY},
+            return_exceptions=True,
+        )
+        failed = []
+        for idx, result in zip(todo, results):
+            if isinstance(result, Exception) or result is None:
+                print(f"Error occurred (retry idx: {retry_idx}) while trying to get mentors: {result}")
+                failed.append(idx)
+            else:
+                selections[idx] = _normalize_selection(result)
+        todo = failed
+        if not todo or any(isinstance(result, Exception) and is_rate_limited(result) for result in results):
+            break
+    return selections
+
+
+async def _apick_best_mentors_with_llm(items: List[Tuple[Optional[str], List[Dict]]]) -> List[Optional[MentorSelection]]:
+    """
+    Async version of _pick_best_mentors_with_llm (the prompt guard runs in a worker thread).
+    """
+    contents = _selection_contents(items)
+    pending, batched = _selection_plan(contents, await sync_to_async(check_prompts_safety)(list(contents.values())))
+
+    selections: List[Optional[MentorSelection]] = [None] * len(items)
+    if batched:
+        for position, selection in (await _aselect_batched([contents[idx] for idx in pending])).items():
+            selections[pending[position]] = selection
+        pending = [idx for idx in pending if selections[idx] is None]
+
+    if pending:
+        for idx, selection in zip(pending, await _aselect_concurrently([contents[idx] for idx in pending])):
+            selections[idx] = selection
+    return selections
+
+
+def _improvement_texts(user) -> List[str]:
+    return [
+        imp
+        for imp in (user.improvements or [])
+        if isinstance(imp, str) and imp.strip()
+    ]
+
+
+def _mentor_candidates_query(current_user, strengths_column: VectorColumn, imp_vec, top_k: int):
+    """
+    Users whose strengths vectors are closest to this improvement vector.
+    """
+    return (
+        APIUser.objects.filter(
+            ~Q(email=current_user.email),  # Exclude the current user
+            job_level__gte=current_user.job_level,  # Only users with equal or higher job level
+            **{f"{strengths_column.active_field}__isnull": False},  # Only users with strengths vectors
+        )
+        .annotate(similarity=strengths_column.distance(imp_vec))
+        .order_by("similarity")[:top_k]
+    )
+
+
+def _candidate(m) -> Dict:
+    return {
+        "email": m.email,
+        "job_title": m.job_title,
+        "specialization": m.specialization,
+        "strengths": m.strengths,
+        "similarity_score": 1 - m.similarity if m.similarity is not None else None,
+    }
+
+
+def _selected_mentor(imp_text: Optional[str], candidates: List[Dict], selection: Optional[MentorSelection]) -> Dict:
+    if not selection or selection.no_good_mentor or selection.best_candidate_index is None:
+        return {
+            "can_help_with": imp_text,
+            "no_good_mentor": True,
+            "llm_reason": (selection.reason if selection and selection.reason else "No strong mentor found for this improvement"),
+        }
+
+    # find the chosen mentor details by index
+    idx_sel = selection.best_candidate_index
+    chosen = candidates[idx_sel] if 0 <= idx_sel < len(candidates) else None
+    if chosen:
+        return {
+            "email": chosen.get("email"),
+            "job_title": chosen.get("job_title"),
+            "specialization": chosen.get("specialization"),
+            "strengths": chosen.get("strengths"),
+            "can_help_with": imp_text,
+            "llm_reason": selection.reason or "Chosen by LLM as the best match for this improvement",
+        }
+    return {
+        "can_help_with": imp_text,
+        "no_good_mentor": True,
+        "llm_reason": "Invalid candidate index returned by the model",
+    }
+
+
+def find_mentors_for_improvements(user_email: str, top_k: int = 3, current_user: APIUser = None) -> List[Dict]:
     """
     Find users whose strengths match with the current user's improvement areas using vector similarity.
 
     Args:
         user_email: email of the user seeking mentorship
         top_k: Number of top mentors to return
+        current_user: the user of user_email, if already loaded
 
     Returns:
         List of dictionaries containing mentor information and similarity scores
     """
-    current_user = APIUser.objects.get(email=user_email)
+    current_user = current_user or APIUser.objects.get(email=user_email)
 
-    improvements_texts = [
-        imp
-        for imp in (current_user.improvements or [])
-        if isinstance(imp, str) and imp.strip()
-    ]
+    improvements_texts = _improvement_texts(current_user)
     if not improvements_texts:
         return []
 
-    improvement_vectors = [embeddings.embed_query(text) for text in improvements_texts]
+    strengths_column = VectorColumn.for_field(APIUser, "strengths_vector")
+    improvement_vectors = [strengths_column.embed_query(text) for text in improvements_texts]
 
-    selected_per_improvement: List[Dict] = []
+    items = [
+        (imp_text, [_candidate(m) for m in _mentor_candidates_query(current_user, strengths_column, imp_vec, top_k)])
+        for imp_text, imp_vec in zip(improvements_texts, improvement_vectors)
+    ]
+    selections = _pick_best_mentors_with_llm(items)
 
-    for idx, imp_vec in enumerate(improvement_vectors):
-        imp_text = improvements_texts[idx] if idx < len(improvements_texts) else None
-        # Find users whose strengths vectors are similar to this improvement vector
-        potential_qs = (
-            APIUser.objects.filter(
-                ~Q(email=user_email),  # Exclude the current user
-                strengths_vector__isnull=False,  # Only users with strengths vectors
-                job_level__gte=current_user.job_level,  # Only users with equal or higher job level
-            )
-            .annotate(similarity=CosineDistance("strengths_vector", imp_vec))
-            .order_by("similarity")[:top_k]
-        )
+    return [
+        _selected_mentor(imp_text, candidates, selection)
+        for (imp_text, candidates), selection in zip(items, selections)
+    ]
 
-        candidates: List[Dict] = []
-        for m in potential_qs:
-            candidates.append(
-                {
-                    "email": m.email,
-                    "job_title": m.job_title,
-                    "specialization": m.specialization,
-                    "strengths": m.strengths,
-                    "similarity_score": 1 - m.similarity if m.similarity is not None else None,
-                }
-            )
 
-        selection = _pick_best_mentor_with_llm(
-            improvements=[imp_text] if imp_text else [], candidates=candidates
-        )
+async def afind_mentors_for_improvements(user_email: str, top_k: int = 3, current_user: APIUser = None) -> List[Dict]:
+    """
+    Async version of find_mentors_for_improvements: async ORM queries, awaited LLM calls and the
+    embedding model in a worker thread, so the event loop is free while waiting.
+    """
+    current_user = current_user or await APIUser.objects.aget(email=user_email)
 
-        if not selection or selection.no_good_mentor or selection.best_candidate_index is None:
-            selected_per_improvement.append(
-                {
-                    "can_help_with": imp_text,
-                    "no_good_mentor": True,
-                    "llm_reason": (selection.reason if selection and selection.reason else "No strong mentor found for this improvement"),
-                }
-            )
-            continue
-
-        # find the chosen mentor details by index
-        idx_sel = selection.best_candidate_index
-        chosen = candidates[idx_sel] if 0 <= idx_sel < len(candidates) else None
-        if chosen:
-            selected_per_improvement.append(
-                {
-                    "email": chosen.get("email"),
-                    "job_title": chosen.get("job_title"),
-                    "specialization": chosen.get("specialization"),
-                    "strengths": chosen.get("strengths"),
-                    "can_help_with": imp_text,
-                    "llm_reason": selection.reason or "Chosen by LLM as the best match for this improvement",
-                }
-            )
-        else:
-            selected_per_improvement.append(
-                {
-                    "can_help_with": imp_text,
-                    "no_good_mentor": True,
-                    "llm_reason": "Invalid candidate index returned by the model",
-                }
-            )
+    improvements_texts = _improvement_texts(current_user)
+    if not improvements_texts:
+        return []
 
-    return selected_per_improvement
+    strengths_column = await sync_to_async(VectorColumn.for_field)(APIUser, "strengths_vector")
+    improvement_vectors = await sync_to_async(
+        lambda: [strengths_column.embed_query(text) for text in improvements_texts], thread_sensitive=False
+    )()
+
+    items = []
+    for imp_text, imp_vec in zip(improvements_texts, improvement_vectors):
+        candidates = [_candidate(m) async for m in _mentor_candidates_query(current_user, strengths_column, imp_vec, top_k)]
+        items.append((imp_text, candidates))
+    selections = await _apick_best_mentors_with_llm(items)
+
+    return [
+        _selected_mentor(imp_text, candidates, selection)
+        for (imp_text, candidates), selection in zip(items, selections)
+    ]
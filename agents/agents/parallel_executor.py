@@ -0,0 +1,118 @@
+"""
+AgentExecutor that runs the tool calls of one LLM turn concurrently.
+
+The stock executor runs the tool calls of a turn one after another when invoked synchronously, so a
+turn that asks for three sub-agents takes the sum of their run times. Here every call of the turn is
+started in a bounded thread pool and the results are handed back in the order the LLM asked for
+them, so the turn takes as long as its slowest tool. A tool that does not finish within its timeout
+is reported to the LLM as an error instead of holding up the run.
+"""
+
+import asyncio
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from typing import Dict
+from django.db import connections
+from langchain_core.agents import AgentAction, AgentStep
+from agents.agents.structured_output import StructuredAgentExecutor
+
+# Pool of the turn being executed (per run, so one executor can serve several threads)
+_TOOL_POOL = contextvars.ContextVar("coordinator_tool_pool", default=None)
+
+
+def timed_out_step(action: AgentAction, timeout: float) -> AgentStep:
+    print(f"Tool {action.tool} timed out after {timeout} seconds")
+    return AgentStep(
+        action=action,
+        observation=f"Error: {action.tool} did not finish within {timeout:g} seconds. Answer without it or try a simpler request.",
+    )
+
+
+class PendingToolCall:
+    """
+    A tool call of the current turn that was started in the pool.
+    """
+
+    def __init__(self, action: AgentAction, future, timeout: float):
+        self.action = action
+        self.future = future
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+
+    def result(self) -> AgentStep:
+        try:
+            return self.future.result(timeout=max(self.deadline - time.monotonic(), 0))
+        except FutureTimeoutError:
+            # Not started yet (pool full): drop it rather than run it after the turn
+            self.future.cancel()
+            return timed_out_step(self.action, self.timeout)
+
+
+def _run_tool_call(perform, *args):
+    try:
+        return perform(*args)
+    finally:
+        # Pool threads are not managed by the request cycle
+        connections.close_all()
+
+
+class ParallelToolAgentExecutor(StructuredAgentExecutor):
+    """
+    AgentExecutor whose tool calls of one turn run concurrently (at most max_parallel_tools at once),
+    each bounded by tool_timeouts[tool name] or tool_timeout_seconds. Tool results are checkpointed
+    and final answers validated like in StructuredAgentExecutor.
+    """
+
+    max_parallel_tools: int = 4
+    tool_timeout_seconds: float = 180.0
+    tool_timeouts: Dict[str, float] = {}
+
+    def _tool_timeout(self, tool_name: str) -> float:
+        return self.tool_timeouts.get(tool_name, self.tool_timeout_seconds)
+
+    def _iter_next_step(self, name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager=None):
+        pool = ThreadPoolExecutor(max_workers=self.max_parallel_tools, thread_name_prefix="coordinator-tool")
+        token = _TOOL_POOL.set(pool)
+        try:
+            # The base class yields the turn's actions first, then one step per action, which
+            # _perform_agent_action below turns into calls started in the pool
+            items = list(super()._iter_next_step(name_to_tool_map, color_mapping, inputs, intermediate_steps, run_manager))
+        finally:
+            _TOOL_POOL.reset(token)
+
+        try:
+            for item in items:
+                yield item.result() if isinstance(item, PendingToolCall) else item
+        finally:
+            # Timed out calls keep their thread until they return, but no longer block the run
+            pool.shutdown(wait=False)
+
+    def _perform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        pool = _TOOL_POOL.get()
+        if pool is None:
+            return super()._perform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager)
+
+        # Run in a copy of the caller's context, so callbacks and request context reach the tool
+        context = contextvars.copy_context()
+        future = pool.submit(
+            context.run,
+            _run_tool_call,
+            super()._perform_agent_action,
+            name_to_tool_map,
+            color_mapping,
+            agent_action,
+            run_manager,
+        )
+        return PendingToolCall(agent_action, future, self._tool_timeout(agent_action.tool))
+
+    async def _aperform_agent_action(self, name_to_tool_map, color_mapping, agent_action, run_manager=None):
+        # Async runs already gather the turn's tool calls; only the timeout is added
+        timeout = self._tool_timeout(agent_action.tool)
+        try:
+            return await asyncio.wait_for(
+                super()._aperform_agent_action(name_to_tool_map, color_mapping, agent_action, run_manager),
+                timeout=timeout,
+            )
+        except asyncio.TimeoutError:
+            return timed_out_step(agent_action, timeout)
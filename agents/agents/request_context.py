@@ -0,0 +1,50 @@
+"""
+Request-scoped user context for agents that are built once per process.
+
+Shared executors have no per-request state, so their tools read the requesting user from a
+context variable. Context variables follow the run into tool threads and async tasks (LangChain and
+the parallel executor copy the context), and the user loaded once per request is reused by every
+tool of that request.
+"""
+
+import contextvars
+from contextlib import contextmanager
+from db.models.user import APIUser
+
+_AGENT_USER_EMAIL = contextvars.ContextVar("agent_user_email", default=None)
+_AGENT_USERS = contextvars.ContextVar("agent_users", default=None)
+
+
+@contextmanager
+def agent_user_context(user_email: str, user: APIUser = None):
+    """
+    Runs the enclosed agent call on behalf of user_email. Pass the user if it is already loaded.
+    """
+    email_token = _AGENT_USER_EMAIL.set(user_email)
+    users_token = _AGENT_USERS.set({user_email: user} if user is not None else {})
+    try:
+        yield
+    finally:
+        _AGENT_USERS.reset(users_token)
+        _AGENT_USER_EMAIL.reset(email_token)
+
+
+def get_agent_user_email() -> str:
+    return _AGENT_USER_EMAIL.get()
+
+
+def get_agent_user() -> APIUser:
+    """
+    The user of the current agent request (loaded at most once per request), or None outside of
+    agent_user_context.
+    """
+    user_email = _AGENT_USER_EMAIL.get()
+    users = _AGENT_USERS.get()
+    if not user_email or users is None:
+        return None
+
+    user = users.get(user_email)
+    if user is None:
+        user = APIUser.objects.get(email=user_email)
+        users[user_email] = user
+    return user
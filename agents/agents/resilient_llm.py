@@ -0,0 +1,389 @@
+"""
+Circuit breakers, fallback models and hedged requests for the agents' chat models.
+
+Each agent's model (model_config) is wrapped in a ResilientChatModel together with the agent's
+ordered fallback models (*_FALLBACK_MODELS). Every model has one circuit breaker per process: after
+LLM_BREAKER_FAILURE_THRESHOLD consecutive failures (errors, or calls slower than
+LLM_LATENCY_SLO_SECONDS) the breaker opens and the model is skipped for LLM_BREAKER_RESET_SECONDS,
+after which calls probe it again. A call goes to the first model whose breaker is closed and falls
+back to the next one when it fails. If the model has not answered within its p95 latency (or
+LLM_HEDGE_AFTER_SECONDS), the same request is also sent to the next model and the first answer wins.
+Latencies are measured from the moment the rate limit scheduler sent the request (see
+llm_scheduler.LLMCallClock): a call waiting for its turn is neither slow nor hedged.
+"""
+
+import asyncio
+import contextvars
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Any, List, Optional
+from langchain.chat_models import init_chat_model
+from langchain_core.language_models.chat_models import BaseChatModel, generate_from_stream
+from agents.agents.http_clients import HTTP_POOL_SIZE, llm_client_kwargs
+from agents.agents.llm_scheduler import LLMCallClock, llm_call_clock
+
+LLM_RESILIENCE_ENABLED = os.getenv("LLM_RESILIENCE_ENABLED", "true").lower() == "true"
+LLM_BREAKER_FAILURE_THRESHOLD = int(os.getenv("LLM_BREAKER_FAILURE_THRESHOLD", "5"))
+LLM_BREAKER_RESET_SECONDS = float(os.getenv("LLM_BREAKER_RESET_SECONDS", "30"))
+# Calls slower than this count as failures of the model
+LLM_LATENCY_SLO_SECONDS = float(os.getenv("LLM_LATENCY_SLO_SECONDS", "30"))
+LLM_HEDGING_ENABLED = os.getenv("LLM_HEDGING_ENABLED", "true").lower() == "true"
+# Fixed hedge delay; when unset (0) a model is hedged after its p95 latency ...
+LLM_HEDGE_AFTER_SECONDS = float(os.getenv("LLM_HEDGE_AFTER_SECONDS", "0"))
+# ... once it has this many latency samples
+LLM_HEDGE_MIN_SAMPLES = int(os.getenv("LLM_HEDGE_MIN_SAMPLES", "20"))
+LLM_HEDGE_THREADS = int(os.getenv("LLM_HEDGE_THREADS", str(HTTP_POOL_SIZE * 2)))
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+_BREAKERS = {}
+_BREAKERS_LOCK = threading.Lock()
+_HEDGE_EXECUTOR = None
+_HEDGE_EXECUTOR_LOCK = threading.Lock()
+
+
+class ModelsUnavailableError(Exception):
+    """
+    Raised when the breakers of all models of a ResilientChatModel are open.
+    """
+
+
+class CircuitBreaker:
+    """
+    Breaker and latency record of one model in this process.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.state = CLOSED
+        self.consecutive_failures = 0
+        self.opened_until = 0.0
+        self.latencies = deque(maxlen=200)
+        self.stats = {"calls": 0, "failures": 0, "slo_violations": 0, "opened": 0, "fallbacks": 0, "hedges": 0, "hedges_won": 0}
+        self._lock = threading.Lock()
+
+    def allows(self) -> bool:
+        with self._lock:
+            if self.state == OPEN and time.monotonic() >= self.opened_until:
+                # Let calls probe the model again; the next outcome closes or reopens the breaker
+                self.state = HALF_OPEN
+            return self.state != OPEN
+
+    def record(self, latency: float, error: Exception = None):
+        with self._lock:
+            self.stats["calls"] += 1
+            self.latencies.append(latency)
+            slow = latency > LLM_LATENCY_SLO_SECONDS
+            if slow:
+                self.stats["slo_violations"] += 1
+            if error is None and not slow:
+                self.state = CLOSED
+                self.consecutive_failures = 0
+                return
+            if error is not None:
+                self.stats["failures"] += 1
+            self.consecutive_failures += 1
+            if self.state == HALF_OPEN or self.consecutive_failures >= LLM_BREAKER_FAILURE_THRESHOLD:
+                if self.state != OPEN:
+                    self.stats["opened"] += 1
+                self.state = OPEN
+                self.opened_until = time.monotonic() + LLM_BREAKER_RESET_SECONDS
+
+    def count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            latencies = sorted(self.latencies)
+        if not latencies:
+            return None
+        return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)]
+
+    def hedge_after(self) -> Optional[float]:
+        """
+        Seconds after which a call to this model is hedged, None while there is no latency budget yet.
+        """
+        if LLM_HEDGE_AFTER_SECONDS > 0:
+            return LLM_HEDGE_AFTER_SECONDS
+        if len(self.latencies) < LLM_HEDGE_MIN_SAMPLES:
+            return None
+        return min(self.percentile(0.95), LLM_LATENCY_SLO_SECONDS)
+
+
+def get_breaker(name: str) -> CircuitBreaker:
+    with _BREAKERS_LOCK:
+        if name not in _BREAKERS:
+            _BREAKERS[name] = CircuitBreaker(name)
+        return _BREAKERS[name]
+
+
+def _get_hedge_executor() -> ThreadPoolExecutor:
+    global _HEDGE_EXECUTOR
+    with _HEDGE_EXECUTOR_LOCK:
+        if _HEDGE_EXECUTOR is None:
+            _HEDGE_EXECUTOR = ThreadPoolExecutor(max_workers=LLM_HEDGE_THREADS, thread_name_prefix="llm-hedge")
+        return _HEDGE_EXECUTOR
+
+
+class ResilientChatModel(BaseChatModel):
+    """
+    Chat model that sends each call to the first available of its models (primary first), falling
+    back and hedging as described in the module docstring. bind_tools / with_structured_output use
+    the primary's tool format, so the fallbacks must be of the same provider family.
+    """
+
+    models: List[BaseChatModel]
+    names: List[str]
+    hedging: bool = True
+    streaming: bool = False
+
+    @property
+    def _llm_type(self) -> str:
+        return "resilient_chat_model"
+
+    @property
+    def _identifying_params(self) -> dict:
+        return {"models": self.names}
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(**self.models[0].bind_tools(tools, **kwargs).kwargs)
+
+    def _candidates(self) -> list:
+        candidates = [
+            (name, model, get_breaker(name))
+            for name, model in zip(self.names, self.models)
+        ]
+        available = [candidate for candidate in candidates if candidate[2].allows()]
+        if not available:
+            raise ModelsUnavailableError(f"Circuit breakers of {', '.join(self.names)} are open")
+        return available
+
+    def _hedge_after(self, candidates: list) -> Optional[float]:
+        if not (self.hedging and LLM_HEDGING_ENABLED) or self.streaming or len(candidates) < 2:
+            return None
+        return candidates[0][2].hedge_after()
+
+    def _call(self, model: BaseChatModel, messages, stop, run_manager, **kwargs):
+        if self.streaming and type(model)._stream is not BaseChatModel._stream:
+            return generate_from_stream(model._stream(messages, stop=stop, run_manager=run_manager, **kwargs))
+        return model._generate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    def _timed_call(self, candidate, clock, messages, stop, run_manager, **kwargs):
+        _, model, breaker = candidate
+        clock.start()
+        with llm_call_clock(clock):
+            try:
+                result = self._call(model, messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                breaker.record(clock.service_seconds(), e)
+                raise
+        breaker.record(clock.service_seconds())
+        return result
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        candidates = self._candidates()
+        errors = []
+        hedge_after = self._hedge_after(candidates)
+        if hedge_after is not None:
+            result, errors = self._hedged(candidates[:2], hedge_after, messages, stop, run_manager, **kwargs)
+            if result is not None:
+                return result
+            candidates = candidates[2:]
+
+        for position, candidate in enumerate(candidates):
+            try:
+                result = self._timed_call(candidate, LLMCallClock(), messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                print(f"LLM {candidate[0]} failed, trying the next model: {str(e)}")
+                errors.append(e)
+                continue
+            if position > 0 or errors:
+                candidate[2].count("fallbacks")
+            return result
+        raise errors[-1]
+
+    def _hedged(self, pair: list, hedge_after: float, messages, stop, run_manager, **kwargs):
+        """
+        Runs the first model and, if it has not answered hedge_after seconds after its request was
+        sent (time queued in the scheduler does not count), the second one as well. Returns (first
+        successful result or None, errors).
+        """
+        executor = _get_hedge_executor()
+
+        def submit(candidate, clock):
+            # Each call runs in a copy of the caller's context (scheduler priority, agent run)
+            return executor.submit(contextvars.copy_context().run, self._timed_call, candidate, clock, messages, stop, run_manager, **kwargs)
+
+        clock = LLMCallClock()
+        futures = {submit(pair[0], clock): pair[0]}
+        done = set()
+        while not done:
+            remaining = hedge_after - clock.service_seconds()
+            if remaining <= 0:
+                break
+            done, _ = wait(futures, timeout=remaining)
+        if not done:
+            pair[1][2].count("hedges")
+            futures[submit(pair[1], LLMCallClock())] = pair[1]
+
+        errors = []
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                error = future.exception()
+                if error is not None:
+                    print(f"LLM {futures[future][0]} failed: {str(error)}")
+                    errors.append(error)
+                    continue
+                candidate = futures[future]
+                if candidate is pair[1]:
+                    candidate[2].count("hedges_won" if len(futures) > 1 and not errors else "fallbacks")
+                return future.result(), errors
+            if not pending and len(futures) == 1:
+                # The first model failed before the hedge was due: fall back to the second right away
+                futures[submit(pair[1], LLMCallClock())] = pair[1]
+                pending = {future for future in futures if not future.done()}
+        return None, errors
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        candidates = self._candidates()
+        errors = []
+        hedge_after = self._hedge_after(candidates)
+        if hedge_after is not None:
+            result, errors = await self._ahedged(candidates[:2], hedge_after, messages, stop, run_manager, **kwargs)
+            if result is not None:
+                return result
+            candidates = candidates[2:]
+
+        for position, candidate in enumerate(candidates):
+            try:
+                result = await self._atimed_call(candidate, LLMCallClock(), messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                print(f"LLM {candidate[0]} failed, trying the next model: {str(e)}")
+                errors.append(e)
+                continue
+            if position > 0 or errors:
+                candidate[2].count("fallbacks")
+            return result
+        raise errors[-1]
+
+    async def _acall(self, model: BaseChatModel, messages, stop, run_manager, **kwargs):
+        if self.streaming and type(model)._astream is not BaseChatModel._astream:
+            chunks = [chunk async for chunk in model._astream(messages, stop=stop, run_manager=run_manager, **kwargs)]
+            return generate_from_stream(iter(chunks))
+        return await model._agenerate(messages, stop=stop, run_manager=run_manager, **kwargs)
+
+    async def _atimed_call(self, candidate, clock, messages, stop, run_manager, **kwargs):
+        _, model, breaker = candidate
+        clock.start()
+        with llm_call_clock(clock):
+            try:
+                result = await self._acall(model, messages, stop, run_manager, **kwargs)
+            except Exception as e:
+                breaker.record(clock.service_seconds(), e)
+                raise
+        breaker.record(clock.service_seconds())
+        return result
+
+    async def _ahedged(self, pair: list, hedge_after: float, messages, stop, run_manager, **kwargs):
+        """
+        Async version of _hedged; the slower call is cancelled once one answered.
+        """
+
+        def start(candidate, clock):
+            return asyncio.ensure_future(self._atimed_call(candidate, clock, messages, stop, run_manager, **kwargs))
+
+        clock = LLMCallClock()
+        tasks = {start(pair[0], clock): pair[0]}
+        done = set()
+        while not done:
+            remaining = hedge_after - clock.service_seconds()
+            if remaining <= 0:
+                break
+            done, _ = await asyncio.wait(tasks, timeout=remaining)
+        if not done:
+            pair[1][2].count("hedges")
+            tasks[start(pair[1], LLMCallClock())] = pair[1]
+
+        errors = []
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    error = task.exception()
+                    if error is not None:
+                        print(f"LLM {tasks[task][0]} failed: {str(error)}")
+                        errors.append(error)
+                        continue
+                    candidate = tasks[task]
+                    if candidate is pair[1]:
+                        candidate[2].count("hedges_won" if len(tasks) > 1 and not errors else "fallbacks")
+                    return task.result(), errors
+                if not pending and len(tasks) == 1:
+                    tasks[start(pair[1], LLMCallClock())] = pair[1]
+                    pending = {task for task in tasks if not task.done()}
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        return None, errors
+
+
+def _model_name(model: str) -> str:
+    return model.split(":", 1)[-1]
+
+
+def resilient_llm(primary: BaseChatModel, primary_model: str, fallback_models: List[str], **fallback_kwargs: Any) -> BaseChatModel:
+    """
+    Wraps an agent's model with its fallback models ("provider:model" as in model_config, built
+    with init_chat_model and fallback_kwargs). Returns the primary itself if LLM_RESILIENCE_ENABLED
+    is off.
+    """
+    if not LLM_RESILIENCE_ENABLED:
+        return primary
+    fallbacks = [
+        init_chat_model(model=model, **fallback_kwargs, **llm_client_kwargs(model))
+        for model in fallback_models
+        if model != primary_model
+    ]
+    return ResilientChatModel(
+        models=[primary, *fallbacks],
+        names=[_model_name(primary_model), *[_model_name(model) for model in fallback_models if model != primary_model]],
+    )
+
+
+def get_breaker_stats() -> dict:
+    """
+    Per model in this process: breaker state, calls, failures, latency percentiles (ms), SLO
+    violations, and how often it answered as a fallback or hedge.
+    """
+    with _BREAKERS_LOCK:
+        breakers = list(_BREAKERS.values())
+    models = {}
+    now = time.monotonic()
+    for breaker in breakers:
+        p50, p95 = breaker.percentile(0.5), breaker.percentile(0.95)
+        hedge_after = breaker.hedge_after()
+        models[breaker.name] = {
+            "state": breaker.state,
+            "consecutive_failures": breaker.consecutive_failures,
+            "open_for_seconds": round(max(breaker.opened_until - now, 0.0), 2) if breaker.state == OPEN else 0.0,
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "hedge_after_ms": round(hedge_after * 1000, 1) if hedge_after is not None else None,
+            **breaker.stats,
+        }
+    return {
+        "enabled": LLM_RESILIENCE_ENABLED,
+        "slo_seconds": LLM_LATENCY_SLO_SECONDS,
+        "failure_threshold": LLM_BREAKER_FAILURE_THRESHOLD,
+        "models": models,
+    }
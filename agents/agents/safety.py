@@ -62,6 +62,33 @@ get_hate_speech_classifier()
 get_prompt_guarder_classifier()
 
 
+def classify_bias(feedbacks: List[str]) -> List[bool]:
+    """
+    Runs the hate speech classifier over a list of feedback texts.
+
+    Args:
+        feedbacks (List[str]): List of feedback texts to check
+
+    Returns:
+        List[bool]: For each feedback (same order), True if it was flagged for bias/discrimination
+    """
+    if not feedbacks:
+        return []
+
+    flags = []
+    for result in get_hate_speech_classifier()(feedbacks):
+        match result["label"]:
+            case "hate":
+                flags.append(True)
+            case "nothate":
+                flags.append(False)
+            case _:
+                raise Exception(
+                    f"Unknown label in HATE_SPEECH_CLASSIFIER output: {result}"
+                )
+    return flags
+
+
 def filter_feedback_for_bias(feedbacks: List[str]) -> Dict[str, List]:
     """
     Filter a list of feedback texts for bias and discrimination.
@@ -77,18 +104,11 @@ def filter_feedback_for_bias(feedbacks: List[str]) -> Dict[str, List]:
     safe_feedback = []
     flagged_feedback = []
 
-    results = HATE_SPEECH_CLASSIFIER(feedbacks)
-
-    for idx, result in enumerate(results):
-        match result["label"]:
-            case "hate":
-                flagged_feedback.append(feedbacks[idx])
-            case "nothate":
-                safe_feedback.append(feedbacks[idx])
-            case _:
-                raise Exception(
-                    f"Unknown label in HATE_SPEECH_CLASSIFIER output: {result}"
-                )
+    for feedback, flagged in zip(feedbacks, classify_bias(feedbacks)):
+        if flagged:
+            flagged_feedback.append(feedback)
+        else:
+            safe_feedback.append(feedback)
     return {"safe_feedback": safe_feedback, "flagged_feedback": flagged_feedback}
 
 
@@ -106,14 +126,34 @@ def check_prompt_safety(prompt: str) -> bool:
     result = get_prompt_guarder_classifier()(prompt)
 
     if result[0]["label"] == "INJECTION":
-        kpi = KPI.create_or_get_current_month()
-        kpi.prompt_injection_count += 1
-        kpi.save()
+        KPI.increment(prompt_injection_count=1)
         return False
     else:
         return True
 
 
+def check_prompts_safety(prompts: List[str]) -> List[bool]:
+    """
+    check_prompt_safety for several prompts in one classifier pass.
+
+    Args:
+        prompts: prompts in string format
+
+    Returns:
+        For each prompt, whether it is safe (True) or not (False)
+    """
+    if not prompts:
+        return []
+
+    results = get_prompt_guarder_classifier()(prompts)
+    verdicts = [result["label"] != "INJECTION" for result in results]
+
+    injections = verdicts.count(False)
+    if injections:
+        KPI.increment(prompt_injection_count=injections)
+    return verdicts
+
+
 def redact_pii(prompt: str) -> str:
     """
     Redacts Personal Identifiable Information (PII) from a given prompt string.
@@ -137,8 +177,6 @@ def redact_pii(prompt: str) -> str:
         r"(\(?\d{3}\)?[-.\s]?\d{3}[-.\s]?\d{4})", "[REDACTED_PHONE]", prompt
     )
 
-    kpi = KPI.create_or_get_current_month()
-    kpi.pii_redacted_count += email_count + phone_count
-    kpi.save()
+    KPI.increment(pii_redacted_count=email_count + phone_count)
 
     return prompt
\ No newline at end of file
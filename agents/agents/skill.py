@@ -1,26 +1,49 @@
 from langchain.chat_models import init_chat_model
 from langchain.tools import tool
-from langchain.agents import create_tool_calling_agent, AgentExecutor
 from langchain.prompts import ChatPromptTemplate
-from langchain_community.tools.tavily_search import TavilySearchResults
 from db.models.skill import SkillCatalog
 from db.models.user import APIUser
-from db.models.embeddings import embeddings
-from pgvector.django import CosineDistance
-from agents.agents.feedback import classify_feedback
-import json
+from db.models.vector_column import VectorColumn
+from agents.agents.feedback import classify_user_feedback
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+from pydantic import BaseModel, Field
+from asgiref.sync import sync_to_async
+from django.db import connections
 from django.core.cache import cache
+from agents.agents.cache_keys import get_cached, make_cache_key
 import os
-from agents.agents.model_config import SKILL_MODEL
+from agents.agents.model_config import SKILL_FALLBACK_MODELS, SKILL_MODEL
+from agents.agents.http_clients import groq_client_kwargs
+from agents.agents.resilient_llm import resilient_llm
+from agents.agents.tavily import TAVILY_API_KEY
+from agents.agents.external_resources import search_web
+from agents.agents.checkpoints import acheckpointed, checkpointed
+from agents.agents.structured_output import (
+    StructuredAgentExecutor,
+    aagent_answer,
+    agent_answer,
+    create_structured_agent,
+    final_answer_tool,
+)
 from dotenv import load_dotenv
 from langchain_groq import ChatGroq
 
 load_dotenv()
 
-TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
 SKILL_LLM = None
 SKILL_AGENT = None
 
+# "agent": the tool-calling agent decides which searches to run; "pipeline": every search runs up
+# front and one structured LLM call writes the recommendations (overridable per request)
+SKILL_AGENT_MODE = os.getenv("SKILL_AGENT_MODE", "agent").lower()
+SKILL_AGENT_MODES = ("agent", "pipeline")
+# A catalog result at least this similar to a need (the query or an improvement area) covers it
+SKILL_PIPELINE_MATCH_SIMILARITY = float(os.getenv("SKILL_PIPELINE_MATCH_SIMILARITY", "0.5"))
+# Below this share of covered needs, the query is searched online (if the catalog does not cover it)
+SKILL_PIPELINE_MIN_COVERAGE = float(os.getenv("SKILL_PIPELINE_MIN_COVERAGE", "0.5"))
+SKILL_PIPELINE_MAX_IMPROVEMENTS = int(os.getenv("SKILL_PIPELINE_MAX_IMPROVEMENTS", "3"))
+
 
 SKILL_PROMPT = """You are a skill development assistant. Your goal is to help users find relevant learning resources and skills based on their query.
 
@@ -30,12 +53,12 @@ Use the tavily_search tool a maximum of twice. If the skill catalog has no relev
 
 When providing recommendations, consider any user feedback insights provided in the query to suggest additional skills that address their improvement areas and build upon their strengths.
 
-Compile all gathered information into a json string (not actual json object but json string) format. The json string should have a 'skills' array, where each item has 'title', 'description', 'learning_outcomes', and a 'resources' array. Each resource should have 'title', 'url', and 'type'. Also include an 'explanation' string.
+Finish by calling final_answer with all gathered information: a 'skills' array, where each item has 'title', 'description', 'learning_outcomes', and a 'resources' array. Each resource should have 'title', 'url', and 'type'. Also include an 'explanation' string.
 
 Do not invent any new resources or use placeholder/examples for resources (so do not give or use example.com or similar urls). If you need resources for something not in the skill catalog, use tavily_search tool and prioritize free ones.
 Try to be as quick and concise and possible using the least amount of finding tool calls and iterations.
 Focus on actionable, practical learning resources and current industry-relevant skills.
-Use only the tools provided. Output json string directly in your final answer."""
+Use only the tools provided. Give your final answer only through final_answer."""
 
 
 def create_skill_llm():
@@ -46,7 +69,11 @@ def create_skill_llm():
     global SKILL_LLM
     if not SKILL_LLM:
         # SKILL_LLM = init_chat_model(SKILL_MODEL)
-        SKILL_LLM = ChatGroq(model=SKILL_MODEL.split(':')[-1], reasoning_effort='low')
+        SKILL_LLM = resilient_llm(
+            ChatGroq(model=SKILL_MODEL.split(':')[-1], reasoning_effort='low', **groq_client_kwargs()),
+            SKILL_MODEL,
+            SKILL_FALLBACK_MODELS,
+        )
     return SKILL_LLM
 
 
@@ -55,10 +82,11 @@ def vector_fuzzy_search(query: str, vector_field: str, threshold: float = 0.8) -
     Uniform helper for fuzzy vector search on SkillCatalog.
     Computes embedding for query and finds top 5 similar items using cosine similarity.
     """
-    query_vector = embeddings.embed_query(query)
+    column = VectorColumn.for_field(SkillCatalog, vector_field)
+    query_vector = column.embed_query(query)
     similar_items = (
         SkillCatalog.objects.annotate(
-            distance=CosineDistance(vector_field, query_vector)
+            distance=column.distance(query_vector)
         )
         .filter(distance__lt=threshold)
         .order_by("distance")[:5]
@@ -72,8 +100,8 @@ def find_similar_skill_titles(skill_title: str) -> str:
     Find similar skill titles using vector fuzzy search.
     Input: A skill title or topic (e.g., 'Python programming', 'Data Science')
     """
-    cache_key = f"find_similar_skill_titles_{skill_title}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("find_similar_skill_titles", skill_title)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -97,8 +125,8 @@ def find_similar_skill_types(skill_type: str) -> str:
     Find similar skill types/categories using vector fuzzy search.
     Input: A skill type or category (e.g., 'tutorial', 'course', 'documentation')
     """
-    cache_key = f"find_similar_skill_types_{skill_type}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("find_similar_skill_types", skill_type)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -122,8 +150,8 @@ def find_skills_with_relevant_tags(tags: str) -> str:
     Find skills with relevant tags using vector fuzzy search.
     Input: Comma-separated tags (e.g., 'python, programming, beginner')
     """
-    cache_key = f"find_skills_with_relevant_tags_{tags}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("find_skills_with_relevant_tags", tags)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -149,8 +177,8 @@ def tavily_search(query: str) -> str:
     Use this when the skill catalog doesn't have sufficient information.
     Input: Search query for online resources
     """
-    cache_key = f"tavily_search_{query}"
-    cached_result = cache.get(cache_key)
+    cache_key = make_cache_key("tavily_search", query)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
@@ -158,10 +186,7 @@ def tavily_search(query: str) -> str:
         result = "Tavily search not available - API key not configured"
     else:
         try:
-            search_tool = TavilySearchResults(
-                api_key=TAVILY_API_KEY, max_results=2, search_depth="basic"
-            )
-            results = search_tool.invoke({"query": query})
+            results = search_web(query, max_results=2, search_depth="basic")
 
             if not results:
                 result = f"No online results found for '{query}'"
@@ -199,6 +224,7 @@ def create_skill_agent():
             find_skills_with_relevant_tags,
             tavily_search,
             json_tool,     # guardrail
+            final_answer_tool(SkillRecommendations, "Give the skill recommendations. Call this last, on its own."),
         ]
         prompt = ChatPromptTemplate.from_messages(
             [
@@ -207,8 +233,8 @@ def create_skill_agent():
                 ("placeholder", "{agent_scratchpad}"),
             ]
         )
-        agent = create_tool_calling_agent(llm, tools, prompt)
-        SKILL_AGENT = AgentExecutor(
+        agent = create_structured_agent(llm, tools, prompt)
+        SKILL_AGENT = StructuredAgentExecutor(
             agent=agent,
             tools=tools,
             verbose=True,
@@ -220,56 +246,234 @@ def create_skill_agent():
     return SKILL_AGENT
 
 
-def run_skill_agent(query: str, email: str = None):
+def _feedback_context(user) -> str:
+    """
+    Personalization prefix built from the user's classified feedback (empty if there is none).
+    """
+    if not user.received_feedbacks.exists():
+        return ""
+    classified = classify_user_feedback(user)
+    return f"User feedback insights - Strengths: {', '.join(classified.get('strengths', []))}, Areas for Improvement: {', '.join(classified.get('improvements', []))}. "
+
+
+# Used when the agent stopped (max iterations) before calling final_answer
+SKILL_COMPILE_PROMPT = "You are a skill development assistant. Compile the gathered information into skill recommendations for the request. Do not invent any new resources or use placeholder/examples for resources (so do not give or use example.com or similar urls)."
+
+
+class SkillResource(BaseModel):
+    title: str = Field(description="Title of the resource")
+    url: str = Field(description="URL of the resource, exactly as given in the search results")
+    type: str = Field(description="Kind of resource (course, tutorial, documentation, ...)")
+
+
+class SkillRecommendation(BaseModel):
+    title: str = Field(description="Name of the skill")
+    description: str = Field(description="Why this skill matters for the user")
+    learning_outcomes: List[str] = Field(default_factory=list, description="What the user will be able to do")
+    resources: List[SkillResource] = Field(default_factory=list, description="Resources from the search results only")
+
+
+class SkillRecommendations(BaseModel):
+    skills: List[SkillRecommendation] = Field(default_factory=list)
+    explanation: str = Field(default="", description="Short explanation of the recommendations")
+
+
+SKILL_PIPELINE_PROMPT = """You are a skill development assistant. Recommend the skills the user should learn next, based on their query and feedback insights.
+
+Use ONLY resources from the search results below and copy their URLs exactly; never invent resources or placeholder URLs. Prefer catalog resources, then free online ones.
+Address the user's improvement areas and build upon their strengths. Keep it practical and concise."""
+
+
+def normalize_skill_mode(mode: str = None) -> str:
+    """
+    The requested mode if it is known, otherwise SKILL_AGENT_MODE.
+    """
+    mode = (mode or "").lower()
+    return mode if mode in SKILL_AGENT_MODES else SKILL_AGENT_MODE
+
+
+def skill_cache_key(query: str, email: str = None, mode: str = None) -> str:
+    # The pipeline's answers are cached apart from the agent's
+    if normalize_skill_mode(mode) == "pipeline":
+        return make_cache_key("skill_pipeline", email, query)
+    return make_cache_key("skill_agent", email, query)
+
+
+def _catalog_matches(need: str) -> list:
+    """
+    Catalog items similar to need by title or tags, best first (runs in a search thread).
+    """
+    try:
+        matches = {}
+        for vector_field in ("title_vector", "tags_vector"):
+            for skill in vector_fuzzy_search(need, vector_field):
+                similarity = 1 - skill.distance
+                if skill.id not in matches or matches[skill.id]["similarity"] < similarity:
+                    matches[skill.id] = {
+                        "title": skill.title,
+                        "type": skill.type,
+                        "tags": skill.tags[:5],
+                        "url": skill.url,
+                        "similarity": round(similarity, 2),
+                    }
+        return sorted(matches.values(), key=lambda match: match["similarity"], reverse=True)
+    finally:
+        connections.close_all()
+
+
+def _web_matches(need: str) -> list:
+    try:
+        return [
+            {"title": result.get("title"), "type": "online", "url": result.get("url"), "summary": result.get("content")}
+            for result in search_web(need, max_results=2, search_depth="basic")
+        ]
+    except Exception as e:
+        print(f"Online search for '{need}' failed: {str(e)}")
+        return []
+    finally:
+        connections.close_all()
+
+
+def gather_skill_context(query: str, user=None) -> dict:
+    """
+    Runs the catalog searches for the query and the user's improvement areas in parallel and searches
+    online for the query when the catalog covers less than SKILL_PIPELINE_MIN_COVERAGE of them.
+    """
+    classified = classify_user_feedback(user) if user is not None and user.received_feedbacks.exists() else {}
+    improvements = list(classified.get("improvements", []))[:SKILL_PIPELINE_MAX_IMPROVEMENTS]
+    needs = [query] + improvements
+
+    with ThreadPoolExecutor(max_workers=len(needs)) as pool:
+        catalog = dict(zip(needs, pool.map(_catalog_matches, needs)))
+
+    uncovered = [
+        need for need, matches in catalog.items()
+        if not matches or matches[0]["similarity"] < SKILL_PIPELINE_MATCH_SIMILARITY
+    ]
+    coverage = 1 - len(uncovered) / len(needs)
+    web = {}
+    # Only the user's own query goes to the external search; the improvement areas are colleagues' feedback
+    if coverage < SKILL_PIPELINE_MIN_COVERAGE and TAVILY_API_KEY and query in uncovered:
+        web = {query: _web_matches(query)}
+
+    return {
+        "query": query,
+        "strengths": list(classified.get("strengths", [])),
+        "improvements": improvements,
+        "catalog": catalog,
+        "web": web,
+        "coverage": coverage,
+    }
+
+
+def _pipeline_messages(context: dict) -> list:
+    sections = [f"User query: {context['query']}"]
+    if context["strengths"] or context["improvements"]:
+        sections.append(
+            f"User feedback insights - Strengths: {', '.join(context['strengths'])}, Areas for Improvement: {', '.join(context['improvements'])}"
+        )
+    for need, matches in context["catalog"].items():
+        lines = [f"- {m['title']} ({m['type']}, tags: {', '.join(m['tags'])}) {m['url']} (similarity {m['similarity']})" for m in matches]
+        sections.append(f"Skill catalog results for '{need}':\n" + ("\n".join(lines) or "none"))
+    for need, matches in context["web"].items():
+        lines = [f"- {m['title']} {m['url']}: {m['summary']}" for m in matches]
+        sections.append(f"Online results for '{need}':\n" + ("\n".join(lines) or "none"))
+    return [
+        {"role": "system", "content": SKILL_PIPELINE_PROMPT},
+        {"role": "user", "content": "\n\n".join(sections)},
+    ]
+
+
+def _pipeline_result(context: dict, recommendations: SkillRecommendations) -> dict:
+    # Only resources that came from the searches are kept
+    known_urls = {
+        match["url"]
+        for matches in list(context["catalog"].values()) + list(context["web"].values())
+        for match in matches
+    }
+    result = recommendations.model_dump()
+    for skill in result["skills"]:
+        skill["resources"] = [resource for resource in skill["resources"] if resource["url"] in known_urls]
+    return result
+
+
+def run_skill_pipeline(query: str, user=None) -> dict:
+    """
+    Retrieve-then-generate version of the skill agent: the searches run up front (see
+    gather_skill_context) and exactly one structured LLM call writes the recommendations.
+    """
+    context = gather_skill_context(query, user)
+    recommendations = create_skill_llm().with_structured_output(SkillRecommendations).invoke(_pipeline_messages(context))
+    return _pipeline_result(context, recommendations)
+
+
+async def arun_skill_pipeline(query: str, user=None) -> dict:
+    """
+    Async version of run_skill_pipeline.
+    """
+    context = await sync_to_async(gather_skill_context, thread_sensitive=False)(query, user)
+    recommendations = await create_skill_llm().with_structured_output(SkillRecommendations).ainvoke(_pipeline_messages(context))
+    return _pipeline_result(context, recommendations)
+
+
+def run_skill_agent(query: str, email: str = None, user=None, mode: str = None):
     """
     Runs the skill agent with the given query and email, returns the JSON response.
     If email is provided, automatically gets feedback insights for personalization.
+    Pass the user of that email if it is already loaded. mode ("agent" or "pipeline") overrides
+    SKILL_AGENT_MODE.
     """
-    cache_key = f"skill_agent_{email}_{query}"
-    cached_result = cache.get(cache_key)
+    cache_key = skill_cache_key(query, email, mode)
+    cached_result = get_cached(cache_key)
     if cached_result:
         return cached_result
 
+    if normalize_skill_mode(mode) == "pipeline":
+        final_result = run_skill_pipeline(query, user or (APIUser.objects.get(email=email) if email else None))
+        cache.set(cache_key, final_result, timeout=172800)
+        return final_result
+
     agent = create_skill_agent()
 
-    # If email is provided, enhance the query with feedback insights
-    if email:
-        user = APIUser.objects.get(email=email)
-        if user.feedbacks:
-            classified = classify_feedback(user.feedbacks)
-            feedback_context = f"User feedback insights - Strengths: {', '.join(classified.get('strengths', []))}, Areas for Improvement: {', '.join(classified.get('improvements', []))}. "
-            query = f"{feedback_context}{query}"
-
-    result = agent.invoke({"input": query})
-
-    output = result.get("output", "{}")
-
-    # Check for early stopping due to max iterations
-    if output == "Agent stopped due to max iterations.":
-        intermediate_steps = result.get("intermediate_steps", [])
-        if intermediate_steps:
-            # Format intermediate steps into a string for summarization
-            steps_text = "\n".join(
-                [f"Step {i+1}: {step}" for i, step in enumerate(intermediate_steps)]
-            )
-            summarization_prompt = f"Based on the reasoning so far:\n{steps_text}\n\nCompile all gathered information into a JSON format. Do not invent any new resources or use placeholder/examples for resources (so do not give or use example.com or similar urls). The JSON object should have a 'skills' array, where each item has 'title', 'description', 'learning_outcomes', and a 'resources' array. Each resource should have 'title', 'url', and 'type'. Also include an 'explanation' string."
-
-            # Use the LLM to generate a summary
-            llm = create_skill_llm()
-            summary_result = llm.invoke(
-                [{"role": "user", "content": summarization_prompt}]
-            )
-            output = (
-                summary_result.content
-                if hasattr(summary_result, "content")
-                else str(summary_result)
-            )
-
-    start = output.find("{")
-    end = output.rfind("}")
-
-    json_substring = output[start : end + 1]
-
-    final_result = json.loads(json_substring)
+    def run():
+        agent_query = query
+        # If email is provided, enhance the query with feedback insights
+        if email:
+            agent_query = f"{_feedback_context(user or APIUser.objects.only('id').get(email=email))}{query}"
+        return agent_answer(agent.invoke({"input": agent_query}), SkillRecommendations, create_skill_llm(), SKILL_COMPILE_PROMPT)
+
+    # A retry of the same run (agent_run) reuses the finished answer
+    final_result, _ = checkpointed("skill_output", cache_key, run=run)
     cache.set(cache_key, final_result, timeout=172800)
     return final_result
+
+
+async def arun_skill_agent(query: str, email: str = None, user=None, mode: str = None):
+    """
+    Async version of run_skill_agent. LLM calls are awaited; the feedback classifiers (torch)
+    run in a worker thread.
+    """
+    cache_key = skill_cache_key(query, email, mode)
+    cached_result = await sync_to_async(get_cached)(cache_key)
+    if cached_result:
+        return cached_result
+
+    if normalize_skill_mode(mode) == "pipeline":
+        final_result = await arun_skill_pipeline(query, user or (await APIUser.objects.aget(email=email) if email else None))
+        await cache.aset(cache_key, final_result, timeout=172800)
+        return final_result
+
+    agent = create_skill_agent()
+
+    async def run():
+        agent_query = query
+        # If email is provided, enhance the query with feedback insights
+        if email:
+            feedback_user = user or await APIUser.objects.only("id").aget(email=email)
+            agent_query = f"{await sync_to_async(_feedback_context)(feedback_user)}{query}"
+        result = await agent.ainvoke({"input": agent_query})
+        return await aagent_answer(result, SkillRecommendations, create_skill_llm(), SKILL_COMPILE_PROMPT)
+
+    final_result, _ = await acheckpointed("skill_output", cache_key, run=run)
+    await cache.aset(cache_key, final_result, timeout=172800)
+    return final_result
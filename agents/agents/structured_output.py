@@ -0,0 +1,101 @@
+"""
+Structured final answers for the tool-calling agents.
+
+Instead of writing its answer as a JSON string (which then had to be cut out of the text, parsed and,
+when malformed, repaired by another LLM call), an agent finishes by calling the final_answer tool,
+whose arguments are the Pydantic response model. The tool call is generated in the provider's native
+tool mode and validated against the model; an invalid answer is sent back to the agent as a tool
+error within the same run, so a formatting mistake never fails (and retries) the whole run.
+"""
+
+from typing import Type
+from langchain.agents.format_scratchpad.tools import format_to_tool_messages
+from langchain.agents.output_parsers.tools import ToolsAgentOutputParser
+from langchain_core.runnables import RunnablePassthrough
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel
+from agents.agents.checkpoints import CheckpointedAgentExecutor
+
+FINAL_ANSWER_TOOL = "final_answer"
+
+
+def _validation_error(error) -> str:
+    return f"Error: the answer does not match the required format ({error}). Call {FINAL_ANSWER_TOOL} again with corrected arguments."
+
+
+def final_answer_tool(schema: Type[BaseModel], description: str) -> StructuredTool:
+    """
+    Tool the agent calls with its answer; its (validated) arguments end the run as the output dict.
+    """
+
+    def final_answer(**answer) -> dict:
+        return schema(**answer).model_dump()
+
+    return StructuredTool.from_function(
+        func=final_answer,
+        name=FINAL_ANSWER_TOOL,
+        description=description,
+        args_schema=schema,
+        return_direct=True,
+        handle_validation_error=_validation_error,
+    )
+
+
+def create_structured_agent(llm, tools: list, prompt):
+    """
+    create_tool_calling_agent whose LLM has to call a tool in every turn, so it can only finish by
+    calling final_answer (which must be one of the tools).
+    """
+    llm_with_tools = llm.bind_tools(tools, tool_choice="required")
+
+    return (
+        RunnablePassthrough.assign(
+            agent_scratchpad=lambda x: format_to_tool_messages(x["intermediate_steps"]),
+        )
+        | prompt
+        | llm_with_tools
+        | ToolsAgentOutputParser()
+    )
+
+
+class StructuredAgentExecutor(CheckpointedAgentExecutor):
+    """
+    Executor for create_structured_agent agents: a final_answer call that failed validation does not
+    end the run, the agent sees the error and answers again.
+    """
+
+    def _get_tool_return(self, next_step_output):
+        agent_action, observation = next_step_output
+        if agent_action.tool == FINAL_ANSWER_TOOL and not isinstance(observation, dict):
+            return None
+        return super()._get_tool_return(next_step_output)
+
+
+def _compile_messages(result: dict, instructions: str) -> list:
+    steps = "\n".join(f"Step {i+1}: {step}" for i, step in enumerate(result.get("intermediate_steps", [])))
+    return [
+        {"role": "system", "content": instructions},
+        {"role": "user", "content": f"Request: {result.get('input', '')}\n\nInformation gathered so far:\n{steps or result.get('output', '')}"},
+    ]
+
+
+def agent_answer(result: dict, schema: Type[BaseModel], llm, instructions: str) -> dict:
+    """
+    The answer of an executor run as a dict: the final_answer arguments, or, if the agent stopped
+    before answering (max iterations), one structured output call compiling its intermediate steps.
+    """
+    output = result.get("output")
+    if isinstance(output, dict):
+        return output
+    return llm.with_structured_output(schema).invoke(_compile_messages(result, instructions)).model_dump()
+
+
+async def aagent_answer(result: dict, schema: Type[BaseModel], llm, instructions: str) -> dict:
+    """
+    Async version of agent_answer.
+    """
+    output = result.get("output")
+    if isinstance(output, dict):
+        return output
+    answer = await llm.with_structured_output(schema).ainvoke(_compile_messages(result, instructions))
+    return answer.model_dump()
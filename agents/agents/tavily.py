@@ -0,0 +1,39 @@
+"""
+Tavily web search over the shared HTTP pool (see agents.agents.http_clients).
+"""
+
+import os
+from typing import Dict, List
+from dotenv import load_dotenv
+from agents.agents.http_clients import TAVILY_HOST, get_http_client
+
+load_dotenv()
+
+TAVILY_API_KEY = os.getenv("TAVILY_API_KEY")
+TAVILY_API_URL = f"https://{TAVILY_HOST}"
+
+
+def tavily_search_results(query: str, max_results: int = 2, search_depth: str = "basic") -> List[Dict]:
+    """
+    Searches the web with Tavily. Returns the results as dicts with 'title', 'url', 'content' and 'score'.
+    Raises on HTTP errors.
+    """
+    response = get_http_client(TAVILY_HOST).post(
+        f"{TAVILY_API_URL}/search",
+        json={
+            "api_key": TAVILY_API_KEY,
+            "query": query,
+            "max_results": max_results,
+            "search_depth": search_depth,
+        },
+    )
+    response.raise_for_status()
+    return [
+        {
+            "title": result.get("title"),
+            "url": result.get("url"),
+            "content": result.get("content"),
+            "score": result.get("score"),
+        }
+        for result in response.json().get("results", [])
+    ]
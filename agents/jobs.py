@@ -0,0 +1,208 @@
+"""
+Postgres-backed background jobs (see db.models.Job and `python manage.py run_job_worker`).
+
+Web requests only enqueue() a row; workers claim rows with SELECT ... FOR UPDATE SKIP LOCKED, run the
+registered task, and either finish the job or put it back with an exponential backoff.
+"""
+
+import os
+import random
+import traceback
+from datetime import timedelta
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.module_loading import import_string
+from agents.agents.llm_scheduler import BACKGROUND, llm_priority
+from db.models.job import Job
+
+# Task name -> dotted path of the function, called with the job payload as keyword arguments
+JOB_TASKS = {
+    "process_feedback": "agents.tasks.process_feedback",
+    "precompute_onboard_plans": "agents.tasks.precompute_onboard_plans",
+    "precompute_onboard_plan": "agents.tasks.precompute_onboard_plan",
+}
+
+# A claimed job is handed to another worker if it is not finished within this many seconds
+JOB_VISIBILITY_TIMEOUT_SECONDS = int(os.getenv("JOB_VISIBILITY_TIMEOUT_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "5"))
+JOB_RETRY_BASE_SECONDS = int(os.getenv("JOB_RETRY_BASE_SECONDS", "10"))
+JOB_RETRY_MAX_SECONDS = int(os.getenv("JOB_RETRY_MAX_SECONDS", "1800"))
+
+
+def enqueue(task: str, payload: dict = None, created_by=None, run_after=None, max_attempts: int = JOB_MAX_ATTEMPTS) -> Job:
+    """
+    Queues a job for the given task. The payload must be JSON serializable.
+    """
+    if task not in JOB_TASKS:
+        raise ValueError(f"Unknown job task: {task}")
+    return Job.objects.create(
+        task=task,
+        payload=payload or {},
+        created_by=created_by,
+        run_after=run_after or timezone.now(),
+        max_attempts=max_attempts,
+    )
+
+
+def merge_payload(payload: dict, new_payload: dict) -> dict:
+    """
+    Merges the payload of a coalesced job into the queued one: lists are concatenated
+    (without duplicates, order kept), other values are taken from the newer payload.
+    """
+    merged = dict(payload)
+    for key, value in new_payload.items():
+        if isinstance(value, list) and isinstance(merged.get(key), list):
+            merged[key] = list(dict.fromkeys(merged[key] + value))
+        else:
+            merged[key] = value
+    return merged
+
+
+def enqueue_coalesced(task: str, dedupe_key: str, payload: dict = None, window_seconds: int = 0, created_by=None) -> Job:
+    """
+    Queues a job unless a job with the same dedupe_key is still queued, in which case the payload is
+    merged into that job. A new job waits window_seconds before it can be claimed, so everything
+    enqueued for the key within that window is processed by a single run.
+    """
+    if task not in JOB_TASKS:
+        raise ValueError(f"Unknown job task: {task}")
+
+    while True:
+        with transaction.atomic():
+            job = Job.objects.select_for_update().filter(dedupe_key=dedupe_key, status=Job.QUEUED).first()
+            if job is not None:
+                job.payload = merge_payload(job.payload, payload or {})
+                job.save(update_fields=["payload", "updated_at"])
+                return job
+
+            try:
+                # Savepoint, so a concurrent insert for the same key only rolls back this statement
+                with transaction.atomic():
+                    return Job.objects.create(
+                        task=task,
+                        payload=payload or {},
+                        dedupe_key=dedupe_key,
+                        created_by=created_by,
+                        run_after=timezone.now() + timedelta(seconds=window_seconds),
+                        max_attempts=JOB_MAX_ATTEMPTS,
+                    )
+            except IntegrityError:
+                continue
+
+
+def retry_delay(attempts: int) -> timedelta:
+    """
+    Exponential backoff with jitter for the given number of attempts made so far.
+    """
+    delay = min(JOB_RETRY_BASE_SECONDS * 2 ** max(attempts - 1, 0), JOB_RETRY_MAX_SECONDS)
+    return timedelta(seconds=delay * random.uniform(0.8, 1.2))
+
+
+def claim_job(worker_id: str, visibility_timeout: int = JOB_VISIBILITY_TIMEOUT_SECONDS):
+    """
+    Claims the next due job (or one whose visibility timeout expired) for this worker, or returns None.
+    """
+    while True:
+        with transaction.atomic():
+            now = timezone.now()
+            job = (
+                Job.objects.select_for_update(skip_locked=True)
+                .filter(
+                    Q(status=Job.QUEUED, run_after__lte=now)
+                    | Q(status=Job.RUNNING, locked_until__lt=now)
+                )
+                .order_by("run_after", "id")
+                .first()
+            )
+            if job is None:
+                return None
+
+            # The previous worker ran out of time on the last allowed attempt
+            if job.status == Job.RUNNING and job.attempts >= job.max_attempts:
+                job.status = Job.FAILED
+                job.last_error = job.last_error or f"Visibility timeout expired (worker {job.locked_by})"
+                job.finished_at = now
+                job.locked_until = None
+                job.save(update_fields=["status", "last_error", "finished_at", "locked_until", "updated_at"])
+                continue
+
+            job.status = Job.RUNNING
+            job.attempts += 1
+            job.locked_by = worker_id
+            job.locked_until = now + timedelta(seconds=visibility_timeout)
+            job.save(update_fields=["status", "attempts", "locked_by", "locked_until", "updated_at"])
+            return job
+
+
+def requeue(job: Job, owned, error: str):
+    """
+    Puts a failed job back in the queue after its backoff. A coalesced job whose key already has a
+    newer queued job is merged into that one instead (only one queued job per key).
+    """
+    run_after = timezone.now() + retry_delay(job.attempts)
+    with transaction.atomic():
+        sibling = None
+        if job.dedupe_key:
+            sibling = (
+                Job.objects.select_for_update()
+                .filter(dedupe_key=job.dedupe_key, status=Job.QUEUED)
+                .exclude(id=job.id)
+                .first()
+            )
+        if sibling is None:
+            owned.update(
+                status=Job.QUEUED,
+                run_after=run_after,
+                locked_until=None,
+                last_error=error,
+                updated_at=timezone.now(),
+            )
+            return
+
+        sibling.payload = merge_payload(job.payload, sibling.payload)
+        sibling.run_after = min(sibling.run_after, run_after)
+        sibling.save(update_fields=["payload", "run_after", "updated_at"])
+        owned.update(
+            status=Job.FAILED,
+            locked_until=None,
+            last_error=f"{error}\nRetried as part of job #{sibling.id}",
+            finished_at=timezone.now(),
+            updated_at=timezone.now(),
+        )
+
+
+def run_job(job: Job, worker_id: str) -> bool:
+    """
+    Runs a claimed job and records the outcome. Returns True if the task succeeded.
+    Outcomes are only written while this worker still holds the job, so a job that was
+    re-claimed after a visibility timeout is not overwritten by the late worker.
+    """
+    owned = Job.objects.filter(id=job.id, status=Job.RUNNING, locked_by=worker_id)
+    try:
+        # Interactive requests get the LLM rate limits first
+        with llm_priority(BACKGROUND):
+            result = import_string(JOB_TASKS[job.task])(**job.payload)
+    except Exception as e:
+        print(f"Job {job} failed on attempt {job.attempts}: {str(e)}")
+        error = "".join(traceback.format_exception(e))[-5000:]
+        if job.attempts < job.max_attempts:
+            requeue(job, owned, error)
+        else:
+            owned.update(
+                status=Job.FAILED,
+                locked_until=None,
+                last_error=error,
+                finished_at=timezone.now(),
+                updated_at=timezone.now(),
+            )
+        return False
+
+    owned.update(
+        status=Job.SUCCEEDED,
+        result=result,
+        locked_until=None,
+        finished_at=timezone.now(),
+        updated_at=timezone.now(),
+    )
+    return True
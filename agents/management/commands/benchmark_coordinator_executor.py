@@ -0,0 +1,67 @@
+import time
+import tracemalloc
+from django.core.management.base import BaseCommand
+from langchain.tools import tool
+from agents.agents.cordinator import (
+    COORDINATOR_TOOLS,
+    build_coordinator_agent_executor,
+    get_coordinator_agent_executor,
+)
+from agents.agents.request_context import agent_user_context
+
+
+def per_request():
+    """
+    The previous setup: the tools are decorated again (they were closures over the user's email)
+    and a new prompt, agent and executor are built for every request.
+    """
+    [tool(name_or_callable=t.name)(t.func) for t in COORDINATOR_TOOLS]
+    return build_coordinator_agent_executor()
+
+
+def shared():
+    """
+    The current setup: the process-wide executor, with the user bound through the request context.
+    """
+    with agent_user_context("benchmark@example.com"):
+        return get_coordinator_agent_executor()
+
+
+class Command(BaseCommand):
+    help = "Measures the per-request cost of getting a coordinator executor (time and allocations), no LLM calls."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=200, help="Simulated requests per mode")
+
+    def handle(self, *args, **options):
+        requests = options["requests"]
+        modes = {"per_request": per_request, "shared": shared}
+
+        # Warm up (LLM clients, imports, the shared executor)
+        for run in modes.values():
+            run()
+
+        for name, run in modes.items():
+            started = time.perf_counter()
+            for _ in range(requests):
+                run()
+            elapsed = time.perf_counter() - started
+
+            tracemalloc.start()
+            before = tracemalloc.take_snapshot()
+            tracemalloc.reset_peak()
+            base, _ = tracemalloc.get_traced_memory()
+            # Kept alive for the snapshot, which then shows what the request allocated
+            executor = run()
+            _, peak = tracemalloc.get_traced_memory()
+            after = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            del executor
+            allocated = [stat for stat in after.compare_to(before, "filename") if stat.count_diff > 0]
+
+            self.stdout.write(
+                f"{name:<11} | {elapsed / requests * 1e6:10.1f} us/request | "
+                f"peak {(peak - base) / 1024:8.1f} KiB/request | "
+                f"{sum(stat.count_diff for stat in allocated)} blocks / "
+                f"{sum(stat.size_diff for stat in allocated) / 1024:.1f} KiB allocated for the request's executor"
+            )
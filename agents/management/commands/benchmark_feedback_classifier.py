@@ -0,0 +1,65 @@
+import random
+import time
+from django.core.management.base import BaseCommand
+from agents.agents.safety import get_hate_speech_classifier
+from agents.agents.feedback_classifier import (
+    FEEDBACK_CLASSIFIER_BATCH_SIZE,
+    classify_texts_batched,
+    classify_texts_fused,
+)
+from db.models.embeddings import sentiment_analysis
+
+SAMPLE_FEEDBACK = [
+    "Great communication with the team",
+    "Always delivers code reviews on time and leaves helpful comments",
+    "Needs to document decisions better",
+    "Could be more proactive when the sprint is at risk and raise blockers earlier in standups",
+    "Very supportive mentor for new joiners",
+    "Sometimes misses details in the requirements which leads to rework later in the project",
+    "Excellent at debugging production issues under pressure",
+    "Should delegate more",
+]
+
+
+def per_item(texts: list, batch_size: int) -> list:
+    """
+    The previous pipeline: one batched hate speech pass, then one sentiment forward pass per text.
+    """
+    flags = [result["label"] == "hate" for result in get_hate_speech_classifier()(texts)]
+    return [(flagged, None if flagged else sentiment_analysis(text)[0]["label"]) for text, flagged in zip(texts, flags)]
+
+
+class Command(BaseCommand):
+    help = "Benchmarks the feedback classifiers (per item, batched and fused) over synthetic feedback."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000], help="Numbers of feedback items")
+        parser.add_argument("--batch-size", type=int, default=FEEDBACK_CLASSIFIER_BATCH_SIZE)
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per mode, the best one is reported")
+
+    def handle(self, *args, **options):
+        modes = {"per_item": per_item, "batched": classify_texts_batched, "fused": classify_texts_fused}
+        rng = random.Random(0)
+
+        # Warm up every mode so model loading is not measured
+        for run in modes.values():
+            run(SAMPLE_FEEDBACK, options["batch_size"])
+
+        for size in options["sizes"]:
+            texts = [rng.choice(SAMPLE_FEEDBACK) for _ in range(size)]
+            reference = None
+            baseline = None
+            for name, run in modes.items():
+                timings = []
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    verdicts = run(texts, options["batch_size"])
+                    timings.append(time.perf_counter() - started)
+                best = min(timings)
+                baseline = baseline or best
+                reference = reference or verdicts
+                differing = sum(verdict != expected for verdict, expected in zip(verdicts, reference))
+                self.stdout.write(
+                    f"{size:>5} items | {name:<8} | {best:8.3f}s | {size / best:8.1f} items/s | "
+                    f"x{baseline / best:.2f} | {differing} verdicts differ from per_item"
+                )
@@ -0,0 +1,90 @@
+import asyncio
+import json
+import time
+import httpx
+from django.core.management.base import BaseCommand, CommandError
+
+
+def percentile(values: list, fraction: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(fraction * len(ordered)), len(ordered) - 1)]
+
+
+async def run_level(client: httpx.AsyncClient, url: str, body: dict, concurrency: int, requests: int) -> dict:
+    """
+    Sends requests POSTs with at most concurrency of them in flight.
+    """
+    limit = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one():
+        nonlocal errors
+        async with limit:
+            started = time.perf_counter()
+            try:
+                response = await client.post(url, json=body)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    elapsed = time.perf_counter() - started
+    return {
+        "elapsed": elapsed,
+        "throughput": requests / elapsed,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "errors": errors,
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-tests an endpoint of a running server at increasing concurrency "
+        "(compare the WSGI/gthread and the ASGI/async deployments)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--base-url", default="http://localhost:8000")
+        parser.add_argument("--path", default="/api/coordinator-ask/", help="Endpoint to POST to")
+        parser.add_argument("--body", default='{"query": "What should I focus on this quarter?"}', help="JSON request body")
+        parser.add_argument("--token", help="Access token (otherwise --email / --password are used to log in)")
+        parser.add_argument("--email")
+        parser.add_argument("--password")
+        parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 6, 24, 96], help="Requests in flight")
+        parser.add_argument("--requests", type=int, default=96, help="Requests per concurrency level")
+        parser.add_argument("--timeout", type=float, default=600)
+
+    def handle(self, *args, **options):
+        asyncio.run(self.benchmark(options))
+
+    async def benchmark(self, options):
+        try:
+            body = json.loads(options["body"])
+        except ValueError:
+            raise CommandError("--body must be valid JSON")
+
+        async with httpx.AsyncClient(base_url=options["base_url"], timeout=options["timeout"]) as client:
+            token = options["token"]
+            if not token:
+                if not options["email"] or not options["password"]:
+                    raise CommandError("Pass --token or --email and --password")
+                response = await client.post("/api/token/", json={"email": options["email"], "password": options["password"]})
+                if response.status_code != 200:
+                    raise CommandError(f"Login failed: {response.status_code} {response.text}")
+                token = response.json()["access"]
+            client.headers["Authorization"] = f"Bearer {token}"
+
+            for concurrency in options["concurrency"]:
+                stats = await run_level(client, options["path"], body, concurrency, options["requests"])
+                self.stdout.write(
+                    f"{concurrency:>4} in flight | {options['requests']} requests in {stats['elapsed']:8.2f}s | "
+                    f"{stats['throughput']:7.2f} req/s | p50 {stats['p50']:7.2f}s | p95 {stats['p95']:7.2f}s | "
+                    f"{stats['errors']} errors"
+                )
@@ -0,0 +1,50 @@
+import statistics
+import time
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from agents.agents.checkpoints import agent_run, count_llm_calls, new_run_id
+from agents.agents.skill import SKILL_AGENT_MODES, run_skill_agent, skill_cache_key
+from db.models.user import APIUser
+
+SAMPLE_QUERIES = [
+    "Which skills should I learn next to grow as a backend developer?",
+    "Recommend resources to get better at data analysis",
+    "What should I study to become a better team lead?",
+]
+
+
+class Command(BaseCommand):
+    help = "Compares the skill agent modes (agent vs pipeline): latency and LLM calls per request, answers not cached."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", help="User whose feedback personalizes the recommendations")
+        parser.add_argument("--queries", nargs="+", default=SAMPLE_QUERIES)
+        parser.add_argument("--repeat", type=int, default=1, help="Runs per query and mode")
+
+    def handle(self, *args, **options):
+        email = options["email"]
+        user = APIUser.objects.get(email=email) if email else None
+
+        for mode in SKILL_AGENT_MODES:
+            timings = []
+            llm_calls = []
+            failures = 0
+            for query in options["queries"]:
+                for _ in range(options["repeat"]):
+                    cache.delete(skill_cache_key(query, email, mode))
+                    started = time.perf_counter()
+                    # agent_run installs the LLM call counter
+                    with agent_run(new_run_id()), count_llm_calls() as calls:
+                        try:
+                            run_skill_agent(query, email, user=user, mode=mode)
+                        except Exception as e:
+                            failures += 1
+                            self.stderr.write(f"{mode} failed for '{query}': {str(e)}")
+                    timings.append(time.perf_counter() - started)
+                    llm_calls.append(calls.value)
+
+            self.stdout.write(
+                f"{mode:<8} | {len(timings)} requests | "
+                f"mean {statistics.mean(timings):6.2f} s | median {statistics.median(timings):6.2f} s | max {max(timings):6.2f} s | "
+                f"{statistics.mean(llm_calls):4.1f} LLM calls/request | {failures} failed"
+            )
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+from db.models.user import APIUser
+from agents.agents.feedback import classify_user_feedback
+
+
+class Command(BaseCommand):
+    help = (
+        "Classifies every feedback item that has no stored verdict yet (e.g. items migrated from the old array). "
+        "Does not touch the KPI, those items were already counted when they were added."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--email", help="Only classify the feedback of this user")
+
+    def handle(self, *args, **options):
+        users = APIUser.objects.filter(received_feedbacks__classified_at__isnull=True).distinct().order_by("id")
+        if options["email"]:
+            users = users.filter(email=options["email"])
+
+        processed = 0
+        for user in users.only("id", "email").iterator(chunk_size=100):
+            classify_user_feedback(user)
+            processed += 1
+            self.stdout.write(f"{user.email}: classified")
+
+        self.stdout.write(self.style.SUCCESS(f"{processed} users classified"))
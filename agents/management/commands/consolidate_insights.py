@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from db.models.user import APIUser
+from agents.agents.feedback import (
+    INSIGHTS_MAX_PER_USER,
+    INSIGHTS_SIMILARITY_THRESHOLD,
+    consolidate_insights,
+)
+
+
+class Command(BaseCommand):
+    help = "Merges near-duplicate strengths and improvements of every user, keeping one canonical insight per cluster."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threshold", type=float, default=INSIGHTS_SIMILARITY_THRESHOLD, help="Cosine similarity for near-duplicates")
+        parser.add_argument("--cap", type=int, default=INSIGHTS_MAX_PER_USER, help="Maximum insights kept per list")
+        parser.add_argument("--email", help="Only consolidate this user")
+        parser.add_argument("--dry-run", action="store_true", help="Report the reduction without saving")
+
+    def handle(self, *args, **options):
+        users = APIUser.objects.filter(~Q(strengths=[]) | ~Q(improvements=[])).order_by("id")
+        if options["email"]:
+            users = users.filter(email=options["email"])
+
+        processed = changed = before_total = after_total = 0
+        for user in users.only("id", "email", "strengths", "improvements").iterator(chunk_size=100):
+            strengths = consolidate_insights(user.strengths, options["threshold"], options["cap"])
+            improvements = consolidate_insights(user.improvements, options["threshold"], options["cap"])
+
+            before = len(user.strengths) + len(user.improvements)
+            after = len(strengths) + len(improvements)
+            processed += 1
+            before_total += before
+            after_total += after
+
+            if strengths == user.strengths and improvements == user.improvements:
+                continue
+            changed += 1
+            self.stdout.write(f"{user.email}: {before} -> {after} insights")
+            if not options["dry_run"]:
+                user.strengths = strengths
+                user.improvements = improvements
+                user.save(update_fields=["strengths", "improvements"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{processed} users checked, {changed} consolidated, {before_total} -> {after_total} insights"
+            + (" (dry run)" if options["dry_run"] else "")
+        ))
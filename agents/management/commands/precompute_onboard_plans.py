@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from agents.agents.onboard_plans import generate_onboard_plans, queue_outdated_onboard_plans
+
+
+class Command(BaseCommand):
+    help = "Generates the base onboarding plan of every role (job title and specialization) whose plan is missing or outdated."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--force", action="store_true", help="Regenerate the plans of all roles, even up to date ones")
+        parser.add_argument("--enqueue", action="store_true", help="Queue a precompute_onboard_plan job per outdated role instead of running now")
+
+    def handle(self, *args, **options):
+        if options["enqueue"]:
+            counts = queue_outdated_onboard_plans(force=options["force"])
+            self.stdout.write(self.style.SUCCESS(
+                f"Queued precompute_onboard_plan jobs for {counts['queued']} of {counts['roles']} roles"
+            ))
+            return
+
+        counts = generate_onboard_plans(force=options["force"], log=self.stdout.write)
+        self.stdout.write(self.style.SUCCESS(
+            f"{counts['generated']} plans generated, {counts['up_to_date']} up to date, {counts['failed']} failed"
+        ))
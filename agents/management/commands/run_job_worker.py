@@ -0,0 +1,69 @@
+import os
+import signal
+import socket
+import threading
+import time
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from agents.jobs import JOB_VISIBILITY_TIMEOUT_SECONDS, claim_job, run_job
+
+
+class Command(BaseCommand):
+    help = (
+        "Runs background jobs from the Job table. Each of the --concurrency threads claims one job at a time "
+        "(SELECT ... FOR UPDATE SKIP LOCKED), so several worker processes can run side by side."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--concurrency", type=int, default=int(os.getenv("JOB_WORKER_CONCURRENCY", "2")), help="Jobs run at the same time")
+        parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument("--visibility-timeout", type=int, default=JOB_VISIBILITY_TIMEOUT_SECONDS, help="Seconds before a claimed job is handed to another worker")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty")
+
+    def handle(self, *args, **options):
+        stopping = threading.Event()
+
+        def stop(signum, frame):
+            self.stdout.write("Finishing running jobs, then stopping...")
+            stopping.set()
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+
+        base_id = f"{socket.gethostname()}:{os.getpid()}"
+        threads = [
+            threading.Thread(target=self.work, args=(f"{base_id}:{idx}", stopping, options), daemon=True)
+            for idx in range(options["concurrency"])
+        ]
+        for thread in threads:
+            thread.start()
+        self.stdout.write(f"Job worker {base_id} started with {options['concurrency']} threads")
+
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(timeout=1)
+
+        self.stdout.write(self.style.SUCCESS(f"Job worker {base_id} stopped"))
+
+    def work(self, worker_id: str, stopping: threading.Event, options: dict):
+        while not stopping.is_set():
+            # Drops connections that were closed by the pooler or exceeded CONN_MAX_AGE
+            close_old_connections()
+            try:
+                job = claim_job(worker_id, options["visibility_timeout"])
+            except Exception as e:
+                print(f"Worker {worker_id} could not claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                if options["burst"]:
+                    break
+                stopping.wait(options["poll_interval"])
+                continue
+
+            started = time.monotonic()
+            succeeded = run_job(job, worker_id)
+            print(f"Worker {worker_id}: {job.task} #{job.id} {'succeeded' if succeeded else 'failed'} in {time.monotonic() - started:.1f}s")
+
+        # Connections are per thread, close this thread's before it exits
+        connections.close_all()
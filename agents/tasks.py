@@ -0,0 +1,63 @@
+"""
+Background tasks run by the job worker (registered in agents.jobs.JOB_TASKS).
+Tasks take JSON serializable keyword arguments and raise on failure so the job is retried.
+"""
+
+from django.db import transaction
+from db.models.user import APIUser
+from db.models.feedback import NegativeFeedback
+from db.models.semantic_cache import SemanticCacheEntry
+from agents.agents.feedback import classify_user_feedback, generate_insights, consolidate_insights
+from agents.agents.onboard_plans import queue_outdated_onboard_plans, refresh_onboard_plan
+
+
+def process_feedback(user_email: str, feedback_ids: list, requested_by: list = None) -> dict:
+    """
+    Classifies new feedback of a user, turns it into insights, merges them into the user's
+    strengths / improvements and stores the improvements as NegativeFeedback.
+    Only feedback that has not been classified yet goes through the classifiers.
+
+    Feedback added for the same user within the coalescing window arrives as one job, so this
+    makes one insights LLM call and one save per batch. requested_by holds the ids of the
+    feedback authors (they may follow the job status).
+    """
+    user = APIUser.objects.only("id", "email").get(email=user_email)
+    classified = classify_user_feedback(user, save_kpi=True, ids=feedback_ids)
+    summary = generate_insights(classified)
+
+    # Locked read-modify-write, so concurrent runs for the same user do not lose each other's insights
+    with transaction.atomic():
+        user = APIUser.objects.select_for_update().get(id=user.id)
+        user.strengths = consolidate_insights(user.strengths + summary["strengths_insights"])
+        user.improvements = consolidate_insights(user.improvements + summary["improvements_insights"])
+        user.save(update_fields=["strengths", "improvements"])
+
+    # Cached agent answers were based on the previous feedback and insights
+    SemanticCacheEntry.invalidate(user)
+
+    # Save each new improvement insight as a NegativeFeedback entry
+    NegativeFeedback.create_many(user, summary["improvements_insights"])
+
+    print(f"Successfully processed feedback for {user_email}")
+    return {
+        "strengths_insights": len(summary["strengths_insights"]),
+        "improvements_insights": len(summary["improvements_insights"]),
+        "feedback_items": len(feedback_ids),
+    }
+
+
+def precompute_onboard_plans(force: bool = False) -> dict:
+    """
+    Queues one precompute_onboard_plan job per role whose plan is outdated (queued on catalog
+    changes), so every plan is generated within its own job's visibility timeout.
+    """
+    return queue_outdated_onboard_plans(force=force)
+
+
+def precompute_onboard_plan(job_title: str, specialization: str = "", force: bool = False) -> dict:
+    """
+    Generates the base onboarding plan of a role that has none or whose plan is outdated (queued by
+    precompute_onboard_plans and for expired plans).
+    """
+    generated = refresh_onboard_plan(job_title, specialization, force)
+    return {"generated": generated}
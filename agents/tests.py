@@ -1,3 +1,379 @@
-from django.test import TestCase
+import asyncio
+import time
+import uuid
+from unittest import mock
+import httpx
+from django.test import SimpleTestCase, TestCase
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import tool
+from pydantic import Field
+from agents.agents import external_resources, llm_scheduler, model_config, resilient_llm
+from agents.agents.llm_scheduler import AsyncSchedulingTransport
+from agents.agents.external_resources import search_web
+from agents.agents.resilient_llm import ModelsUnavailableError, ResilientChatModel, get_breaker
+from agents.agents.skill import vector_fuzzy_search
+from db.models.external_resource import ExternalResource, ExternalSearch
+from db.models.skill import SkillCatalog
 
-# Create your tests here.
+
+class LocalTavily:
+    """
+    Stand-in for tavily_search_results: canned results per topic, and a record of every call.
+    """
+
+    RESULTS = {
+        "python": [
+            {"title": "Python Tutorial for Beginners", "url": "https://python.example.org/tutorial", "content": "Learn Python step by step.", "score": 0.9},
+            {"title": "Python Standard Library Guide", "url": "https://python.example.org/stdlib", "content": "Tour of the standard library.", "score": 0.8},
+        ],
+        "watercolor": [
+            {"title": "Watercolor Basics", "url": "https://art.example.org/watercolor", "content": "Brushes, paper and washes.", "score": 0.7},
+        ],
+    }
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, query: str, max_results: int = 2, search_depth: str = "basic"):
+        self.calls.append(query)
+        for topic, results in self.RESULTS.items():
+            if topic in query.lower():
+                return [dict(result) for result in results[:max_results]]
+        return []
+
+
+class ExternalResourceStoreTests(TestCase):
+    def setUp(self):
+        self.tavily = LocalTavily()
+        patcher = mock.patch.object(external_resources, "tavily_search_results", self.tavily)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_new_search_is_stored(self):
+        results = search_web("python tutorials")
+
+        self.assertEqual(self.tavily.calls, ["python tutorials"])
+        self.assertEqual([result["url"] for result in results], [result["url"] for result in LocalTavily.RESULTS["python"]])
+        search = ExternalSearch.objects.get()
+        self.assertIsNotNone(search.query_vector)
+        self.assertEqual(search.results(2), results)
+        resource = ExternalResource.objects.get(url="https://python.example.org/tutorial")
+        self.assertEqual(resource.content, "Learn Python step by step.")
+        self.assertEqual(resource.times_returned, 1)
+
+    def test_near_duplicate_query_is_served_from_the_store(self):
+        first = search_web("python tutorials")
+        second = search_web("  Python Tutorials ")
+
+        self.assertEqual(len(self.tavily.calls), 1)
+        self.assertEqual(second, first)
+        self.assertEqual(ExternalSearch.objects.get().hit_count, 1)
+        self.assertEqual(ExternalResource.objects.get(url="https://python.example.org/tutorial").times_returned, 2)
+
+    def test_unrelated_query_calls_the_api(self):
+        search_web("python tutorials")
+        results = search_web("watercolor painting for beginners")
+
+        self.assertEqual(len(self.tavily.calls), 2)
+        self.assertEqual([result["url"] for result in results], ["https://art.example.org/watercolor"])
+        self.assertEqual(ExternalSearch.objects.count(), 2)
+
+    def test_more_results_than_stored_calls_the_api(self):
+        search_web("python tutorials", max_results=1)
+        results = search_web("python tutorials", max_results=2)
+
+        self.assertEqual(len(self.tavily.calls), 2)
+        self.assertEqual(len(results), 2)
+
+    @mock.patch.object(external_resources, "EXTERNAL_RESOURCE_PROMOTE_AFTER", 2)
+    def test_frequent_resource_is_promoted_into_the_catalog(self):
+        search_web("python tutorials")
+        self.assertFalse(SkillCatalog.objects.exists())
+
+        search_web("python tutorials")
+
+        resource = ExternalResource.objects.get(url="https://python.example.org/tutorial")
+        skill = resource.promoted_skill
+        self.assertIsNotNone(skill)
+        self.assertEqual((skill.title, skill.type, skill.url), ("Python Tutorial for Beginners", "online", resource.url))
+        self.assertEqual(skill.tags, ["python", "tutorial", "beginners", "step", "learn"])
+        self.assertIsNotNone(skill.title_vector)
+        self.assertIn(resource.url, [item.url for item in vector_fuzzy_search("python tutorial", "title_vector")])
+
+        # Promoted once, however often it is returned afterwards
+        search_web("python tutorials")
+        self.assertEqual(SkillCatalog.objects.filter(url=resource.url).count(), 1)
+
+    @mock.patch.object(external_resources, "EXTERNAL_RESOURCE_PROMOTION", False)
+    @mock.patch.object(external_resources, "EXTERNAL_RESOURCE_PROMOTE_AFTER", 1)
+    def test_promotion_can_be_disabled(self):
+        search_web("python tutorials")
+
+        self.assertFalse(SkillCatalog.objects.exists())
+        self.assertFalse(ExternalResource.objects.filter(promoted_skill__isnull=False).exists())
+
+    @mock.patch.object(external_resources, "EXTERNAL_SEARCH_STORE_ENABLED", False)
+    def test_store_can_be_disabled(self):
+        search_web("python tutorials")
+        search_web("python tutorials")
+
+        self.assertEqual(len(self.tavily.calls), 2)
+        self.assertFalse(ExternalSearch.objects.exists())
+
+
+class LocalChatModel(BaseChatModel):
+    """
+    Stand-in chat model: answers with its reply after queued seconds in the rate limit scheduler's
+    queue and delay seconds of its own, or raises when failing. Records the keyword arguments of
+    every call.
+    """
+
+    reply: str
+    queued: float = 0.0
+    delay: float = 0.0
+    failing: bool = False
+    calls: list = Field(default_factory=list)
+
+    @property
+    def _llm_type(self) -> str:
+        return "local"
+
+    def bind_tools(self, tools, **kwargs):
+        return self.bind(tools=tools, **kwargs)
+
+    def _result(self, kwargs):
+        self.calls.append(kwargs)
+        if self.failing:
+            raise ConnectionError(f"{self.reply} is down")
+        return ChatResult(generations=[ChatGeneration(message=AIMessage(content=self.reply))])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs):
+        with llm_scheduler._waiting_in_queue():
+            time.sleep(self.queued)
+        time.sleep(self.delay)
+        return self._result(kwargs)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs):
+        with llm_scheduler._waiting_in_queue():
+            await asyncio.sleep(self.queued)
+        await asyncio.sleep(self.delay)
+        return self._result(kwargs)
+
+
+def resilient(*models, hedging=False):
+    # Breakers are per model name and process, so every test gets its own names
+    names = [f"{model.reply}-{uuid.uuid4().hex[:8]}" for model in models]
+    return ResilientChatModel(models=list(models), names=names, hedging=hedging)
+
+
+class ResilientChatModelTests(SimpleTestCase):
+    def test_primary_answers(self):
+        primary, fallback = LocalChatModel(reply="primary"), LocalChatModel(reply="fallback")
+
+        self.assertEqual(resilient(primary, fallback).invoke("hi").content, "primary")
+        self.assertEqual(len(fallback.calls), 0)
+
+    def test_failed_primary_falls_back(self):
+        primary, fallback = LocalChatModel(reply="primary", failing=True), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback)
+
+        self.assertEqual(llm.invoke("hi").content, "fallback")
+        self.assertEqual(get_breaker(llm.names[0]).stats["failures"], 1)
+        self.assertEqual(get_breaker(llm.names[1]).stats["fallbacks"], 1)
+
+    @mock.patch.object(resilient_llm, "LLM_BREAKER_FAILURE_THRESHOLD", 2)
+    def test_breaker_opens_after_consecutive_failures(self):
+        primary, fallback = LocalChatModel(reply="primary", failing=True), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback)
+
+        llm.invoke("one")
+        llm.invoke("two")
+        self.assertEqual(get_breaker(llm.names[0]).state, resilient_llm.OPEN)
+
+        self.assertEqual(llm.invoke("three").content, "fallback")
+        self.assertEqual(len(primary.calls), 2)
+
+    @mock.patch.object(resilient_llm, "LLM_BREAKER_FAILURE_THRESHOLD", 1)
+    @mock.patch.object(resilient_llm, "LLM_BREAKER_RESET_SECONDS", 0.05)
+    def test_open_breaker_is_probed_after_reset(self):
+        primary, fallback = LocalChatModel(reply="primary", failing=True), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback)
+        llm.invoke("one")
+
+        primary.failing = False
+        time.sleep(0.06)
+
+        self.assertEqual(llm.invoke("two").content, "primary")
+        self.assertEqual(get_breaker(llm.names[0]).state, resilient_llm.CLOSED)
+
+    @mock.patch.object(resilient_llm, "LLM_BREAKER_FAILURE_THRESHOLD", 1)
+    def test_all_breakers_open_fails_fast(self):
+        primary, fallback = LocalChatModel(reply="primary", failing=True), LocalChatModel(reply="fallback", failing=True)
+        llm = resilient(primary, fallback)
+
+        with self.assertRaises(ConnectionError):
+            llm.invoke("one")
+        with self.assertRaises(ModelsUnavailableError):
+            llm.invoke("two")
+        self.assertEqual((len(primary.calls), len(fallback.calls)), (1, 1))
+
+    @mock.patch.object(resilient_llm, "LLM_BREAKER_FAILURE_THRESHOLD", 1)
+    @mock.patch.object(resilient_llm, "LLM_LATENCY_SLO_SECONDS", 0.01)
+    def test_calls_slower_than_the_slo_open_the_breaker(self):
+        primary, fallback = LocalChatModel(reply="primary", delay=0.05), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback)
+
+        self.assertEqual(llm.invoke("one").content, "primary")
+        self.assertEqual(get_breaker(llm.names[0]).stats["slo_violations"], 1)
+        self.assertEqual(llm.invoke("two").content, "fallback")
+
+    @mock.patch.object(resilient_llm, "LLM_BREAKER_FAILURE_THRESHOLD", 1)
+    @mock.patch.object(resilient_llm, "LLM_LATENCY_SLO_SECONDS", 0.05)
+    def test_time_queued_in_the_scheduler_is_not_latency(self):
+        primary, fallback = LocalChatModel(reply="primary", queued=0.1), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback)
+
+        self.assertEqual(llm.invoke("one").content, "primary")
+        breaker = get_breaker(llm.names[0])
+        self.assertEqual((breaker.stats["slo_violations"], breaker.state), (0, resilient_llm.CLOSED))
+        self.assertLess(breaker.percentile(0.95), 0.05)
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_AFTER_SECONDS", 0.05)
+    def test_queued_primary_is_not_hedged(self):
+        primary, fallback = LocalChatModel(reply="primary", queued=0.2), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback, hedging=True)
+
+        self.assertEqual(llm.invoke("hi").content, "primary")
+        self.assertEqual(len(fallback.calls), 0)
+        self.assertEqual(get_breaker(llm.names[1]).stats["hedges"], 0)
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_AFTER_SECONDS", 0.05)
+    def test_primary_is_hedged_after_its_queue_wait(self):
+        primary, fallback = LocalChatModel(reply="primary", queued=0.1, delay=1.0), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback, hedging=True)
+
+        started = time.monotonic()
+        self.assertEqual(llm.invoke("hi").content, "fallback")
+        self.assertGreaterEqual(time.monotonic() - started, 0.14)
+        self.assertEqual(get_breaker(llm.names[1]).stats["hedges"], 1)
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_AFTER_SECONDS", 0.05)
+    def test_slow_primary_is_hedged(self):
+        primary, fallback = LocalChatModel(reply="primary", delay=1.0), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback, hedging=True)
+
+        started = time.monotonic()
+        self.assertEqual(llm.invoke("hi").content, "fallback")
+        self.assertLess(time.monotonic() - started, 0.5)
+        self.assertEqual(get_breaker(llm.names[1]).stats["hedges"], 1)
+        self.assertEqual(get_breaker(llm.names[1]).stats["hedges_won"], 1)
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_AFTER_SECONDS", 0.5)
+    def test_fast_primary_is_not_hedged(self):
+        primary, fallback = LocalChatModel(reply="primary"), LocalChatModel(reply="fallback")
+        llm = resilient(primary, fallback, hedging=True)
+
+        self.assertEqual(llm.invoke("hi").content, "primary")
+        self.assertEqual(len(fallback.calls), 0)
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_MIN_SAMPLES", 5)
+    def test_hedge_budget_is_the_p95_latency(self):
+        llm = resilient(LocalChatModel(reply="primary"), LocalChatModel(reply="fallback"), hedging=True)
+        breaker = get_breaker(llm.names[0])
+        self.assertIsNone(breaker.hedge_after())
+
+        for latency in (0.1, 0.1, 0.2, 0.2, 0.3, 0.3, 0.4, 0.4, 0.5, 2.0):
+            breaker.record(latency)
+        self.assertEqual(breaker.hedge_after(), 2.0)
+
+    def test_async_failed_primary_falls_back(self):
+        primary, fallback = LocalChatModel(reply="primary", failing=True), LocalChatModel(reply="fallback")
+
+        self.assertEqual(asyncio.run(resilient(primary, fallback).ainvoke("hi")).content, "fallback")
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_AFTER_SECONDS", 0.05)
+    def test_async_slow_primary_is_hedged(self):
+        primary, fallback = LocalChatModel(reply="primary", delay=1.0), LocalChatModel(reply="fallback")
+
+        started = time.monotonic()
+        self.assertEqual(asyncio.run(resilient(primary, fallback, hedging=True).ainvoke("hi")).content, "fallback")
+        self.assertLess(time.monotonic() - started, 0.5)
+
+    @mock.patch.object(resilient_llm, "LLM_HEDGE_AFTER_SECONDS", 0.05)
+    def test_async_queued_primary_is_not_hedged(self):
+        primary, fallback = LocalChatModel(reply="primary", queued=0.2), LocalChatModel(reply="fallback")
+
+        self.assertEqual(asyncio.run(resilient(primary, fallback, hedging=True).ainvoke("hi")).content, "primary")
+        self.assertEqual(len(fallback.calls), 0)
+
+    def test_bound_tools_reach_the_fallback(self):
+        @tool
+        def lookup(query: str) -> str:
+            """Looks something up."""
+            return query
+
+        primary, fallback = LocalChatModel(reply="primary", failing=True), LocalChatModel(reply="fallback")
+        resilient(primary, fallback).bind_tools([lookup], tool_choice="required").invoke("hi")
+
+        self.assertEqual(fallback.calls[-1]["tool_choice"], "required")
+        self.assertEqual(fallback.calls[-1]["tools"], primary.calls[-1]["tools"])
+
+
+def chat_request(model: str) -> httpx.Request:
+    return httpx.Request(
+        "POST",
+        "https://api.groq.com/openai/v1/chat/completions",
+        json={"model": model, "messages": [{"role": "user", "content": "hi"}], "max_tokens": 10},
+    )
+
+
+class LLMSchedulerTests(SimpleTestCase):
+    def setUp(self):
+        # Queues are per model name and process, so every test gets its own model
+        self.model = f"local-{uuid.uuid4().hex[:8]}"
+        patcher = mock.patch.object(llm_scheduler, "rate_limits_for", return_value={"rpm": 1, "tpm": 0})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cancelled_request_leaves_the_queue(self):
+        transport = AsyncSchedulingTransport(httpx.MockTransport(lambda request: httpx.Response(200, json={})))
+
+        async def scenario():
+            # One request per minute: the first takes the slot, the second waits for the next one
+            first = await transport.handle_async_request(chat_request(self.model))
+            waiting = asyncio.create_task(transport.handle_async_request(chat_request(self.model)))
+            await asyncio.sleep(0.1)
+            waiting.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiting
+            depth = llm_scheduler.get_scheduler_stats()["models"][self.model]["queue_depth"]
+
+            # The next minute starts: the request sent now must not wait behind the cancelled one
+            llm_scheduler._QUEUES[self.model].requests.level = 1.0
+            after = await asyncio.wait_for(transport.handle_async_request(chat_request(self.model)), timeout=5)
+            return first, depth, after
+
+        first, depth, after = asyncio.run(scenario())
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(depth, 0)
+        self.assertEqual(after.status_code, 200)
+
+    def test_token_bucket_follows_the_provider_headers(self):
+        headers = {"x-ratelimit-limit-tokens": "6000", "x-ratelimit-remaining-tokens": "100"}
+        transport = AsyncSchedulingTransport(httpx.MockTransport(lambda request: httpx.Response(200, headers=headers, json={})))
+
+        with mock.patch.object(llm_scheduler, "rate_limits_for", return_value={"rpm": 0, "tpm": 0}):
+            response = asyncio.run(transport.handle_async_request(chat_request(self.model)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(llm_scheduler.get_scheduler_stats()["models"][self.model]["limits"], {"rpm": 0, "tpm": 6000})
+        self.assertLessEqual(llm_scheduler._QUEUES[self.model].tokens.level, 100)
+
+    @mock.patch.object(model_config, "LLM_SCHEDULER_PROCESSES", 4)
+    @mock.patch.object(model_config, "MODEL_RATE_LIMITS", {"openai/gpt-oss-20b": {"rpm": 30, "tpm": 250000}})
+    def test_configured_limits_are_shared_by_the_processes(self):
+        self.assertEqual(model_config.rate_limits_for("groq:openai/gpt-oss-20b"), {"rpm": 7, "tpm": 62500})
+        self.assertEqual(model_config.rate_limits_for("llama-3.1-8b-instant"), {"rpm": 0, "tpm": 0})
@@ -5,5 +5,6 @@ from .auth import urlpatterns as auth_patterns
 from .opportunity import urlpatterns as opportunity_patterns
 from .cordinator import urlpatterns as coordinator_patterns
 from .hr_admin import urlpatterns as hr_admin_patterns
+from .jobs import urlpatterns as jobs_patterns
 
-urlpatterns = test_patterns + onboard_patterns + skill_patterns + auth_patterns + opportunity_patterns + coordinator_patterns + hr_admin_patterns
+urlpatterns = test_patterns + onboard_patterns + skill_patterns + auth_patterns + opportunity_patterns + coordinator_patterns + hr_admin_patterns + jobs_patterns
@@ -1,6 +1,11 @@
+from django.conf import settings
 from django.urls import path
-from api.views.cordinator import CoordinatorView
+from api.views.cordinator import CoordinatorView, CoordinatorStreamView, AsyncCoordinatorView, AsyncCoordinatorStreamView
+
+coordinator_view = AsyncCoordinatorView if settings.ASYNC_AGENT_VIEWS else CoordinatorView
+coordinator_stream_view = AsyncCoordinatorStreamView if settings.ASYNC_AGENT_VIEWS else CoordinatorStreamView
 
 urlpatterns = [
-    path('coordinator-ask/', CoordinatorView.as_view(), name='coordinator-ask'),
+    path('coordinator-ask/', coordinator_view.as_view(), name='coordinator-ask'),
+    path('coordinator-ask/stream/', coordinator_stream_view.as_view(), name='coordinator-ask-stream'),
 ]
\ No newline at end of file
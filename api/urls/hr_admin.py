@@ -1,8 +1,9 @@
 from django.urls import path
-from api.views.hr_admin import GlobalSkillTrendsView, GlobalNegativeFeedbackTrendsView, GetKPI
+from api.views.hr_admin import GlobalSkillTrendsView, GlobalNegativeFeedbackTrendsView, GetKPI, RuntimeStatsView
 
 urlpatterns = [
 	path('global-skill-trends/', GlobalSkillTrendsView.as_view(), name='global-skill-trends'),
 	path('global-negative-feedback-trends/', GlobalNegativeFeedbackTrendsView.as_view(), name='global-negative-feedback-trends'),
 	path('kpi/', GetKPI.as_view(), name='kpi-last-three-months'),
+	path('runtime-stats/', RuntimeStatsView.as_view(), name='runtime-stats'),
 ]
\ No newline at end of file
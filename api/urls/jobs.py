@@ -0,0 +1,6 @@
+from django.urls import path
+from api.views.jobs import JobStatusView
+
+urlpatterns = [
+	path('job-status/', JobStatusView.as_view(), name='job-status'),
+]
@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.urls import path
-from api.views.opportunity import FindMentorsView
+from api.views.opportunity import FindMentorsView, AsyncFindMentorsView
+
+find_mentors_view = AsyncFindMentorsView if settings.ASYNC_AGENT_VIEWS else FindMentorsView
 
 urlpatterns = [
-    path('find-mentors/', FindMentorsView.as_view(), name='find-mentors'),
+    path('find-mentors/', find_mentors_view.as_view(), name='find-mentors'),
 ]
\ No newline at end of file
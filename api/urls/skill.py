@@ -1,9 +1,12 @@
+from django.conf import settings
 from django.urls import path
-from api.views.skill import CreateSkillView, GetSkillRecommendationsView, UpdateSkillView, ListSkillView, DeleteSkillView, AddInterestedSkillView, GetInterestedSkillsView, DeleteInterestedSkillView
+from api.views.skill import CreateSkillView, GetSkillRecommendationsView, UpdateSkillView, ListSkillView, DeleteSkillView, AddInterestedSkillView, GetInterestedSkillsView, DeleteInterestedSkillView, AsyncGetSkillRecommendationsView
+
+get_skill_recommendations_view = AsyncGetSkillRecommendationsView if settings.ASYNC_AGENT_VIEWS else GetSkillRecommendationsView
 
 urlpatterns = [
     path('create-skill/', CreateSkillView.as_view(), name='create-skill'),
-    path('get-skill-recommendations/', GetSkillRecommendationsView.as_view(), name='get-skill-recommendations'),
+    path('get-skill-recommendations/', get_skill_recommendations_view.as_view(), name='get-skill-recommendations'),
     path('update-skill/', UpdateSkillView.as_view(), name='update-skill'),
     path('list-skill/', ListSkillView.as_view(), name='list-skill'),
     path('delete-skill/', DeleteSkillView.as_view(), name='delete-skill'),
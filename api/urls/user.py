@@ -1,8 +1,9 @@
 from django.urls import path
-from api.views.user import AddFeedbackView, ClassifyFeedbackView, SummariseFeedbackView
+from api.views.user import AddFeedbackView, ClassifyFeedbackView, SummariseFeedbackView, ListFeedbackView
 
 urlpatterns = [
     path('add-feedback/', AddFeedbackView.as_view(), name='add-feedback'),
     path('classify-feedback/', ClassifyFeedbackView.as_view(), name='classify-feedback'),
     path('summarise-feedback/', SummariseFeedbackView.as_view(), name='summarise-feedback'),
+    path('list-feedback/', ListFeedbackView.as_view(), name='list-feedback'),
 ]
@@ -0,0 +1,75 @@
+import json
+from django.http import JsonResponse
+from django.views import View
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from db.models.user import APIUser
+
+
+async def aauthenticate(request):
+    """
+    Async JWT authentication (same tokens as the DRF views): the token is validated in the event loop
+    and the user is loaded with the async ORM. Returns the user or None.
+    Raises InvalidToken for malformed or expired tokens.
+    """
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    if header is None:
+        return None
+
+    raw_token = authentication.get_raw_token(header)
+    if raw_token is None:
+        return None
+
+    validated_token = authentication.get_validated_token(raw_token)
+    try:
+        user = await APIUser.objects.aget(**{api_settings.USER_ID_FIELD: validated_token[api_settings.USER_ID_CLAIM]})
+    except (KeyError, APIUser.DoesNotExist):
+        return None
+    return user if user.is_active else None
+
+
+class AsyncAPIView(View):
+    """
+    Async counterpart of the DRF APIView for the LLM-backed endpoints (DRF views are sync only).
+    Authenticates the bearer token, parses the JSON body into request.data and awaits the async
+    post handler, so a worker's event loop keeps serving other requests while the LLM is working.
+    Error responses match the DRF ones.
+    """
+    http_method_names = ["post", "options"]
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # Token authenticated like the DRF views, which are CSRF exempt as well
+        view.csrf_exempt = True
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        handler = getattr(self, request.method.lower(), None)
+        if request.method.lower() not in self.http_method_names or handler is None:
+            return JsonResponse({"detail": f'Method "{request.method}" not allowed.'}, status=405)
+
+        try:
+            user = await aauthenticate(request)
+        except (InvalidToken, TokenError):
+            return JsonResponse({"detail": "Given token not valid for any token type"}, status=401)
+        if user is None:
+            return JsonResponse({"detail": "Authentication credentials were not provided."}, status=401)
+
+        try:
+            data = json.loads(request.body or b"{}")
+        except ValueError:
+            return JsonResponse({"detail": "JSON parse error"}, status=400)
+        if not isinstance(data, dict):
+            return JsonResponse({"detail": "JSON object expected"}, status=400)
+
+        request.user = user
+        request.data = data
+        return await handler(request, *args, **kwargs)
+
+    async def options(self, request, *args, **kwargs):
+        response = JsonResponse({})
+        response["Allow"] = "POST, OPTIONS"
+        return response
@@ -2,11 +2,18 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from agents.agents.cordinator import invoke_coordinator
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from agents.agents.cordinator import ainvoke_coordinator, invoke_coordinator
+from agents.agents.cordinator_stream import astream_coordinator, stream_coordinator
 from agents.agents.safety import check_prompt_safety, redact_pii
 from db.models.user import APIUser
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
+from django.http import JsonResponse, StreamingHttpResponse
+from asgiref.sync import sync_to_async
+from api.views.async_base import AsyncAPIView
+from agents.agents.checkpoints import AGENT_RUN_ID_HEADER, arun_agent_with_retries, new_run_id, run_agent_with_retries
+import json
 
 
 class CoordinatorView(APIView):
@@ -32,24 +39,151 @@ class CoordinatorView(APIView):
 
         query = redact_pii(query)
 
+        run_id = request.data.get("run_id") or new_run_id()
         try:
             # Call the coordinator agent
-            response = None
-            e = None
-            for _ in range(3):
-                try:
-                    response = invoke_coordinator(user_input=query, user_email=user.email)
-                    break
-                except Exception as _e:
-                    print(f"Error {_e} at retry {_}")
-                    e = _e
-            else:
-                if e:
-                    raise Exception(e)
-            
-            return Response(response, status=status.HTTP_200_OK)
+            response = run_agent_with_retries(
+                user, run_id, lambda: invoke_coordinator(user_input=query, user_email=user.email)
+            )
+            return Response(response, status=status.HTTP_200_OK, headers={AGENT_RUN_ID_HEADER: run_id})
         except Exception as e:
             return Response(
                 {"error": f"Failed to process query: {str(e)}"},
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
+
+
+
+class EventStreamRenderer(BaseRenderer):
+    """
+    Lets clients send `Accept: text/event-stream`; non-streamed responses (errors) are written as JSON.
+    """
+    media_type = "text/event-stream"
+    format = "event-stream"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data).encode("utf-8")
+
+
+def format_sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+class CoordinatorStreamView(APIView):
+    """
+    Streaming variant of coordinator-ask: returns server-sent events (tool start / end, sub-agent progress,
+    answer tokens) while the coordinator runs, and the parsed answer as the final event.
+    """
+    permission_classes = [IsAuthenticated]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    def post(self, request):
+        user = request.user
+        query = request.data.get("query")
+
+        if not query:
+            return Response(
+                {"error": "Query is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not check_prompt_safety(query):
+            return Response(
+                {"message": "Prompt is not safe for further processing or LLM!"},
+                status=status.HTTP_406_NOT_ACCEPTABLE,
+            )
+
+        query = redact_pii(query)
+
+        def events():
+            # Sent right away so the client sees the request was accepted
+            yield format_sse("start", {"query": query})
+            for event, data in stream_coordinator(query, user.email):
+                if event == "heartbeat":
+                    yield ": keep-alive\n\n"
+                else:
+                    yield format_sse(event, data)
+            yield format_sse("done", {})
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Stop nginx-style proxies from buffering the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
+
+
+
+class AsyncCoordinatorView(AsyncAPIView):
+    """
+    Async variant of CoordinatorView (served when ASYNC_AGENT_VIEWS is enabled under ASGI).
+    """
+
+    async def post(self, request):
+        user = request.user
+        query = request.data.get("query")
+
+        if not query:
+            return JsonResponse(
+                {"error": "Query is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # torch models and KPI writes run in a worker thread
+        if not await sync_to_async(check_prompt_safety)(query):
+            return JsonResponse(
+                {"message": "Prompt is not safe for further processing or LLM!"},
+                status=status.HTTP_406_NOT_ACCEPTABLE,
+            )
+
+        query = await sync_to_async(redact_pii)(query)
+
+        run_id = request.data.get("run_id") or new_run_id()
+        try:
+            response = await arun_agent_with_retries(
+                user, run_id, lambda: ainvoke_coordinator(user_input=query, user_email=user.email)
+            )
+            return JsonResponse(response, status=status.HTTP_200_OK, safe=False, headers={AGENT_RUN_ID_HEADER: run_id})
+        except Exception as e:
+            return JsonResponse(
+                {"error": f"Failed to process query: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+class AsyncCoordinatorStreamView(AsyncAPIView):
+    """
+    Async variant of CoordinatorStreamView. Under ASGI the events must come from an async iterator,
+    otherwise Django collects the whole stream before sending it.
+    """
+
+    async def post(self, request):
+        user = request.user
+        query = request.data.get("query")
+
+        if not query:
+            return JsonResponse(
+                {"error": "Query is required."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if not await sync_to_async(check_prompt_safety)(query):
+            return JsonResponse(
+                {"message": "Prompt is not safe for further processing or LLM!"},
+                status=status.HTTP_406_NOT_ACCEPTABLE,
+            )
+
+        query = await sync_to_async(redact_pii)(query)
+
+        async def events():
+            yield format_sse("start", {"query": query})
+            async for event, data in astream_coordinator(query, user.email):
+                if event == "heartbeat":
+                    yield ": keep-alive\n\n"
+                else:
+                    yield format_sse(event, data)
+            yield format_sse("done", {})
+
+        response = StreamingHttpResponse(events(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        response["X-Accel-Buffering"] = "no"
+        return response
@@ -7,6 +7,13 @@ from datetime import timedelta
 from db.models.skill import InterestedSkill
 from db.models.feedback import NegativeFeedback
 from db.models.kpi import KPI
+from db.models.vector_column import VectorColumn
+from agents.agents.cache_keys import get_cache_stats
+from agents.agents.intent_router import get_router_stats
+from agents.agents.http_clients import get_http_stats
+from agents.agents.checkpoints import get_checkpoint_stats
+from agents.agents.llm_scheduler import get_scheduler_stats
+from agents.agents.resilient_llm import get_breaker_stats
 from datetime import date
 import numpy as np
 
@@ -47,10 +54,11 @@ class GlobalSkillTrendsView(APIView):
 		since = timezone.now() - timedelta(days=timeframe_days)
 
 		# Always fetch rows from database for fresh computation
+		vector_field = VectorColumn.for_field(InterestedSkill, "title_vector").active_field
 		qs = (
 			InterestedSkill.objects
-			.filter(set_at__gte=since, title_vector__isnull=False)
-			.only("id", "user", "skill_title", "title_vector")
+			.filter(set_at__gte=since, **{f"{vector_field}__isnull": False})
+			.only("id", "user", "skill_title", vector_field)
 			.order_by("id")
 		)
 		total = qs.count()
@@ -69,7 +77,7 @@ class GlobalSkillTrendsView(APIView):
 		titles = []
 		users = []
 		for it in items:
-			v = getattr(it, "title_vector", None)
+			v = getattr(it, vector_field, None)
 			if v is None:
 				continue
 			try:
@@ -187,10 +195,11 @@ class GlobalNegativeFeedbackTrendsView(APIView):
 		since = timezone.now() - timedelta(days=timeframe_days)
 
 		# Always fetch rows from database for fresh computation
+		vector_field = VectorColumn.for_field(NegativeFeedback, "feedback_vector").active_field
 		qs = (
 			NegativeFeedback.objects
-			.filter(created_at__gte=since, feedback_vector__isnull=False)
-			.only("id", "user", "feedback_text", "feedback_vector")
+			.filter(created_at__gte=since, **{f"{vector_field}__isnull": False})
+			.only("id", "user", "feedback_text", vector_field)
 			.order_by("id")
 		)
 		total = qs.count()
@@ -209,7 +218,7 @@ class GlobalNegativeFeedbackTrendsView(APIView):
 		feedbacks = []
 		users = []
 		for it in items:
-			v = getattr(it, "feedback_vector", None)
+			v = getattr(it, vector_field, None)
 			if v is None:
 				continue
 			try:
@@ -341,3 +350,21 @@ class GetKPI(APIView):
 		
 		return Response({"data": data_list}, status=status.HTTP_200_OK)
 
+
+
+class RuntimeStatsView(APIView):
+	"""
+	Returns in-process runtime counters of the worker that handled the request (cache hits / misses per namespace,
+	coordinator intent router fast path, outbound HTTP connection reuse, LLM rate limit queues, model circuit breakers).
+	"""
+	permission_classes = [IsSuperUser]
+
+	def post(self, request):
+		return Response({
+			"cache": get_cache_stats(),
+			"router": get_router_stats(),
+			"http": get_http_stats(),
+			"checkpoints": get_checkpoint_stats(),
+			"llm_scheduler": get_scheduler_stats(),
+			"breakers": get_breaker_stats(),
+		}, status=status.HTTP_200_OK)
@@ -0,0 +1,46 @@
+from rest_framework.views import APIView
+from rest_framework.response import Response
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from django.db.models import Q
+from db.models.job import Job
+
+
+class JobStatusView(APIView):
+	"""
+	Returns the status of a background job. Users can see the jobs they queued (or were merged into), superusers every job.
+	"""
+	permission_classes = [IsAuthenticated]
+
+	def post(self, request):
+		job_id = request.data.get("job_id")
+		if job_id is None:
+			return Response({"error": "job_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+		try:
+			job_id = int(job_id)
+		except (TypeError, ValueError):
+			return Response({"error": "job_id must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+
+		jobs = Job.objects.all()
+		if not request.user.is_superuser:
+			# Coalesced jobs list everyone whose request was merged into them
+			jobs = jobs.filter(Q(created_by=request.user) | Q(payload__requested_by__contains=[request.user.id]))
+
+		try:
+			job = jobs.get(id=job_id)
+		except Job.DoesNotExist:
+			return Response({"error": "Job not found"}, status=status.HTTP_404_NOT_FOUND)
+
+		return Response({
+			"job_id": job.id,
+			"task": job.task,
+			"status": job.status,
+			"attempts": job.attempts,
+			"max_attempts": job.max_attempts,
+			"run_after": job.run_after,
+			"created_at": job.created_at,
+			"finished_at": job.finished_at,
+			"result": job.result,
+			"last_error": job.last_error.strip().splitlines()[-1] if job.last_error else None,
+		}, status=status.HTTP_200_OK)
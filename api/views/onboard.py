@@ -3,11 +3,15 @@ from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from api.permissions import IsSuperUser
-from db.models.onboard import OnboardCatalog
-from agents.agents.onboard import run_onboard_agent
+from db.models.onboard import OnboardCatalog, OnboardChecklistProgress
+from agents.agents.onboard_plans import aonboard_plan_for, onboard_plan_for, schedule_onboard_plan_refresh
 from db.models.user import APIUser
 from db.models.kpi import KPI
 from agents.agents.safety import check_prompt_safety, redact_pii
+from api.views.async_base import AsyncAPIView
+from agents.agents.checkpoints import AGENT_RUN_ID_HEADER, arun_agent_with_retries, new_run_id, run_agent_with_retries
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 
 
 class CreateOnboardView(APIView):
@@ -44,6 +48,7 @@ class CreateOnboardView(APIView):
                 checklist=checklist,
                 resources=resources,
             )
+            schedule_onboard_plan_refresh()
             return Response(
                 {
                     "message": "Onboarding item created successfully",
@@ -74,29 +79,20 @@ class GetOnboardView(APIView):
 
         additional_prompt = redact_pii(additional_prompt)
 
-        hr_supp_additional_prompt = f"{additional_prompt} | Supplementary (kinda important) HR dept query: {employee.onboard_supp_hr_query}"
-
         job_title = employee.job_title
         specialization = employee.specialization
 
+        def run():
+            # The role's precomputed plan, personalized only for an additional prompt or HR query
+            result = onboard_plan_for(job_title, specialization, additional_prompt, employee.onboard_supp_hr_query)
+            employee.onboard_json = result
+            employee.save(update_fields=["onboard_json"])
+            return result
+
+        run_id = request.data.get("run_id") or new_run_id()
         try:
-            result = None
-            e = None
-            for _ in range(3):
-                try:
-                    result = run_onboard_agent(
-                        hr_supp_additional_prompt, job_title, specialization
-                    )
-                    employee.onboard_json = result
-                    employee.save()
-                    break
-                except Exception as _e:
-                    print(f"Error {_e} at retry {_}")
-                    e = _e
-            else:
-                if e:
-                    raise Exception(e)
-            return Response(result, status=status.HTTP_200_OK)
+            result = run_agent_with_retries(employee, run_id, run)
+            return Response(result, status=status.HTTP_200_OK, headers={AGENT_RUN_ID_HEADER: run_id})
         except Exception as e:
             return Response(
                 {"error": f"Failed to run onboard agent: {str(e)}"},
@@ -157,6 +153,7 @@ class UpdateOnboardView(APIView):
             if resources is not None:
                 onboard_item.resources = resources
             onboard_item.save()
+            schedule_onboard_plan_refresh()
             return Response(
                 {
                     "message": "Onboarding item updated successfully",
@@ -249,6 +246,7 @@ class DeleteOnboardView(APIView):
 
         try:
             onboard_item.delete()
+            schedule_onboard_plan_refresh()
             return Response(
                 {"message": "Onboarding item deleted successfully"},
                 status=status.HTTP_200_OK,
@@ -266,11 +264,9 @@ class FinalizeOnboardView(APIView):
     def post(self, request):
         employee = request.user
         employee.onboard_finalized = True
-        employee.save()
+        employee.save(update_fields=["onboard_finalized"])
 
-        kpi = KPI.create_or_get_current_month()
-        kpi.assigned_onboard_tasks += len(employee.onboard_json["checklist"])
-        kpi.save()
+        KPI.increment(assigned_onboard_tasks=len(employee.onboard_json["checklist"]))
 
         return Response(
             {"message": "Onboard finalized successfully"},
@@ -278,6 +274,36 @@ class FinalizeOnboardView(APIView):
         )
 
 
+def complete_checklist_items(employee, checklist_items: list) -> Response:
+    """
+    Marks checklist items of the employee's onboard plan as completed. Items that were already
+    completed are ignored, and only newly completed ones are counted in the KPI.
+    """
+    checklist = (employee.onboard_json or {}).get("checklist") or []
+    unknown_items = set(checklist_items) - set(checklist)
+    if unknown_items:
+        return Response(
+            {
+                "error": "Checklist item not in original onboard checklist",
+                "items": sorted(unknown_items),
+            },
+            status=status.HTTP_400_BAD_REQUEST,
+        )
+
+    newly_completed = OnboardChecklistProgress.mark_completed(employee, checklist_items)
+    KPI.increment(completed_onboard_tasks=len(newly_completed))
+
+    return Response(
+        {
+            "message": "Checklist item marked as completed",
+            "newly_completed": newly_completed,
+            "completed_count": OnboardChecklistProgress.completed_count(employee, checklist),
+            "total_count": len(checklist),
+        },
+        status=status.HTTP_200_OK,
+    )
+
+
 class CompleteChecklistItemView(APIView):
     permission_classes = [IsAuthenticated]
 
@@ -290,25 +316,26 @@ class CompleteChecklistItemView(APIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        employee = request.user
+        return complete_checklist_items(request.user, [checklist_item])
 
-        if checklist_item not in employee.onboard_completed_checklist_items:
-            if checklist_item not in employee.onboard_json["checklist"]:
-                return Response(
-                    {"error": "Checklist item not in original onboard checklist"},
-                    status=status.HTTP_400_BAD_REQUEST,
-                )
-            employee.onboard_completed_checklist_items.append(checklist_item)
-            employee.save()
 
-            kpi = KPI.create_or_get_current_month()
-            kpi.completed_onboard_tasks += 1
-            kpi.save()
+class CompleteChecklistItemsView(APIView):
+    permission_classes = [IsAuthenticated]
 
-        return Response(
-            {"message": "Checklist item marked as completed"},
-            status=status.HTTP_200_OK,
-        )
+    def post(self, request):
+        checklist_items = request.data.get("checklist_items")
+
+        if (
+            not checklist_items
+            or not isinstance(checklist_items, list)
+            or not all(isinstance(item, str) and item for item in checklist_items)
+        ):
+            return Response(
+                {"error": "checklist_items must be a non-empty array of strings"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        return complete_checklist_items(request.user, checklist_items)
 
 
 class CheckFinalizeOnboardView(APIView):
@@ -334,3 +361,41 @@ class GetFinalizedOnboardView(APIView):
             },
             status=status.HTTP_200_OK,
         )
+
+
+class AsyncGetOnboardView(AsyncAPIView):
+    """
+    Async variant of GetOnboardView (served when ASYNC_AGENT_VIEWS is enabled under ASGI).
+    """
+
+    async def post(self, request):
+        employee = request.user
+        additional_prompt = request.data.get("additional_prompt", "")
+
+        # torch models and KPI writes run in a worker thread
+        if not await sync_to_async(check_prompt_safety)(additional_prompt):
+            return JsonResponse(
+                {"message": "Prompt is not safe for further processing or LLM!"},
+                status=status.HTTP_406_NOT_ACCEPTABLE,
+            )
+
+        additional_prompt = await sync_to_async(redact_pii)(additional_prompt)
+
+        async def run():
+            # The role's precomputed plan, personalized only for an additional prompt or HR query
+            result = await aonboard_plan_for(
+                employee.job_title, employee.specialization, additional_prompt, employee.onboard_supp_hr_query
+            )
+            employee.onboard_json = result
+            await employee.asave(update_fields=["onboard_json"])
+            return result
+
+        run_id = request.data.get("run_id") or new_run_id()
+        try:
+            result = await arun_agent_with_retries(employee, run_id, run)
+            return JsonResponse(result, status=status.HTTP_200_OK, safe=False, headers={AGENT_RUN_ID_HEADER: run_id})
+        except Exception as e:
+            return JsonResponse(
+                {"error": f"Failed to run onboard agent: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
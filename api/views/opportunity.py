@@ -2,7 +2,9 @@ from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
-from agents.agents.opportunity import find_mentors_for_improvements
+from django.http import JsonResponse
+from agents.agents.opportunity import afind_mentors_for_improvements, find_mentors_for_improvements
+from api.views.async_base import AsyncAPIView
 from db.models.user import APIUser
 
 
@@ -22,3 +24,23 @@ class FindMentorsView(APIView):
             return Response({"mentors": mentors}, status=status.HTTP_200_OK)
         except Exception as e:
             return Response({"error": f"Failed to find mentors: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+
+class AsyncFindMentorsView(AsyncAPIView):
+    """
+    Async variant of FindMentorsView (served when ASYNC_AGENT_VIEWS is enabled under ASGI).
+    """
+
+    async def post(self, request):
+        user = request.user
+        top_k = request.data.get("top_k", 3)
+
+        if not isinstance(top_k, int) or top_k <= 0:
+            return JsonResponse({"error": "top_k must be a positive integer."}, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
+            mentors = await afind_mentors_for_improvements(user_email=user.email, top_k=top_k)
+            return JsonResponse({"mentors": mentors}, status=status.HTTP_200_OK)
+        except Exception as e:
+            return JsonResponse({"error": f"Failed to find mentors: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
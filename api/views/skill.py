@@ -4,13 +4,16 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from api.permissions import IsSuperUser
 from db.models.skill import SkillCatalog, InterestedSkill
-from agents.agents.skill import run_skill_agent
+from agents.agents.skill import arun_skill_agent, run_skill_agent
 from db.models.user import APIUser
 from agents.agents.safety import check_prompt_safety, redact_pii
+from api.views.async_base import AsyncAPIView
+from agents.agents.checkpoints import AGENT_RUN_ID_HEADER, arun_agent_with_retries, new_run_id, run_agent_with_retries
+from asgiref.sync import sync_to_async
+from django.http import JsonResponse
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
-from db.models.embeddings import embeddings
-from pgvector.django import CosineDistance
+from db.models.vector_column import VectorColumn
 from django.db import transaction
 from django.utils import timezone
 
@@ -85,20 +88,12 @@ class GetSkillRecommendationsView(APIView):
 
         full_query = redact_pii(full_query)
 
+        run_id = request.data.get("run_id") or new_run_id()
         try:
-            result = None
-            e = None
-            for _ in range(3):
-                try:
-                    result = run_skill_agent(full_query.strip(), employee.email)
-                    break
-                except Exception as _e:
-                    print(f"Error {_e} at retry {_}")
-                    e = _e
-            else:
-                if e:
-                    raise Exception(e)
-            return Response(result, status=status.HTTP_200_OK)
+            result = run_agent_with_retries(
+                employee, run_id, lambda: run_skill_agent(full_query.strip(), employee.email, user=employee, mode=request.data.get("mode"))
+            )
+            return Response(result, status=status.HTTP_200_OK, headers={AGENT_RUN_ID_HEADER: run_id})
         except Exception as e:
             return Response(
                 {"error": f"Failed to get skill recommendations: {str(e)}"},
@@ -276,12 +271,13 @@ class AddInterestedSkillView(APIView):
         if resources is not None and not isinstance(resources, list):
             return Response({"error": "resources must be an array"}, status=status.HTTP_400_BAD_REQUEST)
 
-        title_vec = embeddings.embed_query(title)
+        title_column = VectorColumn.for_field(InterestedSkill, "title_vector")
+        title_vec = title_column.embed_query(title)
 
         # Vector similarity dedupe for this user
         top = (
-            InterestedSkill.objects.filter(user=user, title_vector__isnull=False)
-            .annotate(distance=CosineDistance("title_vector", title_vec))
+            InterestedSkill.objects.filter(user=user, **{f"{title_column.active_field}__isnull": False})
+            .annotate(distance=title_column.distance(title_vec))
             .order_by("distance")
             .first()
         )
@@ -300,14 +296,15 @@ class AddInterestedSkillView(APIView):
                     "similarity": round(similarity, 4),
                 }, status=status.HTTP_200_OK)
 
-        obj = InterestedSkill.objects.create(
+        obj = InterestedSkill(
             user=user,
             skill_title=title,
             skill_description=description,
             learning_outcomes=learning_outcomes or [],
             resources=resources or [],
-            title_vector=title_vec
         )
+        setattr(obj, title_column.active_field, title_vec)
+        obj.save()
 
         return Response({
             "message": "Added skill",
@@ -357,3 +354,46 @@ class DeleteInterestedSkillView(APIView):
             return Response({"error": f"Failed to delete interested skill: {str(e)}"}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+
+
+class AsyncGetSkillRecommendationsView(AsyncAPIView):
+    """
+    Async variant of GetSkillRecommendationsView (served when ASYNC_AGENT_VIEWS is enabled under ASGI).
+    Answers are cached by run_skill_agent (cache_page never stores POST responses).
+    """
+
+    async def post(self, request):
+        employee = request.user
+        skill_query = request.data.get("skill_query")
+
+        if not skill_query:
+            return JsonResponse(
+                {"error": "skill_query is required"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # torch models and KPI writes run in a worker thread
+        if not await sync_to_async(check_prompt_safety)(skill_query):
+            return JsonResponse(
+                {"message": "Prompt is not safe for further processing or LLM!"},
+                status=status.HTTP_406_NOT_ACCEPTABLE,
+            )
+
+        user_context = f"User context - Job Title: {employee.job_title}"
+        if employee.specialization:
+            user_context += f", Specialization: {employee.specialization}"
+        user_context += ". "
+
+        full_query = await sync_to_async(redact_pii)(f"{user_context}{skill_query}")
+
+        run_id = request.data.get("run_id") or new_run_id()
+        try:
+            result = await arun_agent_with_retries(
+                employee, run_id, lambda: arun_skill_agent(full_query.strip(), employee.email, user=employee, mode=request.data.get("mode"))
+            )
+            return JsonResponse(result, status=status.HTTP_200_OK, safe=False, headers={AGENT_RUN_ID_HEADER: run_id})
+        except Exception as e:
+            return JsonResponse(
+                {"error": f"Failed to get skill recommendations: {str(e)}"},
+                status=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
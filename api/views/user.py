@@ -4,36 +4,19 @@ from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 from db.models.kpi import KPI
 from db.models.user import APIUser
-from db.models.feedback import NegativeFeedback
-from agents.agents.feedback import classify_feedback, summarise_feedback_points
+from db.models.feedback import Feedback
+from agents.agents.feedback import classify_user_feedback, generate_insights
+from agents.jobs import enqueue_coalesced
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django.views.decorators.vary import vary_on_cookie
 from django.core.cache import cache
+from django.db import transaction
 import json
-import threading
-
-
-def process_feedback_background(user_email: str, new_feedbacks: list = []):
-    """
-    Background function to process feedback summarization.
-    This runs in a separate thread to avoid blocking the API response.
-    """
-    try:
-        user = APIUser.objects.get(email=user_email)
-        classify_feedback(user.feedbacks, True)
-        summary = summarise_feedback_points(new_feedbacks)
-        user.strengths.extend(summary["strengths_insights"])
-        user.improvements.extend(summary["improvements_insights"])
-        user.save()
-        
-        # Save each new improvement insight as a NegativeFeedback entry
-        for improvement in summary["improvements_insights"]:
-            NegativeFeedback.objects.create(user=user, feedback_text=improvement)
-        
-        print(f"Successfully processed feedback for {user_email}")
-    except Exception as e:
-        print(f"Background task failed to process feedback for {user_email}: {str(e)}")
+import os
+
+# Feedback for a user is collected for this many seconds before it is processed as one batch
+FEEDBACK_COALESCE_WINDOW_SECONDS = int(os.getenv("FEEDBACK_COALESCE_WINDOW_SECONDS", "60"))
 
 
 class AddFeedbackView(APIView):
@@ -60,26 +43,30 @@ class AddFeedbackView(APIView):
             )
 
         try:
-            user = APIUser.objects.get(email=email)
+            user = APIUser.objects.only("id", "email").get(email=email)
 
             new_feedbacks = [fi for fi in feedback.split(".") if fi.strip()]
-            user.feedbacks.extend(new_feedbacks)
-            user.save()
+            with transaction.atomic():
+                created = Feedback.append(user, new_feedbacks, author=authenticated_user)
+
+                # Queue background processing of feedback summarization (picked up by run_job_worker).
+                # Feedback for the same user within the window joins the queued job and is processed in one run.
+                job = enqueue_coalesced(
+                    "process_feedback",
+                    f"process_feedback:{user.id}",
+                    {
+                        "user_email": email,
+                        "feedback_ids": [item.id for item in created],
+                        "requested_by": [authenticated_user.id],
+                    },
+                    window_seconds=FEEDBACK_COALESCE_WINDOW_SECONDS,
+                    created_by=authenticated_user,
+                )
             
-            kpi = KPI.create_or_get_current_month()
-            kpi.total_feedbacks_count += len(new_feedbacks)
-            kpi.save()
-
-            # Start background processing of feedback summarization
-            thread = threading.Thread(
-                target=process_feedback_background, 
-                args=(email,new_feedbacks),
-                daemon=True
-            )
-            thread.start()
+            KPI.increment(total_feedbacks_count=len(new_feedbacks))
             
             return Response(
-                {"message": "Feedback added successfully"}, status=status.HTTP_200_OK
+                {"message": "Feedback added successfully", "job_id": job.id}, status=status.HTTP_200_OK
             )
         except APIUser.DoesNotExist:
             return Response(
@@ -94,12 +81,12 @@ class ClassifyFeedbackView(APIView):
         # Get user from JWT token
         user = request.user
         
-        if not user.feedbacks:
+        if not Feedback.objects.filter(user=user).exists():
             return Response(
                 {"error": "No feedbacks found for this user"},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        classified = classify_feedback(user.feedbacks)
+        classified = classify_user_feedback(user)
         return Response(
             {"classified_feedback": classified}, status=status.HTTP_200_OK
         )
@@ -114,12 +101,12 @@ class SummariseFeedbackView(APIView):
         # Get user from JWT token
         user = request.user
         
-        if not user.feedbacks:
+        if not Feedback.objects.filter(user=user).exists():
             return Response(
                 {"error": "No feedbacks found for this user"},
                 status=status.HTTP_404_NOT_FOUND,
             )
-        summary = summarise_feedback_points(user.feedbacks)
+        summary = generate_insights(classify_user_feedback(user))
         user.strengths = summary["strengths_insights"]
         user.improvements = summary["improvements_insights"]
         user.save()
@@ -128,3 +115,35 @@ class SummariseFeedbackView(APIView):
         )
 
 
+class ListFeedbackView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        index_start = request.data.get("index_start", 0)
+        index_end = request.data.get("index_end", 50)
+
+        try:
+            index_start = int(index_start)
+            index_end = int(index_end)
+        except (TypeError, ValueError):
+            return Response(
+                {"error": "index_start and index_end must be integers"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        if index_start < 0 or index_end < index_start:
+            return Response(
+                {"error": "Invalid index range"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        feedbacks = (
+            Feedback.objects.filter(user=request.user)
+            .order_by("-created_at", "-id")
+            .only("id", "text", "created_at")[index_start:index_end]
+        )
+        data = [
+            {"id": item.id, "feedback": item.text, "created_at": item.created_at}
+            for item in feedbacks
+        ]
+        return Response({"feedbacks": data}, status=status.HTTP_200_OK)
@@ -0,0 +1,51 @@
+import time
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from db.management.commands.reembed_vectors import resolve_columns
+from db.models.vector_column import VectorColumn, embed_instances
+
+
+class Command(BaseCommand):
+    help = (
+        "Fills missing vectors (e.g. NegativeFeedback.feedback_vector) in chunks: one embed_documents call "
+        "and one bulk UPDATE per chunk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("columns", nargs="*", help="Columns as Model.field, e.g. NegativeFeedback.feedback_vector")
+        parser.add_argument("--all", action="store_true", help="Every embedded column of the db app")
+        parser.add_argument("--chunk-size", type=int, default=256, help="Rows per embedding batch and transaction")
+
+    def handle(self, *args, **options):
+        pairs = resolve_columns(options["columns"], options["all"])
+        if not pairs:
+            raise CommandError("Give at least one column or --all")
+
+        for model, field in pairs:
+            column = VectorColumn.for_field(model, field, refresh=True)
+            slot_fields = [slot_field for slot_field, _ in column.written_slots()]
+            label = f"{model._meta.label}.{field}"
+            missing = model.objects.filter(**{f"{column.active_field}__isnull": True})
+            total = missing.count()
+            done = 0
+            last_pk = 0
+            started = time.monotonic()
+
+            while True:
+                with transaction.atomic():
+                    rows = list(
+                        missing.select_for_update(skip_locked=True)
+                        .filter(pk__gt=last_pk)
+                        .order_by("pk")[: options["chunk_size"]]
+                    )
+                    if not rows:
+                        break
+                    last_pk = rows[-1].pk
+                    embed_instances(rows, fields=[field], only_missing=True)
+                    model.objects.bulk_update(rows, slot_fields)
+
+                done += len(rows)
+                elapsed = time.monotonic() - started
+                self.stdout.write(f"{label}: {done}/{total} rows, {done / elapsed if elapsed > 0 else 0:.1f} rows/s")
+
+            self.stdout.write(self.style.SUCCESS(f"{label}: backfilled {done} rows"))
@@ -0,0 +1,189 @@
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from db.models.embeddings import get_embeddings, get_embedding_dimensions
+from db.models.vector_column import (
+    VECTOR_COLUMN_CACHE_SECONDS,
+    VectorColumn,
+    embed_sources,
+    rebuild_index,
+    start_reembed,
+    switch_active_slot,
+)
+
+
+def resolve_columns(targets: list, all_columns: bool) -> list:
+    """
+    Turns 'Model.field' / 'app.Model.field' arguments (or --all) into (model, field) pairs.
+    """
+    if all_columns:
+        return [
+            (model, field)
+            for model in apps.get_app_config("db").get_models()
+            for field in getattr(model, "VECTOR_SOURCES", {})
+        ]
+
+    pairs = []
+    for target in targets:
+        parts = target.split(".")
+        if len(parts) == 2:
+            parts = ["db"] + parts
+        if len(parts) != 3:
+            raise CommandError(f"'{target}' must look like Model.field or app.Model.field")
+        try:
+            model = apps.get_model(parts[0], parts[1])
+        except LookupError as e:
+            raise CommandError(str(e))
+        if parts[2] not in getattr(model, "VECTOR_SOURCES", {}):
+            raise CommandError(f"{model.__name__} has no embedded field '{parts[2]}'")
+        pairs.append((model, parts[2]))
+    return pairs
+
+
+class Command(BaseCommand):
+    help = (
+        "Re-embeds vector columns into their inactive (shadow) slot with another embedding model, in "
+        "resumable and throttled chunks, then rebuilds the slot's HNSW index. Reads keep using the active "
+        "slot until --switch (or the switch_vector_column command) cuts them over."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("columns", nargs="*", help="Columns as Model.field, e.g. SkillCatalog.title_vector")
+        parser.add_argument("--all", action="store_true", help="Every embedded column of the db app")
+        parser.add_argument("--to-model", help="Embedding model to re-embed with (HuggingFace name)")
+        parser.add_argument("--chunk-size", type=int, default=128, help="Rows per embedding batch and transaction")
+        parser.add_argument("--sleep", type=float, default=0.0, help="Seconds to pause between chunks")
+        parser.add_argument("--max-rows-per-second", type=float, default=0.0, help="Throughput cap (0 = no cap)")
+        parser.add_argument("--restart", action="store_true", help="Discard saved progress and start from the first row")
+        parser.add_argument("--switch", action="store_true", help="Switch reads to the new slot once it is complete")
+        parser.add_argument("--status", action="store_true", help="Only print the registry and re-embed progress")
+
+    def handle(self, *args, **options):
+        pairs = resolve_columns(options["columns"], options["all"])
+
+        if options["status"]:
+            self.print_status(pairs)
+            return
+
+        if not pairs:
+            raise CommandError("Give at least one column or --all")
+        if not options["to_model"]:
+            raise CommandError("--to-model is required")
+
+        for model, field in pairs:
+            column = self.reembed(model, field, options)
+            if options["switch"]:
+                column = switch_active_slot(column)
+                self.stdout.write(self.style.SUCCESS(f"{column}: reads switched to the {column.active_slot} slot"))
+
+    def print_status(self, pairs: list):
+        columns = VectorColumn.objects.order_by("table", "field")
+        if pairs:
+            columns = [VectorColumn.for_field(model, field, refresh=True) for model, field in pairs]
+        for column in columns:
+            model = apps.get_model(column.table)
+            total = model.objects.count()
+            line = (
+                f"{column.table}.{column.field}: reads {column.active_slot} "
+                f"({column.active_model}, {column.active_dimensions}d)"
+            )
+            if column.inactive_model:
+                state = "complete" if column.reembed_completed_at else f"{column.reembed_processed}/{total} rows"
+                line += (
+                    f" | {column.inactive_slot}: {column.inactive_model}, "
+                    f"{column.slot_dimensions(column.inactive_slot)}d, {state}"
+                )
+            self.stdout.write(line)
+
+    def reembed(self, model, field: str, options: dict) -> VectorColumn:
+        label = f"{model._meta.label}.{field}"
+        target_model = options["to_model"]
+        column = VectorColumn.for_field(model, field, refresh=True)
+
+        if column.active_model == target_model:
+            self.stdout.write(f"{label}: reads already use {target_model}, nothing to do")
+            return column
+
+        resuming = (
+            column.inactive_model == target_model
+            and column.reembed_started_at is not None
+            and not options["restart"]
+        )
+        if resuming and column.reembed_completed_at:
+            self.stdout.write(f"{label}: {column.inactive_slot} slot already holds {target_model}")
+            return column
+
+        if resuming:
+            self.stdout.write(f"{label}: resuming after pk {column.reembed_cursor} ({column.reembed_processed} rows done)")
+        else:
+            start_reembed(column, target_model, get_embedding_dimensions(target_model))
+            self.stdout.write(
+                f"{label}: re-embedding into {column.inactive_field} with {target_model}; "
+                f"waiting {VECTOR_COLUMN_CACHE_SECONDS}s for every worker to start dual-writing"
+            )
+            time.sleep(VECTOR_COLUMN_CACHE_SECONDS)
+
+        embedder = get_embeddings(target_model)
+        source_fn = model.VECTOR_SOURCES[field]
+        chunk_size = max(1, options["chunk_size"])
+        total = model.objects.count()
+        done = 0
+        started = time.monotonic()
+
+        while True:
+            chunk_started = time.monotonic()
+            with transaction.atomic():
+                # Lock the chunk so a concurrent save cannot be overwritten with a vector of its old text
+                rows = list(
+                    model.objects.select_for_update()
+                    .filter(pk__gt=column.reembed_cursor)
+                    .order_by("pk")[:chunk_size]
+                )
+                if not rows:
+                    break
+                vectors = embed_sources(embedder, [source_fn(row) for row in rows])
+                for row, vector in zip(rows, vectors):
+                    setattr(row, column.inactive_field, vector)
+                model.objects.bulk_update(rows, [column.inactive_field])
+
+                column.reembed_cursor = rows[-1].pk
+                column.reembed_processed += len(rows)
+                VectorColumn.objects.filter(pk=column.pk).update(
+                    reembed_cursor=column.reembed_cursor,
+                    reembed_processed=column.reembed_processed,
+                )
+
+            done += len(rows)
+            elapsed = time.monotonic() - started
+            rate = done / elapsed if elapsed > 0 else 0.0
+            remaining = max(total - column.reembed_processed, 0)
+            eta = remaining / rate if rate > 0 else 0.0
+            self.stdout.write(
+                f"{label}: {column.reembed_processed}/{total} rows "
+                f"({100 * min(column.reembed_processed / max(total, 1), 1):.1f}%), "
+                f"{rate:.1f} rows/s, eta {eta:.0f}s"
+            )
+
+            pause = options["sleep"]
+            if options["max_rows_per_second"] > 0:
+                min_duration = len(rows) / options["max_rows_per_second"]
+                pause = max(pause, min_duration - (time.monotonic() - chunk_started))
+            if pause > 0:
+                time.sleep(pause)
+
+        self.stdout.write(f"{label}: rebuilding index {column.index_name(column.inactive_slot)}")
+        index_started = time.monotonic()
+        rebuild_index(column, column.inactive_slot)
+
+        column.reembed_completed_at = timezone.now()
+        VectorColumn.objects.filter(pk=column.pk).update(reembed_completed_at=column.reembed_completed_at)
+        column = VectorColumn.for_field(model, field, refresh=True)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f"{label}: {done} rows in {elapsed:.1f}s ({done / elapsed if elapsed > 0 else 0:.1f} rows/s), "
+            f"index built in {time.monotonic() - index_started:.1f}s"
+        ))
+        return column
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand, CommandError
+from db.management.commands.reembed_vectors import resolve_columns
+from db.models.vector_column import VectorColumn, switch_active_slot
+
+
+class Command(BaseCommand):
+    help = (
+        "Atomically switches reads of vector columns to their re-embedded slot. Running it again switches "
+        "back, as long as the previous slot was not released."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("columns", nargs="*", help="Columns as Model.field, e.g. SkillCatalog.title_vector")
+        parser.add_argument("--all", action="store_true", help="Every embedded column of the db app")
+        parser.add_argument(
+            "--release-previous",
+            action="store_true",
+            help="Forget the model of the previous slot so saves stop dual-writing it (no switching back)",
+        )
+
+    def handle(self, *args, **options):
+        pairs = resolve_columns(options["columns"], options["all"])
+        if not pairs:
+            raise CommandError("Give at least one column or --all")
+
+        for model, field in pairs:
+            column = VectorColumn.for_field(model, field, refresh=True)
+            try:
+                column = switch_active_slot(column, release_previous=options["release_previous"])
+            except Exception as e:
+                raise CommandError(str(e))
+            self.stdout.write(self.style.SUCCESS(
+                f"{model._meta.label}.{field}: reads now use {column.active_field} ({column.active_model})"
+            ))
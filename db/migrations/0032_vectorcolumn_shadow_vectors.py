@@ -0,0 +1,165 @@
+# Generated by Django 5.2.5 on 2026-10-19 10:12
+
+import pgvector.django.vector
+from django.db import migrations, models
+
+# Every vector column that existed before the registry, all produced by all-MiniLM-L6-v2
+VECTOR_COLUMNS = [
+    ("db.apiuser", "db_apiuser", "strengths_vector"),
+    ("db.onboardcatalog", "db_onboardcatalog", "title_vector"),
+    ("db.onboardcatalog", "db_onboardcatalog", "specialization_vector"),
+    ("db.onboardcatalog", "db_onboardcatalog", "tags_vector"),
+    ("db.skillcatalog", "db_skillcatalog", "title_vector"),
+    ("db.skillcatalog", "db_skillcatalog", "tags_vector"),
+    ("db.skillcatalog", "db_skillcatalog", "type_vector"),
+    ("db.interestedskill", "db_interestedskill", "title_vector"),
+    ("db.negativefeedback", "db_negativefeedback", "feedback_vector"),
+]
+
+
+def register_existing_columns(apps, schema_editor):
+    VectorColumn = apps.get_model("db", "VectorColumn")
+    for label, _, field in VECTOR_COLUMNS:
+        VectorColumn.objects.get_or_create(
+            table=label,
+            field=field,
+            defaults={"primary_model": "all-MiniLM-L6-v2", "primary_dimensions": 384},
+        )
+
+
+def index_name(label, field):
+    return f"{label.replace('.', '_')}_{field}_hnsw"[:63]
+
+
+create_indexes = [
+    f'CREATE INDEX IF NOT EXISTS "{index_name(label, field)}" ON "{table}" USING hnsw ((("{field}")::vector(384)) vector_cosine_ops);'
+    for label, table, field in VECTOR_COLUMNS
+]
+drop_indexes = [
+    f'DROP INDEX IF EXISTS "{index_name(label, field)}";'
+    for label, _, field in VECTOR_COLUMNS
+]
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0031_apiuser_job_level'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VectorColumn',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('table', models.CharField(max_length=100, verbose_name='Model label of the table holding the vectors')),
+                ('field', models.CharField(max_length=100, verbose_name='Name of the primary vector column')),
+                ('active_slot', models.CharField(choices=[('primary', 'Primary column'), ('shadow', 'Shadow column')], default='primary', max_length=16, verbose_name='Slot that reads are served from')),
+                ('primary_model', models.CharField(blank=True, max_length=255, null=True, verbose_name='Embedding model behind the primary column')),
+                ('primary_dimensions', models.IntegerField(blank=True, null=True)),
+                ('shadow_model', models.CharField(blank=True, max_length=255, null=True, verbose_name='Embedding model behind the shadow column')),
+                ('shadow_dimensions', models.IntegerField(blank=True, null=True)),
+                ('reembed_cursor', models.BigIntegerField(default=0, verbose_name='Last primary key re-embedded into the inactive slot')),
+                ('reembed_processed', models.IntegerField(default=0, verbose_name='Rows re-embedded into the inactive slot')),
+                ('reembed_started_at', models.DateTimeField(blank=True, null=True)),
+                ('reembed_completed_at', models.DateTimeField(blank=True, null=True)),
+                ('switched_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('table', 'field')},
+            },
+        ),
+        migrations.AlterField(
+            model_name='apiuser',
+            name='strengths_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='onboardcatalog',
+            name='title_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='onboardcatalog',
+            name='specialization_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='onboardcatalog',
+            name='tags_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='skillcatalog',
+            name='title_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='skillcatalog',
+            name='tags_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='skillcatalog',
+            name='type_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='interestedskill',
+            name='title_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AlterField(
+            model_name='negativefeedback',
+            name='feedback_vector',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='apiuser',
+            name='strengths_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='onboardcatalog',
+            name='title_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='onboardcatalog',
+            name='specialization_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='onboardcatalog',
+            name='tags_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='skillcatalog',
+            name='title_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='skillcatalog',
+            name='tags_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='skillcatalog',
+            name='type_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='interestedskill',
+            name='title_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.AddField(
+            model_name='negativefeedback',
+            name='feedback_vector_shadow',
+            field=pgvector.django.vector.VectorField(null=True),
+        ),
+        migrations.RunPython(register_existing_columns, migrations.RunPython.noop),
+        migrations.RunSQL(sql=create_indexes, reverse_sql=drop_indexes),
+    ]
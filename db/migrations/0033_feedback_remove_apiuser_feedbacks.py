@@ -0,0 +1,54 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:02
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_feedbacks_to_table(apps, schema_editor):
+    APIUser = apps.get_model("db", "APIUser")
+    Feedback = apps.get_model("db", "Feedback")
+    for user in APIUser.objects.exclude(feedbacks=[]).only("id", "feedbacks").iterator(chunk_size=200):
+        Feedback.objects.bulk_create([Feedback(user_id=user.id, text=text) for text in user.feedbacks])
+
+
+def copy_feedbacks_to_array(apps, schema_editor):
+    APIUser = apps.get_model("db", "APIUser")
+    Feedback = apps.get_model("db", "Feedback")
+    texts_by_user = {}
+    for user_id, text in Feedback.objects.order_by("created_at", "id").values_list("user_id", "text"):
+        texts_by_user.setdefault(user_id, []).append(text)
+    for user_id, texts in texts_by_user.items():
+        APIUser.objects.filter(id=user_id).update(feedbacks=texts)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0032_vectorcolumn_shadow_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Feedback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('text', models.CharField(max_length=1000)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('is_flagged', models.BooleanField(blank=True, null=True, verbose_name='Flagged as biased by the hate speech filter')),
+                ('sentiment', models.CharField(blank=True, max_length=16, null=True, verbose_name='Sentiment label of the feedback')),
+                ('classified_at', models.DateTimeField(blank=True, null=True)),
+                ('author', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='authored_feedbacks', to=settings.AUTH_USER_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='received_feedbacks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['created_at', 'id'],
+                'indexes': [models.Index(fields=['user', 'created_at'], name='db_feedback_user_created_idx')],
+            },
+        ),
+        migrations.RunPython(copy_feedbacks_to_table, copy_feedbacks_to_array),
+        migrations.RemoveField(
+            model_name='apiuser',
+            name='feedbacks',
+        ),
+    ]
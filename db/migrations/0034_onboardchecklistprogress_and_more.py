@@ -0,0 +1,56 @@
+# Generated by Django 5.2.5 on 2026-10-19 11:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def copy_completed_items_to_table(apps, schema_editor):
+    APIUser = apps.get_model("db", "APIUser")
+    OnboardChecklistProgress = apps.get_model("db", "OnboardChecklistProgress")
+    users = APIUser.objects.exclude(onboard_completed_checklist_items=[]).only("id", "onboard_completed_checklist_items")
+    for user in users.iterator(chunk_size=200):
+        OnboardChecklistProgress.objects.bulk_create(
+            [
+                OnboardChecklistProgress(user_id=user.id, item=item)
+                for item in dict.fromkeys(user.onboard_completed_checklist_items)
+            ],
+            ignore_conflicts=True,
+        )
+
+
+def copy_completed_items_to_array(apps, schema_editor):
+    APIUser = apps.get_model("db", "APIUser")
+    OnboardChecklistProgress = apps.get_model("db", "OnboardChecklistProgress")
+    items_by_user = {}
+    for user_id, item in OnboardChecklistProgress.objects.order_by("completed_at", "id").values_list("user_id", "item"):
+        items_by_user.setdefault(user_id, []).append(item)
+    for user_id, items in items_by_user.items():
+        APIUser.objects.filter(id=user_id).update(onboard_completed_checklist_items=items)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0033_feedback_remove_apiuser_feedbacks'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnboardChecklistProgress',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('item', models.TextField()),
+                ('completed_at', models.DateTimeField(auto_now_add=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='checklist_progress', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('user', 'item'), name='db_checklist_progress_user_item_uniq')],
+            },
+        ),
+        migrations.RunPython(copy_completed_items_to_table, copy_completed_items_to_array),
+        migrations.RemoveField(
+            model_name='apiuser',
+            name='onboard_completed_checklist_items',
+        ),
+    ]
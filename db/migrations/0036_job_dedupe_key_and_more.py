@@ -0,0 +1,22 @@
+# Generated by Django 5.2.5 on 2026-10-19 13:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0035_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='job',
+            name='dedupe_key',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+        migrations.AddConstraint(
+            model_name='job',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'queued'), models.Q(('dedupe_key', ''), _negated=True)), fields=('dedupe_key',), name='db_job_queued_dedupe_key_uniq'),
+        ),
+    ]
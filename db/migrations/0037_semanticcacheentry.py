@@ -0,0 +1,58 @@
+# Generated by Django 5.2.5 on 2026-10-19 14:26
+
+import django.db.models.deletion
+import pgvector.django.vector
+from django.conf import settings
+from django.db import migrations, models
+
+INDEX_NAME = "db_semanticcacheentry_query_vector_hnsw"
+
+
+def register_query_vector(apps, schema_editor):
+    VectorColumn = apps.get_model("db", "VectorColumn")
+    VectorColumn.objects.get_or_create(
+        table="db.semanticcacheentry",
+        field="query_vector",
+        defaults={"primary_model": "all-MiniLM-L6-v2", "primary_dimensions": 384},
+    )
+
+
+def unregister_query_vector(apps, schema_editor):
+    VectorColumn = apps.get_model("db", "VectorColumn")
+    VectorColumn.objects.filter(table="db.semanticcacheentry", field="query_vector").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0036_job_dedupe_key_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SemanticCacheEntry',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('namespace', models.CharField(max_length=100)),
+                ('profile_fingerprint', models.CharField(max_length=64)),
+                ('job_title', models.CharField(blank=True, max_length=255, null=True)),
+                ('query_text', models.TextField()),
+                ('query_vector', pgvector.django.vector.VectorField(null=True)),
+                ('query_vector_shadow', pgvector.django.vector.VectorField(null=True)),
+                ('response', models.JSONField()),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+                ('expires_at', models.DateTimeField()),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='semantic_cache_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['user', 'namespace', 'profile_fingerprint'], name='db_semcache_user_ns_fp_idx')],
+            },
+        ),
+        migrations.RunPython(register_query_vector, unregister_query_vector),
+        migrations.RunSQL(
+            sql=f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "db_semanticcacheentry" USING hnsw ((("query_vector")::vector(384)) vector_cosine_ops);',
+            reverse_sql=f'DROP INDEX IF EXISTS "{INDEX_NAME}";',
+        ),
+    ]
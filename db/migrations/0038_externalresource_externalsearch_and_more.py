@@ -0,0 +1,85 @@
+# Generated by Django 5.2.5 on 2026-10-19 16:05
+
+import django.db.models.deletion
+import pgvector.django.vector
+from django.db import migrations, models
+
+INDEX_NAME = "db_externalsearch_query_vector_hnsw"
+
+
+def register_query_vector(apps, schema_editor):
+    VectorColumn = apps.get_model("db", "VectorColumn")
+    VectorColumn.objects.get_or_create(
+        table="db.externalsearch",
+        field="query_vector",
+        defaults={"primary_model": "all-MiniLM-L6-v2", "primary_dimensions": 384},
+    )
+
+
+def unregister_query_vector(apps, schema_editor):
+    VectorColumn = apps.get_model("db", "VectorColumn")
+    VectorColumn.objects.filter(table="db.externalsearch", field="query_vector").delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0037_semanticcacheentry'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ExternalResource',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=2048, unique=True)),
+                ('title', models.TextField(blank=True)),
+                ('content', models.TextField(blank=True)),
+                ('times_returned', models.IntegerField(default=0)),
+                ('first_seen_at', models.DateTimeField(auto_now_add=True)),
+                ('last_returned_at', models.DateTimeField(blank=True, null=True)),
+                ('promoted_skill', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='external_resources', to='db.skillcatalog')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='ExternalSearch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('provider', models.CharField(default='tavily', max_length=32)),
+                ('search_depth', models.CharField(default='basic', max_length=16)),
+                ('max_results', models.IntegerField()),
+                ('query_text', models.TextField()),
+                ('query_vector', pgvector.django.vector.VectorField(null=True)),
+                ('query_vector_shadow', pgvector.django.vector.VectorField(null=True)),
+                ('hit_count', models.IntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_hit_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['provider', 'search_depth', 'created_at'], name='db_extsearch_prov_depth_idx')],
+            },
+        ),
+        migrations.CreateModel(
+            name='ExternalSearchResult',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('rank', models.IntegerField()),
+                ('score', models.FloatField(blank=True, null=True)),
+                ('resource', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_results', to='db.externalresource')),
+                ('search', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_results', to='db.externalsearch')),
+            ],
+            options={
+                'unique_together': {('search', 'resource')},
+            },
+        ),
+        migrations.AddField(
+            model_name='externalsearch',
+            name='resources',
+            field=models.ManyToManyField(related_name='searches', through='db.ExternalSearchResult', to='db.externalresource'),
+        ),
+        migrations.RunPython(register_query_vector, unregister_query_vector),
+        migrations.RunSQL(
+            sql=f'CREATE INDEX IF NOT EXISTS "{INDEX_NAME}" ON "db_externalsearch" USING hnsw ((("query_vector")::vector(384)) vector_cosine_ops);',
+            reverse_sql=f'DROP INDEX IF EXISTS "{INDEX_NAME}";',
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.5 on 2026-10-19 17:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0038_externalresource_externalsearch_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OnboardPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_title', models.CharField(max_length=255)),
+                ('specialization', models.CharField(blank=True, default='', max_length=255)),
+                ('plan', models.JSONField()),
+                ('catalog_fingerprint', models.CharField(max_length=64)),
+                ('generated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('job_title', 'specialization'), name='db_onboard_plan_role_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.5 on 2026-10-19 18:40
+
+from django.db import migrations
+from db.models.external_resource import keyword_tags
+
+
+def purge_query_text(apps, schema_editor):
+    """
+    Stored searches may hold peer feedback sentences and promoted skills were tagged with those queries:
+    drop the searches and retag the skills created by a promotion from their resource. The cleared tag vectors are
+    filled again by `python manage.py backfill_vectors SkillCatalog.tags_vector`.
+    """
+    ExternalSearch = apps.get_model('db', 'ExternalSearch')
+    ExternalResource = apps.get_model('db', 'ExternalResource')
+    SkillCatalog = apps.get_model('db', 'SkillCatalog')
+
+    ExternalSearch.objects.all().delete()
+    for resource in ExternalResource.objects.filter(promoted_skill__isnull=False):
+        SkillCatalog.objects.filter(
+            id=resource.promoted_skill_id, type="online", title=(resource.title or resource.url)[:256]
+        ).update(
+            tags=[tag[:256] for tag in keyword_tags(resource.title, resource.content)],
+            tags_vector=None,
+            tags_vector_shadow=None,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('db', '0039_onboardplan'),
+    ]
+
+    operations = [
+        migrations.RunPython(purge_query_text, migrations.RunPython.noop),
+    ]
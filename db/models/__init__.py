@@ -1,5 +1,9 @@
+from .vector_column import *
 from .user import *
 from .onboard import *
 from .skill import *
 from .kpi import *
-from .feedback import *
\ No newline at end of file
+from .feedback import *
+from .job import *
+from .semantic_cache import *
+from .external_resource import *
\ No newline at end of file
@@ -1,7 +1,33 @@
 from langchain_huggingface import HuggingFaceEmbeddings
 from transformers import pipeline
+import os
+
+# Default model for vector columns that have no model recorded yet (see db.models.vector_column)
+EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+
+embeddings = HuggingFaceEmbeddings(model_name=EMBEDDING_MODEL)
+
+EMBEDDING_MODELS = {EMBEDDING_MODEL: embeddings}
+EMBEDDING_DIMENSIONS = {}
+
+
+def get_embeddings(model_name: str = EMBEDDING_MODEL) -> HuggingFaceEmbeddings:
+    """
+    Returns the embeddings client for the given model, loading it on first use.
+    """
+    if model_name not in EMBEDDING_MODELS:
+        EMBEDDING_MODELS[model_name] = HuggingFaceEmbeddings(model_name=model_name)
+    return EMBEDDING_MODELS[model_name]
+
+
+def get_embedding_dimensions(model_name: str = EMBEDDING_MODEL) -> int:
+    """
+    Returns the vector size produced by the given model (probed once and remembered).
+    """
+    if model_name not in EMBEDDING_DIMENSIONS:
+        EMBEDDING_DIMENSIONS[model_name] = len(get_embeddings(model_name).embed_query("dimension probe"))
+    return EMBEDDING_DIMENSIONS[model_name]
 
-embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
 
 # Here because more huggingface stuff here - move to feedback if we decide not to usethis anywhere else
 sentiment_analysis = pipeline(
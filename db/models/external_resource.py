@@ -0,0 +1,174 @@
+import re
+from collections import Counter
+from datetime import timedelta
+from django.db import models, transaction
+from django.utils import timezone
+from pgvector.django import VectorField
+from db.models.vector_column import VectorColumn, embed_instances
+from db.models.skill import SkillCatalog
+
+# Words that never become catalog tags of a promoted resource
+TAG_STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "how", "in", "into", "is", "it", "its",
+    "of", "on", "or", "our", "that", "the", "this", "to", "what", "with", "you", "your",
+}
+
+
+def keyword_tags(title: str, content: str = "", limit: int = 5) -> list:
+    """
+    Lowercase keywords of a resource: the title words in order, then the most frequent content words.
+    """
+    def words(text):
+        return [
+            word for word in re.findall(r"[a-z0-9][a-z0-9+#]*", (text or "").lower())
+            if len(word) > 1 and not word.isdigit() and word not in TAG_STOPWORDS
+        ]
+
+    tags = list(dict.fromkeys(words(title)))
+    tags += [word for word, _ in Counter(words(content)).most_common() if word not in tags]
+    return tags[:limit]
+
+
+class ExternalResource(models.Model):
+    """
+    A web resource returned by an external search (Tavily), stored once per URL.
+    Resources returned often can be promoted into SkillCatalog, so catalog searches find them.
+    """
+    url = models.URLField(max_length=2048, unique=True)
+    title = models.TextField(blank=True)
+    content = models.TextField(blank=True)
+
+    times_returned = models.IntegerField(default=0)
+    first_seen_at = models.DateTimeField(auto_now_add=True)
+    last_returned_at = models.DateTimeField(blank=True, null=True)
+    promoted_skill = models.ForeignKey(SkillCatalog, on_delete=models.SET_NULL, blank=True, null=True, related_name='external_resources')
+
+    def __str__(self):
+        return self.url
+
+    def as_result(self, score=None) -> dict:
+        return {"title": self.title, "url": self.url, "content": self.content, "score": score}
+
+    def promote(self, max_tags: int = 5) -> SkillCatalog:
+        """
+        Adds the resource to SkillCatalog (embedded like every catalog item) unless it is already there.
+        Its tags are keywords of its own title and content, never of the queries that returned it.
+        """
+        with transaction.atomic():
+            resource = ExternalResource.objects.select_for_update().get(id=self.id)
+            if resource.promoted_skill_id:
+                return resource.promoted_skill
+
+            skill = SkillCatalog.objects.filter(url=resource.url).first()
+            if skill is None:
+                skill = SkillCatalog.objects.create(
+                    title=(resource.title or resource.url)[:256],
+                    tags=[tag[:256] for tag in keyword_tags(resource.title, resource.content, max_tags)],
+                    type="online",
+                    url=resource.url,
+                )
+            resource.promoted_skill = skill
+            resource.save(update_fields=["promoted_skill"])
+        self.promoted_skill = skill
+        return skill
+
+
+class ExternalSearch(models.Model):
+    """
+    An external search with its query embedding and results, so near-duplicate queries are answered
+    from the stored results instead of calling the search API again.
+    """
+    provider = models.CharField(max_length=32, default="tavily")
+    search_depth = models.CharField(max_length=16, default="basic")
+    max_results = models.IntegerField()
+    query_text = models.TextField()
+    query_vector = VectorField(null=True)
+    query_vector_shadow = VectorField(null=True)
+    resources = models.ManyToManyField(ExternalResource, through='ExternalSearchResult', related_name='searches')
+
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(blank=True, null=True)
+
+    VECTOR_SOURCES = {
+        "query_vector": lambda search: " ".join(search.query_text.split()).lower(),  # Same text as the lookup query
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['provider', 'search_depth', 'created_at'], name='db_extsearch_prov_depth_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        embed_instances([self], only_missing=True)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def query_column(cls) -> VectorColumn:
+        return VectorColumn.for_field(cls, "query_vector")
+
+    @classmethod
+    def lookup(cls, query_vector: list, threshold: float, max_results: int, search_depth: str, max_age_days: int, provider: str = "tavily"):
+        """
+        Returns the closest stored search with at least max_results requested results that is not
+        older than max_age_days, if its cosine similarity to query_vector is at least threshold.
+        """
+        column = cls.query_column()
+        search = (
+            cls.objects.filter(
+                provider=provider,
+                search_depth=search_depth,
+                max_results__gte=max_results,
+                created_at__gt=timezone.now() - timedelta(days=max_age_days),
+                **{f"{column.active_field}__isnull": False},
+            )
+            .annotate(distance=column.distance(query_vector))
+            .order_by('distance')
+            .first()
+        )
+        if search is None or 1 - search.distance < threshold:
+            return None
+
+        cls.objects.filter(id=search.id).update(hit_count=models.F('hit_count') + 1, last_hit_at=timezone.now())
+        return search
+
+    @classmethod
+    def store(cls, query: str, query_vector: list, results: list, max_results: int, search_depth: str, provider: str = "tavily"):
+        """
+        Stores a search and its results (dicts with 'title', 'url', 'content', 'score'); resources seen
+        before are updated in place.
+        """
+        with transaction.atomic():
+            search = cls(provider=provider, search_depth=search_depth, max_results=max_results, query_text=query)
+            setattr(search, cls.query_column().active_field, query_vector)
+            search.save()
+
+            # First result per URL
+            unique_results = {}
+            for result in results:
+                if result.get("url"):
+                    unique_results.setdefault(result["url"], result)
+
+            for rank, result in enumerate(unique_results.values()):
+                resource, _ = ExternalResource.objects.update_or_create(
+                    url=result["url"],
+                    defaults={"title": result.get("title") or "", "content": result.get("content") or ""},
+                )
+                ExternalSearchResult.objects.create(search=search, resource=resource, rank=rank, score=result.get("score"))
+        return search
+
+    def results(self, max_results: int) -> list:
+        return [
+            result.resource.as_result(result.score)
+            for result in self.search_results.select_related('resource').order_by('rank')[:max_results]
+        ]
+
+
+class ExternalSearchResult(models.Model):
+    search = models.ForeignKey(ExternalSearch, on_delete=models.CASCADE, related_name='search_results')
+    resource = models.ForeignKey(ExternalResource, on_delete=models.CASCADE, related_name='search_results')
+    rank = models.IntegerField()
+    score = models.FloatField(blank=True, null=True)
+
+    class Meta:
+        unique_together = [['search', 'resource']]
@@ -1,20 +1,87 @@
-from django.db import models
+from django.db import models, transaction
 from pgvector.django import VectorField
-from db.models.embeddings import embeddings
+from db.models.vector_column import embed_instances
 from db.models.user import APIUser
 
 
+class Feedback(models.Model):
+    """
+    One feedback item left for a user. Append-only: new feedback is a plain INSERT and readers
+    page or stream through it instead of loading everything with the user row.
+    """
+    user = models.ForeignKey(APIUser, on_delete=models.CASCADE, related_name='received_feedbacks')
+    author = models.ForeignKey(APIUser, on_delete=models.SET_NULL, related_name='authored_feedbacks', blank=True, null=True)
+    text = models.CharField(max_length=1000)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    # Cached classification, filled in by the feedback pipeline (null = not classified yet)
+    is_flagged = models.BooleanField("Flagged as biased by the hate speech filter", blank=True, null=True)
+    sentiment = models.CharField("Sentiment label of the feedback", max_length=16, blank=True, null=True)
+    classified_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['created_at', 'id']
+        indexes = [
+            models.Index(fields=['user', 'created_at'], name='db_feedback_user_created_idx'),
+        ]
+
+    @classmethod
+    def append(cls, user, texts: list, author=None) -> list:
+        """
+        Adds feedback items for a user with a single INSERT and returns the created rows.
+        """
+        return cls.objects.bulk_create([cls(user=user, author=author, text=text) for text in texts])
+
+    @classmethod
+    def iter_texts(cls, user, chunk_size: int = 500):
+        """
+        Streams the feedback texts of a user, oldest first, without loading them all at once.
+        """
+        return cls.objects.filter(user=user).order_by('created_at', 'id').values_list('text', flat=True).iterator(chunk_size=chunk_size)
+
+    @classmethod
+    def classified(cls, user, ids: list = None) -> dict:
+        """
+        Strengths / improvements view of a user's already classified feedback: items that passed the
+        bias filter, split by their stored sentiment. Restricted to the given feedback ids if any.
+        """
+        items = cls.objects.filter(user=user, is_flagged=False)
+        if ids is not None:
+            items = items.filter(id__in=ids)
+
+        classified = {"strengths": [], "improvements": []}
+        for text, sentiment in items.order_by('created_at', 'id').values_list('text', 'sentiment'):
+            classified["strengths" if sentiment == "positive" else "improvements"].append(text)
+        return classified
+
+
 class NegativeFeedback(models.Model):
     user = models.ForeignKey(APIUser, on_delete=models.CASCADE, related_name='negative_feedbacks')
     feedback_text = models.TextField()
-    feedback_vector = VectorField(dimensions=384, null=True)
+    feedback_vector = VectorField(null=True)
+    feedback_vector_shadow = VectorField(null=True)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    VECTOR_SOURCES = {
+        "feedback_vector": lambda feedback: feedback.feedback_text,
+    }
+
     class Meta:
         ordering = ['-created_at']
 
     def save(self, *args, **kwargs):
-        if self.feedback_vector is None and self.feedback_text:
-            vec = embeddings.embed_query(self.feedback_text)
-            self.feedback_vector = vec
-        super().save(*args, **kwargs)
\ No newline at end of file
+        embed_instances([self], only_missing=True)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def create_many(cls, user, texts: list) -> list:
+        """
+        Creates one NegativeFeedback per text, embedding all texts with a single embed_documents
+        call and writing them with a single bulk INSERT.
+        """
+        items = [cls(user=user, feedback_text=text) for text in texts if text]
+        if not items:
+            return []
+        embed_instances(items)
+        with transaction.atomic():
+            return cls.objects.bulk_create(items)
\ No newline at end of file
@@ -0,0 +1,57 @@
+from django.db import models
+from django.utils import timezone
+from db.models.user import APIUser
+
+
+class Job(models.Model):
+    """
+    A unit of background work, picked up by `python manage.py run_job_worker`.
+    Workers claim jobs with SELECT ... FOR UPDATE SKIP LOCKED, so any number of them can share the table.
+    A running job whose locked_until has passed (worker died, hung call) is claimed again.
+    """
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    SUCCEEDED = 'succeeded'
+    FAILED = 'failed'
+    STATUS_CHOICES = [
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (SUCCEEDED, 'Succeeded'),
+        (FAILED, 'Failed'),
+    ]
+
+    task = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict)
+    # Jobs with the same key are coalesced while queued (at most one queued job per key)
+    dedupe_key = models.CharField(max_length=200, blank=True, default='')
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=QUEUED)
+
+    attempts = models.IntegerField(default=0)
+    max_attempts = models.IntegerField(default=5)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_until = models.DateTimeField(blank=True, null=True)
+    locked_by = models.CharField(max_length=100, blank=True, default='')
+
+    result = models.JSONField(blank=True, null=True)
+    last_error = models.TextField(blank=True, default='')
+    created_by = models.ForeignKey(APIUser, on_delete=models.SET_NULL, related_name='jobs', blank=True, null=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    finished_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        ordering = ['run_after', 'id']
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='db_job_status_run_after_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(
+                fields=['dedupe_key'],
+                condition=models.Q(status='queued') & ~models.Q(dedupe_key=''),
+                name='db_job_queued_dedupe_key_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
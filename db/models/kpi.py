@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import F
 from datetime import date
 
 class KPI(models.Model):
@@ -25,5 +26,15 @@ class KPI(models.Model):
             defaults={}
         )
         return kpi
-    
+
+    @classmethod
+    def increment(cls, **counts):
+        """
+        Atomically adds to counters of the current month, e.g. KPI.increment(completed_onboard_tasks=2).
+        """
+        counts = {field: amount for field, amount in counts.items() if amount}
+        if not counts:
+            return
+        kpi = cls.create_or_get_current_month()
+        cls.objects.filter(pk=kpi.pk).update(**{field: F(field) + amount for field, amount in counts.items()})
 
@@ -1,7 +1,8 @@
-from django.db import models
+from django.conf import settings
+from django.db import connection, models
 from django.contrib.postgres.fields import ArrayField
 from pgvector.django import VectorField 
-from db.models.embeddings import embeddings
+from db.models.vector_column import embed_instances
 
 class OnboardCatalog(models.Model):
     title = models.CharField(max_length=255, verbose_name="Job Title")
@@ -10,19 +11,88 @@ class OnboardCatalog(models.Model):
     checklist = ArrayField(models.CharField(max_length=255), default=list)
     resources = ArrayField(models.CharField(max_length=255), default=list)
 
-    title_vector = VectorField(dimensions=384, null=True)
-    specialization_vector = VectorField(dimensions=384, null=True)
-    tags_vector = VectorField(dimensions=384, null=True)
+    title_vector = VectorField(null=True)
+    specialization_vector = VectorField(null=True)
+    tags_vector = VectorField(null=True)
+
+    title_vector_shadow = VectorField(null=True)
+    specialization_vector_shadow = VectorField(null=True)
+    tags_vector_shadow = VectorField(null=True)
+
+    VECTOR_SOURCES = {
+        "title_vector": lambda item: item.title,
+        "specialization_vector": lambda item: item.specialization,
+        "tags_vector": lambda item: " ".join(item.tags),  # Concatenate tags for embedding
+    }
 
     def save(self, *args, **kwargs):
-        if self.title:
-            self.title_vector = embeddings.embed_query(self.title)
-        if self.specialization:
-            self.specialization_vector = embeddings.embed_query(self.specialization)
-        if self.tags:
-            tags_str = " ".join(self.tags)  # Concatenate tags for embedding
-            self.tags_vector = embeddings.embed_query(tags_str)
+        embed_instances([self])
         super().save(*args, **kwargs)
 
     def __str__(self):
         return self.title
+
+
+class OnboardChecklistProgress(models.Model):
+    """
+    One row per onboarding checklist item an employee has completed.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='checklist_progress')
+    item = models.TextField()
+    completed_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'item'], name='db_checklist_progress_user_item_uniq'),
+        ]
+
+    @classmethod
+    def mark_completed(cls, user, items: list) -> list:
+        """
+        Idempotently records checklist items as completed with a single INSERT ... ON CONFLICT DO NOTHING.
+
+        Returns:
+            The items that were not completed before this call.
+        """
+        if not items:
+            return []
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"""
+                INSERT INTO {cls._meta.db_table} (user_id, item, completed_at)
+                SELECT %s, item, now() FROM unnest(%s::text[]) AS item
+                ON CONFLICT (user_id, item) DO NOTHING
+                RETURNING item
+                """,
+                [user.pk, list(dict.fromkeys(items))],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    @classmethod
+    def completed_count(cls, user, checklist: list) -> int:
+        return cls.objects.filter(user=user, item__in=checklist).count()
+
+
+class OnboardPlan(models.Model):
+    """
+    Base onboarding plan of a role (job title + specialization), generated ahead of time for everyone
+    who has that role (see agents.agents.onboard_plans). catalog_fingerprint is the digest of the
+    OnboardCatalog items with its job title that the plan was generated from.
+    """
+    job_title = models.CharField(max_length=255)
+    specialization = models.CharField(max_length=255, blank=True, default="")
+    plan = models.JSONField()
+    catalog_fingerprint = models.CharField(max_length=64)
+    generated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['job_title', 'specialization'], name='db_onboard_plan_role_uniq'),
+        ]
+
+    def __str__(self):
+        return f"{self.job_title} - {self.specialization}" if self.specialization else self.job_title
+
+    @classmethod
+    def for_role(cls, job_title: str, specialization: str = None):
+        return cls.objects.filter(job_title=job_title, specialization=specialization or "").first()
@@ -0,0 +1,111 @@
+import hashlib
+import json
+from datetime import timedelta
+from django.db import models
+from django.utils import timezone
+from pgvector.django import VectorField
+from db.models.vector_column import VectorColumn, embed_instances
+from db.models.user import APIUser
+
+
+def profile_fingerprint(user) -> str:
+    """
+    Digest of everything a personalized answer depends on: role, insights and the latest feedback.
+    Cached answers are only reused while the user's fingerprint is unchanged.
+    """
+    latest_feedback_id = user.received_feedbacks.order_by('-id').values_list('id', flat=True).first()
+    profile = [user.job_title, user.specialization, user.strengths, user.improvements, latest_feedback_id]
+    return hashlib.sha256(json.dumps(profile, default=str).encode("utf-8")).hexdigest()
+
+
+class SemanticCacheEntry(models.Model):
+    """
+    A cached agent answer, looked up by embedding similarity of the query instead of the exact text,
+    so paraphrases of an earlier question reuse its answer.
+    """
+    user = models.ForeignKey(APIUser, on_delete=models.CASCADE, related_name='semantic_cache_entries')
+    namespace = models.CharField(max_length=100)
+    profile_fingerprint = models.CharField(max_length=64)
+    job_title = models.CharField(max_length=255, blank=True, null=True)
+    query_text = models.TextField()
+    query_vector = VectorField(null=True)
+    query_vector_shadow = VectorField(null=True)
+    response = models.JSONField()
+
+    hit_count = models.IntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_hit_at = models.DateTimeField(blank=True, null=True)
+    expires_at = models.DateTimeField()
+
+    # Embedded like the lookups (agents.agents.cache_keys.normalize), so a re-embed keeps them matching
+    VECTOR_SOURCES = {
+        "query_vector": lambda entry: " ".join(entry.query_text.split()).lower(),
+    }
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'namespace', 'profile_fingerprint'], name='db_semcache_user_ns_fp_idx'),
+        ]
+
+    def save(self, *args, **kwargs):
+        embed_instances([self], only_missing=True)
+        super().save(*args, **kwargs)
+
+    @classmethod
+    def query_column(cls) -> VectorColumn:
+        return VectorColumn.for_field(cls, "query_vector")
+
+    @classmethod
+    def lookup(cls, user, namespace: str, query_vector: list, threshold: float, fingerprint: str, same_role: bool = True):
+        """
+        Returns the closest live entry of the user if its cosine similarity to query_vector (embedded with
+        query_column().embed_query) is at least threshold.
+        """
+        column = cls.query_column()
+        entries = cls.objects.filter(
+            user=user,
+            namespace=namespace,
+            profile_fingerprint=fingerprint,
+            expires_at__gt=timezone.now(),
+            **{f"{column.active_field}__isnull": False},
+        )
+        if same_role:
+            entries = entries.filter(job_title=user.job_title)
+
+        entry = entries.annotate(distance=column.distance(query_vector)).order_by('distance').first()
+        if entry is None or 1 - entry.distance < threshold:
+            return None
+
+        cls.objects.filter(id=entry.id).update(hit_count=models.F('hit_count') + 1, last_hit_at=timezone.now())
+        return entry
+
+    @classmethod
+    def store(cls, user, namespace: str, query: str, query_vector: list, response, fingerprint: str, ttl_seconds: int):
+        """
+        Stores an answer and drops the user's entries that belong to an older profile or expired.
+        """
+        cls.objects.filter(user=user, namespace=namespace).exclude(
+            profile_fingerprint=fingerprint, expires_at__gt=timezone.now()
+        ).delete()
+        entry = cls(
+            user=user,
+            namespace=namespace,
+            profile_fingerprint=fingerprint,
+            job_title=user.job_title,
+            query_text=query,
+            response=response,
+            expires_at=timezone.now() + timedelta(seconds=ttl_seconds),
+        )
+        setattr(entry, cls.query_column().active_field, query_vector)
+        entry.save()
+        return entry
+
+    @classmethod
+    def invalidate(cls, user, namespace: str = None):
+        """
+        Drops the cached answers of a user (of one namespace, or all).
+        """
+        entries = cls.objects.filter(user=user)
+        if namespace:
+            entries = entries.filter(namespace=namespace)
+        entries.delete()
@@ -1,7 +1,7 @@
 from django.db import models
 from django.contrib.postgres.fields import ArrayField
 from pgvector.django import VectorField 
-from db.models.embeddings import embeddings
+from db.models.vector_column import embed_instances
 from django.utils import timezone
 from django.conf import settings
 
@@ -11,18 +11,22 @@ class SkillCatalog(models.Model):
     type = models.CharField(max_length=16, verbose_name="Resource Type")
     url = models.URLField(verbose_name="Resource URL")
 
-    title_vector = VectorField(dimensions=384, null=True)
-    tags_vector = VectorField(dimensions=384, null=True)
-    type_vector = VectorField(dimensions=384, null=True)
+    title_vector = VectorField(null=True)
+    tags_vector = VectorField(null=True)
+    type_vector = VectorField(null=True)
+
+    title_vector_shadow = VectorField(null=True)
+    tags_vector_shadow = VectorField(null=True)
+    type_vector_shadow = VectorField(null=True)
+
+    VECTOR_SOURCES = {
+        "title_vector": lambda skill: skill.title,
+        "tags_vector": lambda skill: " ".join(skill.tags),  # Concatenate tags for embedding
+        "type_vector": lambda skill: skill.type,
+    }
 
     def save(self, *args, **kwargs):
-        if self.title:
-            self.title_vector = embeddings.embed_query(self.title)
-        if self.tags:
-            tags_str = " ".join(self.tags)  # Concatenate tags for embedding
-            self.tags_vector = embeddings.embed_query(tags_str)
-        if self.type:
-            self.type_vector = embeddings.embed_query(self.type)
+        embed_instances([self])
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -39,12 +43,16 @@ class InterestedSkill(models.Model):
     learning_outcomes = ArrayField(models.TextField(), default=list)
     resources = models.JSONField(default=list)
 
-    title_vector = VectorField(dimensions=384, null=True)
+    title_vector = VectorField(null=True)
+    title_vector_shadow = VectorField(null=True)
+
+    VECTOR_SOURCES = {
+        "title_vector": lambda skill: skill.skill_title,
+    }
 
     class Meta:
         pass
 
     def save(self, *args, **kwargs):
-        if self.title_vector is None:
-            self.title_vector = embeddings.embed_query(self.skill_title)
+        embed_instances([self], only_missing=True)
         super().save(*args, **kwargs)
@@ -2,8 +2,7 @@ from django.contrib.auth.models import AbstractUser, UserManager
 from django.db import models
 from pgvector.django import VectorField 
 from django.contrib.postgres.fields import ArrayField
-from db.models.embeddings import embeddings
-import numpy as np
+from db.models.vector_column import VectorColumn, embed_instances
 
 class APIUserManager(UserManager):
     def create_user(self, email, password=None, **extra_fields):
@@ -25,29 +24,47 @@ class APIUser(AbstractUser):
     specialization = models.CharField("Specialization of the employee", blank=True, null=True)
     job_level = models.IntegerField("The job level of the person", default=1)
 
-    feedbacks = ArrayField(models.CharField(max_length=1000), default=list)
-
     strengths = ArrayField(models.TextField(), default=list)
     improvements = ArrayField(models.TextField(), default=list)
 
-    strengths_vector = VectorField(dimensions=384, null=True)
+    strengths_vector = VectorField(null=True)
+    strengths_vector_shadow = VectorField(null=True)
 
     onboard_supp_hr_query = models.CharField("Supplementary query by the HR for the employee", blank=True, null=True)
     onboard_finalized = models.BooleanField("If the employee's onboard items have been finalized by the employee", blank=True, null=True)
     onboard_json = models.JSONField("The customized onboard items for this employee", blank=True, null=True) # Will have checklist, resources, explanation.
-    onboard_completed_checklist_items = ArrayField(models.TextField(), default=list)
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = []
 
     objects = APIUserManager()
 
+    VECTOR_SOURCES = {
+        # Batch embed each strength and store the centroid
+        "strengths_vector": lambda user: list(user.strengths),
+    }
+
+    @property
+    def feedbacks(self) -> list:
+        """
+        Compatibility accessor for code written against the old feedbacks array: all feedback texts
+        of this user, oldest first. Prefer querying db.models.feedback.Feedback directly.
+        """
+        return list(self.received_feedbacks.order_by("created_at", "id").values_list("text", flat=True))
+
+    @property
+    def onboard_completed_checklist_items(self) -> list:
+        """
+        Compatibility accessor: completed onboarding checklist items (stored in OnboardChecklistProgress).
+        """
+        return list(self.checklist_progress.order_by("completed_at", "id").values_list("item", flat=True))
+
     def save(self, *args, **kwargs):
-        if self.strengths:
-            # Batch embed each strength to save time
-            vecs = embeddings.embed_documents(self.strengths)
-            if vecs:
-                mat = np.array(vecs, dtype=np.float32)
-                centroid = mat.mean(axis=0)
-                self.strengths_vector = centroid.tolist()
+        # Only re-embed strengths when they are being written
+        update_fields = kwargs.get("update_fields")
+        if update_fields is None or "strengths" in update_fields:
+            embed_instances([self])
+            if update_fields is not None:
+                column = VectorColumn.for_field(APIUser, "strengths_vector")
+                kwargs["update_fields"] = set(update_fields) | {field for field, _ in column.written_slots()}
         super().save(*args, **kwargs)
@@ -0,0 +1,256 @@
+"""
+Registry of the embedding model behind every vector column.
+
+Every embedded field (listed in a model's VECTOR_SOURCES) has a twin `<field>_shadow` column.
+One of the two slots is active for reads, the other one can be filled with a different model by
+`manage.py reembed_vectors` and then switched to in a single row update. Reads and writes should go
+through `VectorColumn.for_field(...)` so the query embedding always comes from the same model (and
+vector space) as the stored vectors.
+"""
+
+import time
+import numpy as np
+from django.apps import apps
+from django.db import connection, models, transaction
+from django.db.models.functions import Cast
+from django.utils import timezone
+from pgvector.django import VectorField, CosineDistance
+from db.models.embeddings import EMBEDDING_MODEL, get_embeddings, get_embedding_dimensions
+
+# How long a process trusts its copy of a registry row. The re-embed command waits this long after
+# starting a new run so every worker picks up the dual-writes before rows are backfilled.
+VECTOR_COLUMN_CACHE_SECONDS = 30
+
+_VECTOR_COLUMN_CACHE = {}
+
+
+class VectorColumn(models.Model):
+    PRIMARY = "primary"
+    SHADOW = "shadow"
+    SLOT_CHOICES = [(PRIMARY, "Primary column"), (SHADOW, "Shadow column")]
+
+    table = models.CharField("Model label of the table holding the vectors", max_length=100)
+    field = models.CharField("Name of the primary vector column", max_length=100)
+    active_slot = models.CharField("Slot that reads are served from", max_length=16, choices=SLOT_CHOICES, default=PRIMARY)
+
+    primary_model = models.CharField("Embedding model behind the primary column", max_length=255, blank=True, null=True)
+    primary_dimensions = models.IntegerField(blank=True, null=True)
+    shadow_model = models.CharField("Embedding model behind the shadow column", max_length=255, blank=True, null=True)
+    shadow_dimensions = models.IntegerField(blank=True, null=True)
+
+    reembed_cursor = models.BigIntegerField("Last primary key re-embedded into the inactive slot", default=0)
+    reembed_processed = models.IntegerField("Rows re-embedded into the inactive slot", default=0)
+    reembed_started_at = models.DateTimeField(blank=True, null=True)
+    reembed_completed_at = models.DateTimeField(blank=True, null=True)
+    switched_at = models.DateTimeField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = [['table', 'field']]
+
+    def __str__(self):
+        return f"{self.table}.{self.field} ({self.active_model})"
+
+    @classmethod
+    def for_field(cls, model, field: str, refresh: bool = False):
+        """
+        Returns the registry row for model.field, cached per process for VECTOR_COLUMN_CACHE_SECONDS.
+        Unknown columns are registered with the default embedding model.
+        """
+        key = (model._meta.label_lower, field)
+        cached = _VECTOR_COLUMN_CACHE.get(key)
+        if cached and not refresh and time.monotonic() - cached[0] < VECTOR_COLUMN_CACHE_SECONDS:
+            return cached[1]
+
+        column, created = cls.objects.get_or_create(
+            table=key[0],
+            field=field,
+            defaults={
+                "primary_model": EMBEDDING_MODEL,
+                "primary_dimensions": get_embedding_dimensions(EMBEDDING_MODEL),
+            },
+        )
+        _VECTOR_COLUMN_CACHE[key] = (time.monotonic(), column)
+        return column
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        _VECTOR_COLUMN_CACHE.pop((self.table, self.field), None)
+
+    # Slots
+
+    def slot_field(self, slot: str) -> str:
+        return self.field if slot == self.PRIMARY else f"{self.field}_shadow"
+
+    def slot_model(self, slot: str):
+        return self.primary_model if slot == self.PRIMARY else self.shadow_model
+
+    def slot_dimensions(self, slot: str):
+        return self.primary_dimensions if slot == self.PRIMARY else self.shadow_dimensions
+
+    @property
+    def inactive_slot(self) -> str:
+        return self.SHADOW if self.active_slot == self.PRIMARY else self.PRIMARY
+
+    @property
+    def active_field(self) -> str:
+        return self.slot_field(self.active_slot)
+
+    @property
+    def active_model(self) -> str:
+        return self.slot_model(self.active_slot)
+
+    @property
+    def active_dimensions(self) -> int:
+        return self.slot_dimensions(self.active_slot)
+
+    @property
+    def inactive_field(self) -> str:
+        return self.slot_field(self.inactive_slot)
+
+    @property
+    def inactive_model(self):
+        return self.slot_model(self.inactive_slot)
+
+    def written_slots(self) -> list:
+        """
+        (column name, embedding model) pairs that a save has to fill. The inactive slot is kept
+        in sync while it has a model recorded, i.e. during a re-embed and until it is released.
+        """
+        slots = [(self.active_field, self.active_model)]
+        if self.inactive_model:
+            slots.append((self.inactive_field, self.inactive_model))
+        return slots
+
+    def set_slot(self, slot: str, model_name, dimensions):
+        if slot == self.PRIMARY:
+            self.primary_model, self.primary_dimensions = model_name, dimensions
+        else:
+            self.shadow_model, self.shadow_dimensions = model_name, dimensions
+
+    def index_name(self, slot: str) -> str:
+        return f"{self.table.replace('.', '_')}_{self.slot_field(slot)}_hnsw"[:63]
+
+    # Reads
+
+    def embed_query(self, text: str) -> list:
+        return get_embeddings(self.active_model).embed_query(text)
+
+    def embed_documents(self, texts: list) -> list:
+        return get_embeddings(self.active_model).embed_documents(texts)
+
+    def distance(self, vector):
+        """
+        Cosine distance expression between the active column and a vector from embed_query.
+        The cast matches the HNSW expression index built for the column.
+        """
+        return CosineDistance(
+            Cast(self.active_field, output_field=VectorField(dimensions=self.active_dimensions)),
+            vector,
+        )
+
+
+def embed_sources(embedder, sources: list) -> list:
+    """
+    Embeds a list of VECTOR_SOURCES values with a single embed_documents call.
+    A value can be a text, a list of texts (embedded as their centroid) or empty (gives None).
+    """
+    texts = []
+    for source in sources:
+        if source:
+            texts.extend(source if isinstance(source, list) else [source])
+    vecs = embedder.embed_documents(texts) if texts else []
+
+    vectors = []
+    pos = 0
+    for source in sources:
+        if not source:
+            vectors.append(None)
+            continue
+        count = len(source) if isinstance(source, list) else 1
+        chunk = vecs[pos : pos + count]
+        pos += count
+        if count == 1:
+            vectors.append(chunk[0])
+        else:
+            vectors.append(np.array(chunk, dtype=np.float32).mean(axis=0).tolist())
+    return vectors
+
+
+def embed_instances(instances: list, fields: list = None, only_missing: bool = False):
+    """
+    Fills the vector columns of unsaved model instances from their VECTOR_SOURCES, writing every slot
+    returned by VectorColumn.written_slots(). Empty sources leave the column untouched.
+
+    Args:
+        instances: instances of one model
+        fields: restrict to these vector fields (default: all in VECTOR_SOURCES)
+        only_missing: skip instances whose active column is already set
+    """
+    if not instances:
+        return
+
+    model = type(instances[0])
+    pending = {}  # embedding model -> [(instance, column name, source)]
+    for field, source_fn in model.VECTOR_SOURCES.items():
+        if fields is not None and field not in fields:
+            continue
+        column = VectorColumn.for_field(model, field)
+        for instance in instances:
+            if only_missing and getattr(instance, column.active_field) is not None:
+                continue
+            source = source_fn(instance)
+            if not source:
+                continue
+            for attname, model_name in column.written_slots():
+                pending.setdefault(model_name, []).append((instance, attname, source))
+
+    for model_name, targets in pending.items():
+        vectors = embed_sources(get_embeddings(model_name), [source for _, _, source in targets])
+        for (instance, attname, _), vector in zip(targets, vectors):
+            setattr(instance, attname, vector)
+
+
+def start_reembed(column: VectorColumn, model_name: str, dimensions: int):
+    """
+    Records model_name as the model of the inactive slot and resets the re-embed progress.
+    """
+    column.set_slot(column.inactive_slot, model_name, dimensions)
+    column.reembed_cursor = 0
+    column.reembed_processed = 0
+    column.reembed_started_at = timezone.now()
+    column.reembed_completed_at = None
+    column.save()
+
+
+def rebuild_index(column: VectorColumn, slot: str):
+    """
+    Drops and recreates the HNSW index of one slot, cast to the dimensions of the model behind it.
+    Runs CONCURRENTLY so reads and writes on the table keep going while the index builds.
+    """
+    table = apps.get_model(column.table)._meta.db_table
+    name = column.index_name(slot)
+    with connection.cursor() as cursor:
+        cursor.execute(f'DROP INDEX CONCURRENTLY IF EXISTS "{name}"')
+        cursor.execute(
+            f'CREATE INDEX CONCURRENTLY "{name}" ON "{table}" USING hnsw '
+            f'((("{column.slot_field(slot)}")::vector({column.slot_dimensions(slot)})) vector_cosine_ops)'
+        )
+
+
+def switch_active_slot(column: VectorColumn, release_previous: bool = False) -> VectorColumn:
+    """
+    Atomically points reads at the re-embedded slot. The previous slot keeps its model (and keeps
+    receiving dual-writes) so the switch can be reverted, unless release_previous is set.
+    """
+    with transaction.atomic():
+        column = VectorColumn.objects.select_for_update().get(pk=column.pk)
+        if not column.inactive_model or not column.reembed_completed_at:
+            raise Exception(f"{column.table}.{column.field} has no completed re-embed to switch to")
+        column.active_slot = column.inactive_slot
+        column.switched_at = timezone.now()
+        if release_previous:
+            column.set_slot(column.inactive_slot, None, None)
+            column.reembed_completed_at = None
+        column.save()
+    return column